@@ -3,43 +3,232 @@
 Prediction Controller - Similar a Laravel Controller
 Maneja requests de prediccin
 """
+import asyncio
+import os
+import threading
+import time
+from pathlib import Path
 from fastapi import HTTPException
+from pydantic import ValidationError
+from app.config.settings import settings
 from app.services.MLPredictionService import MLPredictionService
-from app.schemas.PredictionRequest import PredictionRequest, PredictionResponse
+from app.services.InferenceExecutor import InferenceExecutor, ColaLlenaError
+from app.services.MicroBatcher import MicroBatcher
+from app.services.TrainingJobService import TrainingJobService, EntrenamientoEnCursoError
+from app.services.IngestService import IngestService
+from app.services.RequestProfiler import PerfilRequest
+from app.models.ObservationLog import ObservationLog
+from app.schemas.ObservationRequest import ObservationBatchRequest
+from app.schemas.PredictionRequest import (
+    PredictionRequest,
+    PredictionResponse,
+    PredictionBatchRequest,
+    PredictionBatchItemError,
+    PredictionBatchResponse
+)
+
+
+def _segundos_desde_inicio_proceso() -> float | None:
+    """Antiguedad del proceso segun /proc (None fuera de Linux)"""
+    try:
+        uptime = float(Path('/proc/uptime').read_text().split()[0])
+        inicio = int(Path('/proc/self/stat').read_text().rsplit(')', 1)[1].split()[19])
+        return round(uptime - inicio / os.sysconf('SC_CLK_TCK'), 2)
+    except (OSError, ValueError, IndexError):
+        return None
 
 
 class PredictionController:
     """Controller para endpoints de prediccin"""
 
     def __init__(self):
-        """Inicializa el controller con el servicio ML"""
-        self.ml_service = MLPredictionService()
+        """
+        Inicializa el controller con el servicio ML
+
+        No carga el modelo: eso ocurre en preparar() (lo lanza el arranque
+        del servidor) o, si llega antes un request, en el primer uso.
+        """
+        self.ml_service = MLPredictionService(cargar=False)
+        self.executor = InferenceExecutor(
+            self.ml_service,
+            modo=settings.INFERENCE_EXECUTOR,
+            workers=settings.INFERENCE_WORKERS,
+            max_pendientes=settings.INFERENCE_MAX_PENDING,
+            timeout_segundos=settings.INFERENCE_TIMEOUT_SECONDS
+        )
+        self.batcher = MicroBatcher(
+            self.executor,
+            ventana_ms=settings.MICROBATCH_WINDOW_MS,
+            max_lote=settings.MICROBATCH_MAX_SIZE
+        ) if settings.MICROBATCH_WINDOW_MS > 0 else None
+        self.training_jobs = TrainingJobService(
+            al_completar=self._instalar_modelo_entrenado,
+            politica=settings.TRAINING_OVERLAP_POLICY,
+            max_en_cola=settings.TRAINING_MAX_QUEUED
+        )
+        self.ingest = IngestService(
+            ObservationLog(),
+            self.training_jobs,
+            umbral=settings.INGEST_RETRAIN_THRESHOLD,
+            intervalo_segundos=settings.INGEST_RETRAIN_INTERVAL_SECONDS
+        )
+
+        # Fase de arranque: /ready responde 200 cuando se completa
+        self.listo = threading.Event()
+        self.arranque = {'status': 'starting'}
+
+    def preparar(self):
+        """
+        Fase de arranque: carga el modelo y hace una prediccion de calentamiento
+
+        Registra la duracion de cada etapa y el tiempo desde que arranco el
+        proceso hasta estar listo; si algo falla queda en 'failed' con el error.
+        """
+        tiempos = {}
+        try:
+            inicio = time.perf_counter()
+            self.ml_service.modelo_entrenado()
+            tiempos['cargar_modelo'] = round(time.perf_counter() - inicio, 3)
+
+            inicio = time.perf_counter()
+            self.ml_service.calentar()
+            tiempos['calentar'] = round(time.perf_counter() - inicio, 3)
+        except Exception as e:
+            print(f"[Error] Fallo el arranque del servicio: {type(e).__name__}: {e}")
+            self.arranque = {'status': 'failed', 'error': f"{type(e).__name__}: {e}", 'stage_seconds': tiempos}
+            return
+
+        self.arranque = {
+            'status': 'ready',
+            'model_version': self.ml_service.model.version_modelo,
+            'stage_seconds': tiempos,
+            'since_process_start_seconds': _segundos_desde_inicio_proceso()
+        }
+        self.listo.set()
+        self.ingest.iniciar_programacion()
+        print(f"[OK] Servicio listo en {self.arranque['since_process_start_seconds']} s desde el inicio del proceso")
+
+    async def ready(self) -> dict:
+        """
+        Endpoint: GET /ready
+        Readiness: 200 solo con el modelo cargado y la prediccion de calentamiento hecha
 
-    async def predict(self, request: PredictionRequest) -> dict:
+        Returns:
+            Version servida y tiempos de la fase de arranque
+
+        Raises:
+            HTTPException: 503 mientras arranca o si el arranque fallo
+        """
+        if not self.listo.is_set():
+            raise HTTPException(status_code=503, detail=self.arranque)
+
+        return {
+            "success": True,
+            "data": self.arranque
+        }
+
+    async def predict(self, request: PredictionRequest, perfil: PerfilRequest = None) -> dict:
         """
         Endpoint: POST /predict
         Predice el precio de un inmueble
 
         Args:
             request: Datos del inmueble
+            perfil: Perfil del request (X-Profile: 1 con PROFILING_ENABLED)
 
         Returns:
             Prediccin de precio
         """
         try:
-            # Delegar lgica al Service
-            response = self.ml_service.predecir_precio(request)
+            if perfil is not None:
+                # Request perfilado: fuera de los micro-lotes y del cache, con
+                # cProfile en el thread que predice
+                perfil.marcar('validacion')
+                response = await asyncio.to_thread(
+                    perfil.perfilar, self.ml_service.predecir_perfilado, request, perfil.tiempos
+                )
+                perfil.marcar()
+            # Delegar lgica al Service (en el pool, sin bloquear el event loop),
+            # agrupado con los /predict concurrentes si hay micro-lotes
+            elif self.batcher is not None:
+                response = await self.batcher.predecir(request)
+            else:
+                response = await self.executor.ejecutar('predecir_precio', request)
 
             return {
                 "success": True,
                 "data": response.model_dump()
             }
 
+        except ColaLlenaError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except TimeoutError:
+            raise HTTPException(status_code=504, detail="Tiempo de prediccin agotado")
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error en prediccin: {str(e)}")
 
+    async def predict_batch(self, request: PredictionBatchRequest) -> dict:
+        """
+        Endpoint: POST /predict/batch
+        Predice el precio de N inmuebles en una sola pasada del modelo
+
+        Cada inmueble se valida por separado: los invalidos se reportan
+        por indice y no hacen fallar al resto del lote.
+
+        Args:
+            request: Lote de inmuebles
+
+        Returns:
+            Predicciones en el mismo orden del lote y errores por indice
+        """
+        validos = []
+        indices_validos = []
+        errores = []
+
+        for index, item in enumerate(request.inmuebles):
+            try:
+                validos.append(PredictionRequest.model_validate(item))
+                indices_validos.append(index)
+            except ValidationError as e:
+                errores.append(PredictionBatchItemError(
+                    index=index,
+                    errores=[
+                        {'loc': list(err['loc']), 'msg': err['msg'], 'type': err['type']}
+                        for err in e.errors()
+                    ]
+                ))
+
+        try:
+            # Delegar lgica al Service (en el pool, sin bloquear el event loop)
+            predicciones = await self.executor.ejecutar('predecir_precios', validos) if validos else []
+
+            resultados = [None] * len(request.inmuebles)
+            for index, prediccion in zip(indices_validos, predicciones):
+                resultados[index] = prediccion
+
+            response = PredictionBatchResponse(
+                total=len(request.inmuebles),
+                exitosos=len(predicciones),
+                resultados=resultados,
+                errores=errores
+            )
+
+            return {
+                "success": True,
+                "data": response.model_dump()
+            }
+
+        except ColaLlenaError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except TimeoutError:
+            raise HTTPException(status_code=504, detail="Tiempo de prediccion por lotes agotado")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error en prediccion por lotes: {str(e)}")
+
     async def status(self) -> dict:
         """
         Endpoint: GET /status
@@ -50,6 +239,11 @@ class PredictionController:
         """
         try:
             status_info = self.ml_service.get_model_status()
+            status_info['executor'] = self.executor.estadisticas()
+            # Proceso que respondio (con varios workers, cual de ellos)
+            status_info['pid'] = os.getpid()
+            if self.batcher is not None:
+                status_info['microbatch'] = self.batcher.estadisticas()
 
             return {
                 "success": True,
@@ -62,13 +256,16 @@ class PredictionController:
     async def train(self, n_samples: int = 500) -> dict:
         """
         Endpoint: POST /train
-        Entrena o re-entrena el modelo
+        Lanza un job de entrenamiento en segundo plano
+
+        Responde enseguida con el job; el entrenamiento corre en otro
+        proceso y el modelo nuevo se instala al terminar.
 
         Args:
             n_samples: Nmero de muestras a generar
 
         Returns:
-            Resultado del entrenamiento
+            Estado inicial del job (con su job_id)
         """
         try:
             if not (100 <= n_samples <= 10000):
@@ -77,14 +274,159 @@ class PredictionController:
                     detail="n_samples debe estar entre 100 y 10000"
                 )
 
-            result = self.ml_service.entrenar_modelo(n_samples)
+            job = self.training_jobs.crear(n_samples)
 
             return {
                 "success": True,
-                "data": result
+                "data": job
             }
 
         except HTTPException:
             raise
+        except EntrenamientoEnCursoError as e:
+            raise HTTPException(status_code=409, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error entrenando modelo: {str(e)}")
+
+    async def train_status(self, job_id: str) -> dict:
+        """
+        Endpoint: GET /train/{job_id}
+        Progreso, tiempos por etapa y metricas finales de un job
+
+        Args:
+            job_id: Id devuelto por POST /train
+
+        Returns:
+            Estado del job
+        """
+        job = self.training_jobs.obtener(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job de entrenamiento no encontrado: {job_id}")
+
+        return {
+            "success": True,
+            "data": job
+        }
+
+    async def ingest_observations(self, request: ObservationBatchRequest) -> dict:
+        """
+        Endpoint: POST /observations
+        Agrega un lote de observaciones al log de ingesta
+
+        Args:
+            request: Lote de inmuebles alquilados con su precio
+
+        Returns:
+            Observaciones aceptadas, pendientes y el job de reentrenamiento
+            si el lote alcanzo el umbral
+        """
+        try:
+            # Un write + fsync: se hace fuera del event loop
+            resultado = await asyncio.to_thread(self.ingest.ingestar, request.observaciones)
+
+            return {
+                "success": True,
+                "data": resultado
+            }
+
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error ingestando observaciones: {str(e)}")
+
+    async def observations(self) -> dict:
+        """
+        Endpoint: GET /observations
+        Estado del log de observaciones y del ultimo reentrenamiento
+
+        Returns:
+            Pendientes, segmentos sellados, filas del dataset y ultimo job
+        """
+        try:
+            return {
+                "success": True,
+                "data": self.ingest.estadisticas()
+            }
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error obteniendo observaciones: {str(e)}")
+
+    async def retrain_observations(self) -> dict:
+        """
+        Endpoint: POST /observations/retrain
+        Lanza un reentrenamiento con las observaciones sin esperar al umbral
+
+        Returns:
+            Estado inicial del job (con su job_id)
+        """
+        try:
+            job = self.ingest.reentrenar()
+
+            return {
+                "success": True,
+                "data": job
+            }
+
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except EntrenamientoEnCursoError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error lanzando reentrenamiento: {str(e)}")
+
+    async def models(self) -> dict:
+        """
+        Endpoint: GET /models
+        Versiones del registro de modelos y la version en uso
+
+        Returns:
+            Version actual, version servida y metadatos de cada version
+        """
+        try:
+            info = self.ml_service.registry.listar()
+            info['serving'] = self.ml_service.model.version_modelo
+
+            return {
+                "success": True,
+                "data": info
+            }
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error listando modelos: {str(e)}")
+
+    async def rollback(self, version: str = None) -> dict:
+        """
+        Endpoint: POST /models/rollback
+        Vuelve a una version anterior del modelo
+
+        Args:
+            version: Version destino (por defecto la anterior a la actual)
+
+        Returns:
+            Version activada
+        """
+        try:
+            # Carga el modelo completo: fuera del event loop
+            version = await asyncio.to_thread(self.ml_service.rollback, version)
+
+            # Los procesos del pool cargan la version activada
+            if self.executor.modo == 'process':
+                self.executor.reiniciar()
+
+            return {
+                "success": True,
+                "data": {"current": version}
+            }
+
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error en rollback: {str(e)}")
+
+    def _instalar_modelo_entrenado(self, version: str):
+        """Instala la version que registro el job (llamado desde el monitor del job)"""
+        self.ml_service.instalar_version(version)
+
+        # Los procesos del pool cargan la version nueva
+        if self.executor.modo == 'process':
+            self.executor.reiniciar()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Metrics Middleware - Cuenta y mide los requests HTTP
+Middleware ASGI puro (sin BaseHTTPMiddleware): no envuelve el body ni
+agrega tareas por request
+"""
+import time
+from app.services.MetricsRegistry import REQUESTS, DURACION_REQUEST
+
+
+class MetricsMiddleware:
+    """
+    Registra cada request HTTP en REQUESTS y DURACION_REQUEST
+
+    La ruta se etiqueta con la plantilla de FastAPI (/train/{job_id}, no
+    /train/abc123) para no crear una serie por URL; lo que no coincide con
+    ninguna ruta queda como 'unmatched'.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        estado = 500
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje['type'] == 'http.response.start':
+                estado = mensaje['status']
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            # El router deja en el scope la ruta que atendio el request
+            ruta = scope.get('route')
+            plantilla = ruta.path if ruta is not None else 'unmatched'
+            DURACION_REQUEST.etiquetar(scope['method'], plantilla).observar(time.perf_counter() - inicio)
+            REQUESTS.etiquetar(scope['method'], plantilla, str(estado)).incrementar()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Profiling Middleware - Perfil por request a pedido (header X-Profile: 1)
+Solo se instala con PROFILING_ENABLED
+"""
+from app.services.RequestProfiler import PerfilRequest
+
+
+class ProfilingMiddleware:
+    """
+    Crea un PerfilRequest para los requests con X-Profile: 1
+
+    El perfil queda en `request.state.perfil`. Al enviar la respuesta se
+    cierra la etapa 'serializacion' (desde que el endpoint devolvio hasta
+    que la respuesta esta lista) y se agregan los headers Server-Timing y,
+    si se guardo un cProfile, X-Profile-Id. Los requests sin el header
+    siguen de largo.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not any(
+            nombre == b'x-profile' and valor.strip() == b'1' for nombre, valor in scope['headers']
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        perfil = PerfilRequest()
+        scope.setdefault('state', {})['perfil'] = perfil
+
+        async def enviar(mensaje):
+            if mensaje['type'] == 'http.response.start':
+                perfil.marcar('serializacion')
+                headers = list(mensaje.get('headers', []))
+                headers.append((b'server-timing', perfil.server_timing().encode('latin-1')))
+                if perfil.archivo is not None:
+                    headers.append((b'x-profile-id', perfil.id.encode('latin-1')))
+                mensaje = {**mensaje, 'headers': headers}
+            await send(mensaje)
+
+        await self.app(scope, receive, enviar)
@@ -3,9 +3,10 @@
 Prediction Routes - Similar a routes/api.php de Laravel
 Define las rutas de la API
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from app.api.controllers.PredictionController import PredictionController
-from app.schemas.PredictionRequest import PredictionRequest
+from app.schemas.PredictionRequest import PredictionRequest, PredictionBatchRequest
+from app.schemas.ObservationRequest import ObservationBatchRequest
 
 # Crear router
 router = APIRouter()
@@ -15,7 +16,7 @@ prediction_controller = PredictionController()
 
 
 @router.post("/predict", tags=["Prediction"])
-async def predict_price(request: PredictionRequest):
+async def predict_price(request: PredictionRequest, contexto: Request):
     """
     Predice el precio de un inmueble basado en sus caractersticas
 
@@ -26,8 +27,25 @@ async def predict_price(request: PredictionRequest):
     - **lon**: Longitud GPS
     - **parking**: Tiene parking (0=no, 1=si)
     - **piscina**: Tiene piscina (0=no, 1=si)
+
+    Con PROFILING_ENABLED, el header `X-Profile: 1` devuelve los tiempos por
+    etapa en `Server-Timing` y guarda un cProfile en PROFILES_DIR (su id en
+    `X-Profile-Id`).
     """
-    return await prediction_controller.predict(request)
+    return await prediction_controller.predict(request, getattr(contexto.state, 'perfil', None))
+
+
+@router.post("/predict/batch", tags=["Prediction"])
+async def predict_price_batch(request: PredictionBatchRequest):
+    """
+    Predice el precio de un lote de inmuebles en una sola pasada del modelo
+
+    - **inmuebles**: Lista de inmuebles con los mismos campos que `/predict`
+
+    Los inmuebles invalidos se reportan en `errores` con su indice y su
+    posicion en `resultados` queda en null.
+    """
+    return await prediction_controller.predict_batch(request)
 
 
 @router.get("/status", tags=["Health"])
@@ -38,11 +56,76 @@ async def get_status():
     return await prediction_controller.status()
 
 
-@router.post("/train", tags=["Admin"])
+@router.post("/train", tags=["Admin"], status_code=202)
 async def train_model(n_samples: int = 500):
     """
-    Entrena o re-entrena el modelo ML
+    Lanza el entrenamiento del modelo ML en segundo plano
 
     - **n_samples**: Nmero de muestras sintticas a generar (100-10000)
+
+    Responde con el `job_id`; el progreso se consulta en `/train/{job_id}`.
+    Si ya hay un entrenamiento en curso responde 409 (o lo encola, segun
+    TRAINING_OVERLAP_POLICY).
     """
     return await prediction_controller.train(n_samples)
+
+
+@router.get("/train/{job_id}", tags=["Admin"])
+async def get_train_status(job_id: str):
+    """
+    Estado de un job de entrenamiento: etapa actual, segundos por etapa y
+    metricas finales (o el error)
+    """
+    return await prediction_controller.train_status(job_id)
+
+
+@router.post("/observations", tags=["Ingest"])
+async def ingest_observations(request: ObservationBatchRequest):
+    """
+    Ingesta un lote de alquileres observados (precio real) para reentrenar
+
+    - **observaciones**: Inmuebles con los campos de `/predict` mas
+      `precio_eth` y, opcional, `observado_en`
+
+    Al juntar INGEST_RETRAIN_THRESHOLD observaciones se lanza un job de
+    entrenamiento con ellas (se devuelve en `retraining_job`).
+    """
+    return await prediction_controller.ingest_observations(request)
+
+
+@router.get("/observations", tags=["Ingest"])
+async def get_observations():
+    """
+    Estado del log de observaciones: pendientes, segmentos sellados, filas
+    del dataset compactado y ultimo reentrenamiento
+    """
+    return await prediction_controller.observations()
+
+
+@router.post("/observations/retrain", tags=["Admin"], status_code=202)
+async def retrain_observations():
+    """
+    Lanza ya un reentrenamiento con las observaciones ingestadas
+
+    Responde con el `job_id`; el progreso se consulta en `/train/{job_id}`.
+    """
+    return await prediction_controller.retrain_observations()
+
+
+@router.get("/models", tags=["Admin"])
+async def list_models():
+    """
+    Lista las versiones del registro de modelos, la version `current` y la
+    que esta sirviendo
+    """
+    return await prediction_controller.models()
+
+
+@router.post("/models/rollback", tags=["Admin"])
+async def rollback_model(version: str = None):
+    """
+    Vuelve a una version anterior del modelo
+
+    - **version**: Version destino (por defecto la anterior a la actual)
+    """
+    return await prediction_controller.rollback(version)
@@ -22,15 +22,30 @@ class Settings:
     # Server
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "5000"))
+    # Procesos de main.py: 1 = un solo uvicorn; >1 = workers pre-fork supervisados (solo POSIX)
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", "1"))
+    # Pre-fork: cada cuanto se consulta `current` del registro y gracia para requests en curso
+    SERVER_VERSION_POLL_SECONDS: float = float(os.getenv("SERVER_VERSION_POLL_SECONDS", "2"))
+    SERVER_GRACEFUL_TIMEOUT: float = float(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
 
     # Paths
     BASE_DIR: Path = BASE_DIR
     MODEL_PATH: str = os.getenv("MODEL_PATH", "storage/models/random_forest_model.pkl")
-    DATASET_PATH: str = os.getenv("DATASET_PATH", "storage/datasets/synthetic_data.csv")
+    # Extension .cols = formato columnar (un .npy por columna, mapeado en memoria); .csv = texto
+    DATASET_PATH: str = os.getenv("DATASET_PATH", "storage/datasets/synthetic_data.cols")
+    # Registro de versiones del modelo (MODEL_PATH queda como respaldo si esta vacio)
+    MODEL_REGISTRY_DIR: str = os.getenv("MODEL_REGISTRY_DIR", "storage/models/registry")
+    # Servir las versiones desde su .forest mapeado en memoria (paginas compartidas entre workers)
+    MODEL_MMAP: bool = os.getenv("MODEL_MMAP", "True") == "True"
+    # Observaciones reales (POST /observations): log append-only y dataset compactado
+    OBSERVATIONS_LOG_DIR: str = os.getenv("OBSERVATIONS_LOG_DIR", "storage/observations")
+    OBSERVATIONS_DATASET_PATH: str = os.getenv("OBSERVATIONS_DATASET_PATH", "storage/datasets/observaciones.cols")
 
     # Geolocation - Centro Santa Cruz de la Sierra
     CENTRO_SCZ_LAT: float = float(os.getenv("CENTRO_SCZ_LAT", "-17.783889"))
     CENTRO_SCZ_LON: float = float(os.getenv("CENTRO_SCZ_LON", "-63.182222"))
+    # GeoJSON con poligonos de zonas especiales adicionales (vacio = solo las fijas)
+    ZONAS_GEOJSON_PATH: str = os.getenv("ZONAS_GEOJSON_PATH", "")
 
     # Model Training
     RANDOM_STATE: int = int(os.getenv("RANDOM_STATE", "42"))
@@ -38,6 +53,49 @@ class Settings:
     MAX_DEPTH: int = int(os.getenv("MAX_DEPTH", "10"))
     MIN_SAMPLES_SPLIT: int = int(os.getenv("MIN_SAMPLES_SPLIT", "5"))
     TEST_SIZE: float = float(os.getenv("TEST_SIZE", "0.2"))
+    # Filas por bloque al generar datasets sinteticos (memoria acotada por bloque)
+    DATASET_SHARD_ROWS: int = int(os.getenv("DATASET_SHARD_ROWS", "1000000"))
+    # Entrenamiento por bloques: filas leidas por bloque y tope de filas para las metricas
+    TRAINING_CHUNK_ROWS: int = int(os.getenv("TRAINING_CHUNK_ROWS", "500000"))
+    TRAINING_EVAL_MAX_ROWS: int = int(os.getenv("TRAINING_EVAL_MAX_ROWS", "200000"))
+
+    # Jobs de POST /train solapados: "reject" (409) o "queue" (hasta TRAINING_MAX_QUEUED)
+    TRAINING_OVERLAP_POLICY: str = os.getenv("TRAINING_OVERLAP_POLICY", "reject")
+    TRAINING_MAX_QUEUED: int = int(os.getenv("TRAINING_MAX_QUEUED", "4"))
+
+    # Reentrenamiento con observaciones: al juntar N pendientes y/o cada tantos segundos (0 desactiva)
+    INGEST_MAX_BATCH: int = int(os.getenv("INGEST_MAX_BATCH", "5000"))
+    INGEST_RETRAIN_THRESHOLD: int = int(os.getenv("INGEST_RETRAIN_THRESHOLD", "10000"))
+    INGEST_RETRAIN_INTERVAL_SECONDS: float = float(os.getenv("INGEST_RETRAIN_INTERVAL_SECONDS", "3600"))
+
+    # Inferencia: "sklearn" (arboles de sklearn) o "flat" (FlatForest, NumPy puro)
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "flat")
+
+    # Ejecucion de la inferencia fuera del event loop: "thread", "process" o "inline"
+    INFERENCE_EXECUTOR: str = os.getenv("INFERENCE_EXECUTOR", "thread")
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+    INFERENCE_MAX_PENDING: int = int(os.getenv("INFERENCE_MAX_PENDING", "64"))
+    INFERENCE_TIMEOUT_SECONDS: float = float(os.getenv("INFERENCE_TIMEOUT_SECONDS", "10"))
+
+    # Micro-lotes de /predict: ventana de espera (0 desactiva) y tamano maximo
+    MICROBATCH_WINDOW_MS: float = float(os.getenv("MICROBATCH_WINDOW_MS", "2"))
+    MICROBATCH_MAX_SIZE: int = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+
+    # Prediccion por lotes
+    BATCH_MAX_SIZE: int = int(os.getenv("BATCH_MAX_SIZE", "5000"))
+
+    # GET /metrics (formato Prometheus) y registro de requests por ruta y estado
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True") == "True"
+
+    # Perfil por request con el header X-Profile: 1 (Server-Timing + cProfile en PROFILES_DIR)
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "False") == "True"
+    PROFILES_DIR: str = os.getenv("PROFILES_DIR", "storage/profiles")
+    PROFILES_MAX_FILES: int = int(os.getenv("PROFILES_MAX_FILES", "100"))
+
+    # Cache de predicciones individuales (0 entradas lo desactiva)
+    CACHE_MAX_SIZE: int = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+    CACHE_LAT_LON_DECIMALS: int = int(os.getenv("CACHE_LAT_LON_DECIMALS", "5"))
 
     @staticmethod
     def get_full_path(relative_path: str) -> Path:
@@ -0,0 +1,440 @@
+# -*- coding: utf-8 -*-
+"""
+Flat Forest - Motor de inferencia del Random Forest en arrays NumPy
+Exporta los arboles de sklearn a arrays contiguos y los evalua por niveles
+"""
+import json
+import numpy as np
+from pathlib import Path
+
+# Archivo de bosque compacto: MAGIA, largo del encabezado (uint32), encabezado
+# JSON y los arrays, cada uno alineado a ALINEACION bytes
+MAGIA = b'FLATFRST'
+VERSION_FORMATO = 1
+ALINEACION = 64
+
+
+def _dtype_indice(n: int) -> np.dtype:
+    """Entero sin signo mas angosto que representa 0..n-1"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if n - 1 <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+def _umbral_float32(threshold: np.ndarray) -> np.ndarray:
+    """
+    Umbral float32 equivalente para entradas float32
+
+    Es el mayor float32 <= umbral: para cualquier x float32,
+    x <= umbral si y solo si x <= umbral32, asi que el recorrido no cambia.
+    """
+    umbral32 = threshold.astype(np.float32)
+    redondeado_arriba = umbral32.astype(np.float64) > threshold
+    umbral32[redondeado_arriba] = np.nextafter(umbral32[redondeado_arriba], np.float32(-np.inf))
+    return umbral32
+
+
+class EspacioTrabajo:
+    """
+    Buffers preasignados para evaluar un FlatForest sin asignar memoria
+
+    `X` es el buffer de entrada (float64, en el orden de feature_names) donde
+    el llamador escribe las filas; el resto son temporales del recorrido,
+    con los mismos dtypes que los arrays del bosque (np.take no convierte).
+    Se dimensiona para `capacidad` filas y se evalua sobre las primeras n.
+    No es thread-safe: cada thread usa su propio espacio de trabajo.
+    """
+
+    def __init__(self, capacidad: int, n_features: int, n_arboles: int, dtypes: dict = None):
+        """
+        Args:
+            capacidad: Filas maximas
+            n_features: Columnas de la entrada
+            n_arboles: Arboles del bosque
+            dtypes: dtype de 'feature', 'threshold', 'left', 'right' y 'value'
+                del bosque (por defecto los de desde_sklearn)
+        """
+        dtypes = {**FlatForest.DTYPES_ANCHOS, **(dtypes or {})}
+        self.capacidad = capacidad
+        self.X = np.zeros((capacidad, n_features), dtype=np.float64)
+        self.X32 = np.zeros((capacidad, n_features), dtype=np.float32)
+        self.offset_filas = (np.arange(capacidad, dtype=np.intp) * n_features)[:, None]
+
+        forma = (capacidad, n_arboles)
+        self.nodos = np.empty(forma, dtype=np.intp)
+        self.feature = np.empty(forma, dtype=dtypes['feature'])
+        self.izquierda = np.empty(forma, dtype=dtypes['left'])
+        self.derecha = np.empty(forma, dtype=dtypes['right'])
+        self.indices = np.empty(forma, dtype=np.intp)
+        self.x = np.empty(forma, dtype=dtypes['threshold'])
+        self.umbral = np.empty(forma, dtype=dtypes['threshold'])
+        self.mascara = np.empty(forma, dtype=bool)
+        self.valores = np.empty(forma, dtype=dtypes['value'])
+        self.diferencias = np.empty(forma, dtype=np.float64)
+
+        self.media = np.empty(capacidad, dtype=np.float64)
+        self.std = np.empty(capacidad, dtype=np.float64)
+
+
+class FlatForest:
+    """
+    Bosque exportado a arrays NumPy contiguos
+
+    Todos los nodos de todos los arboles se concatenan en un solo juego de
+    arrays (feature, threshold, left, right, value). Los indices de hijos son
+    globales y las hojas apuntan a si mismas, de modo que recorrer el bosque
+    es repetir `max_depth` veces el mismo paso vectorizado sobre una matriz
+    de nodos (N filas x T arboles).
+
+    La instancia es inmutable despues de construirla, por lo que se puede
+    usar desde varios threads sin locks.
+
+    desde_sklearn exporta con dtypes anchos (int64/float64) y resultados
+    identicos a sklearn; `compactar()` devuelve una version con los dtypes
+    mas angostos posibles, que es la que se serializa con `guardar`.
+    """
+
+    DTYPES_ANCHOS = {
+        'feature': np.int64,
+        'threshold': np.float64,
+        'left': np.int64,
+        'right': np.int64,
+        'value': np.float64,
+    }
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features: int
+    ):
+        """
+        Args:
+            feature: Indice de feature de cada nodo
+            threshold: Umbral de cada nodo (se va a la izquierda si x <= umbral);
+                float64, o float32 para comparar contra la entrada en float32
+            left: Indice global del hijo izquierdo (la propia hoja en las hojas)
+            right: Indice global del hijo derecho (la propia hoja en las hojas)
+            value: Prediccion de cada nodo
+            roots: Indice global de la raiz de cada arbol
+            max_depth: Profundidad maxima entre todos los arboles
+            n_features: Numero de columnas de la matriz de entrada
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+
+        for array in (feature, threshold, left, right, value, roots):
+            array.flags.writeable = False
+
+    @property
+    def n_arboles(self) -> int:
+        """Numero de arboles del bosque"""
+        return len(self.roots)
+
+    @property
+    def n_nodos(self) -> int:
+        """Numero total de nodos del bosque"""
+        return len(self.feature)
+
+    @classmethod
+    def desde_sklearn(cls, model) -> "FlatForest":
+        """
+        Exporta un RandomForestRegressor entrenado
+
+        Args:
+            model: RandomForestRegressor de sklearn ya entrenado
+
+        Returns:
+            FlatForest equivalente
+        """
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodos = tree.node_count
+            nodos = np.arange(n_nodos, dtype=np.int64)
+            es_hoja = tree.children_left == -1
+
+            features.append(np.where(es_hoja, 0, tree.feature).astype(np.int64))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(es_hoja, nodos, tree.children_left) + offset)
+            rights.append(np.where(es_hoja, nodos, tree.children_right) + offset)
+            values.append(tree.value[:, 0, 0].astype(np.float64))
+            roots.append(offset)
+
+            offset += n_nodos
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            left=np.ascontiguousarray(np.concatenate(lefts)),
+            right=np.ascontiguousarray(np.concatenate(rights)),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+            n_features=model.n_features_in_
+        )
+
+    def compactar(self) -> "FlatForest":
+        """
+        Version compacta del bosque, con solo lo que usa la inferencia
+
+        - valores en float32 y umbrales en el mayor float32 <= umbral
+          (mismo recorrido para entradas float32, que es lo que se evalua)
+        - un nodo cuyos dos hijos son hojas con el mismo valor float32 pasa
+          a ser hoja (repetido de abajo hacia arriba) y los nodos que quedan
+          inalcanzables se eliminan
+        - feature e indices de nodos con el entero sin signo mas angosto
+
+        Returns:
+            FlatForest equivalente, salvo el redondeo de los valores a float32
+        """
+        value = self.value.astype(np.float32)
+        left, right = self.left.copy(), self.right.copy()
+        nodos = np.arange(self.n_nodos)
+
+        # Fusionar hojas hermanas identicas hasta que no quede ninguna
+        while True:
+            es_hoja = left == nodos
+            fusionables = ~es_hoja & es_hoja[left] & es_hoja[right] & (value[left] == value[right])
+            if not fusionables.any():
+                break
+            value[fusionables] = value[left[fusionables]]
+            left[fusionables] = nodos[fusionables]
+            right[fusionables] = nodos[fusionables]
+
+        # Nodos alcanzables desde las raices, nivel por nivel
+        alcanzable = np.zeros(self.n_nodos, dtype=bool)
+        frente = self.roots.copy()
+        max_depth = 0
+        while True:
+            alcanzable[frente] = True
+            internos = frente[left[frente] != frente]
+            if len(internos) == 0:
+                break
+            frente = np.concatenate([left[internos], right[internos]])
+            max_depth += 1
+
+        # Renumerar conservando el orden original
+        nuevo_indice = np.cumsum(alcanzable) - 1
+        n_nodos = int(alcanzable.sum())
+        dtype_indice = _dtype_indice(n_nodos)
+        es_hoja = (left == nodos)[alcanzable]
+
+        return FlatForest(
+            feature=np.where(es_hoja, 0, self.feature[alcanzable]).astype(_dtype_indice(self.n_features)),
+            threshold=np.where(es_hoja, 0, _umbral_float32(self.threshold[alcanzable])).astype(np.float32),
+            left=nuevo_indice[left[alcanzable]].astype(dtype_indice),
+            right=nuevo_indice[right[alcanzable]].astype(dtype_indice),
+            value=value[alcanzable],
+            roots=nuevo_indice[self.roots].astype(dtype_indice),
+            max_depth=max_depth,
+            n_features=self.n_features
+        )
+
+    def guardar(self, ruta: Path, metadatos: dict = None):
+        """
+        Serializa el bosque (tal como esta: compactar() antes para achicarlo)
+
+        Args:
+            ruta: Archivo destino
+            metadatos: Datos JSON que viajan en el encabezado
+        """
+        arrays = {nombre: getattr(self, nombre) for nombre in (*self.DTYPES_ANCHOS, 'roots')}
+        encabezado = {
+            'formato': VERSION_FORMATO,
+            'max_depth': self.max_depth,
+            'n_features': self.n_features,
+            'metadatos': metadatos or {},
+            'arrays': {}
+        }
+
+        # El encabezado se dimensiona con offsets relativos y despues se corre
+        offset = 0
+        for nombre, array in arrays.items():
+            encabezado['arrays'][nombre] = {'dtype': array.dtype.str, 'n': len(array), 'offset': offset}
+            offset += -(-array.nbytes // ALINEACION) * ALINEACION
+        texto = json.dumps(encabezado).encode('utf-8')
+        inicio_datos = -(-(len(MAGIA) + 4 + len(texto) + 256) // ALINEACION) * ALINEACION
+        for info in encabezado['arrays'].values():
+            info['offset'] += inicio_datos
+        texto = json.dumps(encabezado).encode('utf-8').ljust(inicio_datos - len(MAGIA) - 4)
+
+        with open(ruta, 'wb') as archivo:
+            archivo.write(MAGIA)
+            archivo.write(np.uint32(len(texto)).tobytes())
+            archivo.write(texto)
+            for nombre, array in arrays.items():
+                archivo.seek(encabezado['arrays'][nombre]['offset'])
+                archivo.write(np.ascontiguousarray(array).tobytes())
+
+    @staticmethod
+    def es_archivo_compacto(ruta: Path) -> bool:
+        """True si el archivo empieza con la marca del formato compacto"""
+        with open(ruta, 'rb') as archivo:
+            return archivo.read(len(MAGIA)) == MAGIA
+
+    @classmethod
+    def cargar(cls, ruta: Path, mmap: bool = True) -> tuple["FlatForest", dict]:
+        """
+        Lee un bosque serializado con `guardar`
+
+        Cada array es una vista sobre los bytes del archivo, sin copias ni
+        reconstruir objetos de sklearn. Con `mmap` el archivo se mapea en
+        memoria (solo lectura): las paginas son las del page cache del
+        sistema operativo, de modo que varios procesos que cargan el mismo
+        archivo comparten una sola copia fisica del bosque.
+
+        Args:
+            ruta: Archivo del bosque
+            mmap: Mapear el archivo en vez de leerlo a memoria propia
+
+        Returns:
+            Tupla (bosque, metadatos)
+
+        Raises:
+            ValueError: Si el archivo no es un bosque compacto compatible
+        """
+        if mmap:
+            datos = np.memmap(ruta, dtype=np.uint8, mode='r')
+        else:
+            datos = np.frombuffer(Path(ruta).read_bytes(), dtype=np.uint8)
+        if datos[:len(MAGIA)].tobytes() != MAGIA:
+            raise ValueError(f"No es un bosque compacto: {ruta}")
+        largo = int(datos[len(MAGIA):len(MAGIA) + 4].view(np.uint32)[0])
+        encabezado = json.loads(datos[len(MAGIA) + 4:len(MAGIA) + 4 + largo].tobytes())
+        if encabezado['formato'] != VERSION_FORMATO:
+            raise ValueError(f"Formato de bosque no soportado: {encabezado['formato']}")
+
+        arrays = {}
+        for nombre, info in encabezado['arrays'].items():
+            dtype = np.dtype(info['dtype'])
+            inicio = info['offset']
+            # np.asarray: vista ndarray comun (no np.memmap) sobre los mismos bytes
+            arrays[nombre] = np.asarray(datos[inicio:inicio + info['n'] * dtype.itemsize].view(dtype))
+        bosque = cls(max_depth=encabezado['max_depth'], n_features=encabezado['n_features'], **arrays)
+        return bosque, encabezado['metadatos']
+
+    def predecir_arboles(self, X: np.ndarray) -> np.ndarray:
+        """
+        Prediccion de cada arbol para cada fila
+
+        X se redondea a float32, igual que hace sklearn antes de comparar
+        contra los umbrales, para obtener exactamente las mismas hojas.
+
+        Args:
+            X: Matriz (N x n_features)
+
+        Returns:
+            Matriz (N x T) con la prediccion de cada arbol
+        """
+        X = np.asarray(X, dtype=np.float32).astype(self.threshold.dtype)
+        filas = np.arange(X.shape[0])[:, None]
+        nodos = np.broadcast_to(self.roots, (X.shape[0], self.n_arboles))
+
+        for _ in range(self.max_depth):
+            a_la_izquierda = X[filas, self.feature[nodos]] <= self.threshold[nodos]
+            nodos = np.where(a_la_izquierda, self.left[nodos], self.right[nodos])
+
+        return self.value[nodos].astype(np.float64, copy=False)
+
+    def predecir(self, X: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Media y desviacion estandar de las predicciones de los arboles
+
+        La media se acumula arbol por arbol (cumsum es secuencial) para
+        reproducir el orden de suma de RandomForestRegressor.predict.
+
+        Args:
+            X: Matriz (N x n_features)
+
+        Returns:
+            Tupla (media, std), cada una con N elementos
+        """
+        predicciones_arboles = self.predecir_arboles(X)
+        media = np.cumsum(predicciones_arboles, axis=1)[:, -1] / self.n_arboles
+        std = np.std(predicciones_arboles, axis=1)
+        return media, std
+
+    def crear_espacio_trabajo(self, capacidad: int) -> EspacioTrabajo:
+        """Crea los buffers para evaluar hasta `capacidad` filas"""
+        dtypes = {nombre: getattr(self, nombre).dtype for nombre in self.DTYPES_ANCHOS}
+        return EspacioTrabajo(capacidad, self.n_features, self.n_arboles, dtypes)
+
+    def predecir_en(self, ws: EspacioTrabajo, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Igual que `predecir` sobre las primeras n filas de `ws.X`, sin asignar memoria
+
+        Todas las operaciones escriben en los buffers del espacio de trabajo
+        (np.take / ufuncs con `out=`). Los resultados son vistas de `ws.media`
+        y `ws.std`, validas hasta la siguiente llamada con el mismo `ws`.
+
+        Args:
+            ws: Espacio de trabajo con las filas ya escritas en ws.X
+            n: Numero de filas a evaluar
+
+        Returns:
+            Tupla (media, std), vistas con n elementos
+        """
+        X, X32 = ws.X[:n], ws.X32[:n]
+        nodos, feature, indices = ws.nodos[:n], ws.feature[:n], ws.indices[:n]
+        izquierda, derecha = ws.izquierda[:n], ws.derecha[:n]
+        x, umbral, mascara = ws.x[:n], ws.umbral[:n], ws.mascara[:n]
+        valores, diferencias = ws.valores[:n], ws.diferencias[:n]
+        media, std = ws.media[:n], ws.std[:n]
+
+        # Redondear la entrada a float32 (como sklearn) en el mismo buffer;
+        # con umbrales float32 se compara directamente contra X32
+        np.copyto(X32, X, casting='same_kind')
+        np.copyto(X, X32)
+        X_plano = (ws.X if self.threshold.dtype == np.float64 else ws.X32).reshape(-1)
+        derecha_directa = self.right.dtype == nodos.dtype
+
+        # mode='clip' evita el buffer intermedio que np.take usa con out= y
+        # mode='raise'; los indices siempre son validos
+        nodos[...] = self.roots
+        for _ in range(self.max_depth):
+            self.feature.take(nodos, out=feature, mode='clip')
+            np.add(feature, ws.offset_filas[:n], out=indices)
+            X_plano.take(indices, out=x, mode='clip')
+            self.threshold.take(nodos, out=umbral, mode='clip')
+            np.less_equal(x, umbral, out=mascara)
+            self.left.take(nodos, out=izquierda, mode='clip')
+            if derecha_directa:
+                self.right.take(nodos, out=nodos, mode='clip')
+            else:
+                self.right.take(nodos, out=derecha, mode='clip')
+                np.copyto(nodos, derecha)
+            np.copyto(nodos, izquierda, where=mascara)
+
+        self.value.take(nodos, out=valores, mode='clip')
+
+        # Media acumulada arbol por arbol (mismo orden que sklearn)
+        np.cumsum(valores, axis=1, out=diferencias)
+        np.divide(diferencias[:, -1], self.n_arboles, out=media)
+
+        # Desviacion estandar con las mismas operaciones que np.std
+        np.sum(valores, axis=1, out=std)
+        np.divide(std, self.n_arboles, out=std)
+        np.subtract(valores, std[:, None], out=diferencias)
+        np.multiply(diferencias, diferencias, out=diferencias)
+        np.sum(diferencias, axis=1, out=std)
+        np.divide(std, self.n_arboles, out=std)
+        np.sqrt(std, out=std)
+
+        return media, std
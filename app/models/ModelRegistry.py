@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Model Registry - Versiones inmutables del modelo con puntero `current`
+Escrituras atomicas (archivo temporal + rename) y rollback
+"""
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from app.config.settings import settings
+
+
+def escribir_atomico(ruta: Path, escribir):
+    """
+    Escribe un archivo de forma atomica
+
+    `escribir(path_temporal)` escribe el contenido en un temporal del mismo
+    directorio; despues de fsync se renombra sobre `ruta`, de modo que los
+    lectores ven el archivo anterior completo o el nuevo completo.
+
+    Args:
+        ruta: Archivo destino
+        escribir: Funcion que recibe la ruta temporal y escribe en ella
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=ruta.parent, prefix=f".{ruta.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        escribir(Path(temporal))
+        with open(temporal, 'rb') as archivo:
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        Path(temporal).unlink(missing_ok=True)
+        raise
+
+
+class ModelRegistry:
+    """
+    Registro de versiones del modelo en un directorio
+
+    Estructura:
+        v000001.pkl, v000002.pkl, ...   artefactos inmutables (joblib)
+        v000001.forest, ...             el mismo bosque en formato compacto,
+                                        el que se sirve (mapeado en memoria)
+        v000001.json, ...               metadatos (metricas, fecha)
+        current                         nombre de la version activa
+
+    Una version nueva se escribe en un temporal y se publica con os.link,
+    que falla si el nombre ya existe: nunca se sobreescribe un artefacto,
+    aunque registren varios procesos a la vez. `current` se reemplaza con
+    un rename atomico.
+    """
+
+    PUNTERO = 'current'
+
+    def __init__(self, directorio: str | Path = None):
+        """
+        Args:
+            directorio: Directorio del registro (por defecto settings.MODEL_REGISTRY_DIR)
+        """
+        self.directorio = settings.get_full_path(directorio or settings.MODEL_REGISTRY_DIR)
+
+    def ruta(self, version: str) -> Path:
+        """Ruta del artefacto de una version"""
+        return self.directorio / f"{version}.pkl"
+
+    def ruta_compacta(self, version: str) -> Path:
+        """Ruta del bosque compacto (.forest) de una version"""
+        return self.directorio / f"{version}.forest"
+
+    def versiones(self) -> list[str]:
+        """Versiones registradas, de la mas vieja a la mas nueva"""
+        if not self.directorio.exists():
+            return []
+        return sorted(ruta.stem for ruta in self.directorio.glob("v*.pkl"))
+
+    def version_actual(self) -> str | None:
+        """Version a la que apunta `current` (None si el registro esta vacio)"""
+        try:
+            version = (self.directorio / self.PUNTERO).read_text(encoding='utf-8').strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def registrar(self, model, activar: bool = True, metadatos: dict = None) -> str:
+        """
+        Guarda un RandomForestModel entrenado como version nueva
+
+        Args:
+            model: Modelo entrenado
+            activar: Apuntar `current` a la version nueva
+            metadatos: Datos extra para el .json de la version
+
+        Returns:
+            Nombre de la version (p. ej. 'v000003')
+        """
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, prefix=".registro.", suffix=".tmp")
+        os.close(fd)
+        temporal = Path(temporal)
+
+        try:
+            model.guardar(temporal)
+            with open(temporal, 'rb') as archivo:
+                os.fsync(archivo.fileno())
+
+            # Publicar con el siguiente numero libre (os.link no pisa un existente)
+            versiones = self.versiones()
+            numero = int(versiones[-1][1:]) + 1 if versiones else 1
+            while True:
+                version = f"v{numero:06d}"
+                try:
+                    os.link(temporal, self.ruta(version))
+                    break
+                except FileExistsError:
+                    numero += 1
+        finally:
+            temporal.unlink(missing_ok=True)
+
+        # El numero ya es de esta version: el .forest se escribe atomico con su nombre final
+        model.guardar(self.ruta_compacta(version))
+
+        info = {
+            'version': version,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'metrics': metricas_a_json(model.metrics),
+            **(metadatos or {})
+        }
+        escribir_atomico(
+            self.directorio / f"{version}.json",
+            lambda ruta: ruta.write_text(json.dumps(info, indent=2), encoding='utf-8')
+        )
+
+        if activar:
+            self.activar(version)
+
+        return version
+
+    def activar(self, version: str):
+        """
+        Apunta `current` a una version existente
+
+        Raises:
+            ValueError: Si la version no esta registrada
+        """
+        if not self.ruta(version).exists():
+            raise ValueError(f"Version de modelo no registrada: {version}")
+
+        escribir_atomico(
+            self.directorio / self.PUNTERO,
+            lambda ruta: ruta.write_text(version, encoding='utf-8')
+        )
+
+    def rollback(self, version: str = None) -> str:
+        """
+        Vuelve a una version anterior
+
+        Args:
+            version: Version destino (por defecto la anterior a la actual)
+
+        Returns:
+            La version activada
+
+        Raises:
+            ValueError: Si no hay una version anterior o no existe la pedida
+        """
+        if version is None:
+            actual = self.version_actual()
+            anteriores = [v for v in self.versiones() if actual is None or v < actual]
+            if not anteriores:
+                raise ValueError("No hay una version anterior a la que volver")
+            version = anteriores[-1]
+
+        self.activar(version)
+        return version
+
+    def info(self, version: str) -> dict:
+        """Metadatos de una version (vacio si no tiene .json)"""
+        try:
+            return json.loads((self.directorio / f"{version}.json").read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return {'version': version}
+
+    def listar(self) -> dict:
+        """
+        Versiones registradas con sus metadatos
+
+        Returns:
+            Diccionario con 'current' y 'versions' (de la mas nueva a la mas vieja)
+        """
+        return {
+            'current': self.version_actual(),
+            'versions': [self.info(version) for version in reversed(self.versiones())]
+        }
+
+
+def metricas_a_json(valor):
+    """Metricas con floats de NumPy a tipos serializables"""
+    if isinstance(valor, dict):
+        return {clave: metricas_a_json(v) for clave, v in valor.items()}
+    return float(valor)
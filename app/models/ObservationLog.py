@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+Observation Log - Log binario append-only de inmuebles observados
+Registros de tamano fijo, segmentos sellados y compactacion al dataset
+columnar de entrenamiento
+"""
+import contextlib
+import os
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from app.config.settings import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se serializa dentro del proceso
+    fcntl = None
+
+# Encabezado de cada segmento: MAGIA, version del formato y tamano del registro (uint32)
+MAGIA = b'OBSLOG\x00\x00'
+VERSION_FORMATO = 2
+TAMANO_ENCABEZADO = len(MAGIA) + 8
+
+
+class ObservationLog:
+    """
+    Observaciones de alquileres reales, en un log append-only
+
+    Estructura del directorio:
+        activo.log              segmento donde se agregan las observaciones
+        sellado-<ns>-<pid>.log  segmentos cerrados, pendientes de compactar
+        .agregar.lock           flock de agregar/sellar (entre procesos)
+        .compactar.lock         flock de compactar
+
+    Cada segmento es un encabezado de TAMANO_ENCABEZADO bytes seguido de
+    registros DTYPE empaquetados: leerlo es mapearlo con NumPy, sin parsear.
+    Un lote se escribe con un solo write + fsync bajo el flock; si el proceso
+    muere a mitad de un write, el registro incompleto del final se ignora al
+    leer y se descarta en el siguiente agregar.
+
+    `sellar` cierra el segmento activo (un rename) y `compactar` funde los
+    sellados con el dataset columnar existente, deduplica y borra los
+    segmentos: cada observacion se lee del log una sola vez.
+    """
+
+    # Mismos nombres y dtypes que DatasetService.ESQUEMA, mas la ubicacion y la fecha
+    DTYPE = np.dtype([
+        ('metros_cuadrados', '<i2'),
+        ('num_habitacion', 'i1'),
+        ('num_banos', 'i1'),
+        ('zona_id', '<i2'),
+        ('parking', 'i1'),
+        ('piscina', 'i1'),
+        ('precio_eth', '<f4'),
+        ('lat', '<f4'),
+        ('lon', '<f4'),
+        ('observado_en', '<f8'),
+    ])
+
+    # Campos que identifican un inmueble: de varias observaciones del mismo
+    # se conserva la mas reciente
+    IDENTIDAD = ('lat', 'lon', 'metros_cuadrados', 'num_habitacion', 'num_banos', 'parking', 'piscina')
+
+    ACTIVO = 'activo.log'
+
+    def __init__(self, directorio: str | Path = None, dataset: str | Path = None):
+        """
+        Args:
+            directorio: Directorio del log (por defecto OBSERVATIONS_LOG_DIR)
+            dataset: Dataset .cols compactado (por defecto OBSERVATIONS_DATASET_PATH)
+        """
+        self.directorio = settings.get_full_path(directorio or settings.OBSERVATIONS_LOG_DIR)
+        self.dataset = settings.get_full_path(dataset or settings.OBSERVATIONS_DATASET_PATH)
+        # Un lock por archivo de flock: compactar no frena a agregar
+        self._locks = {'.agregar.lock': threading.Lock(), '.compactar.lock': threading.Lock()}
+
+    @property
+    def activo(self) -> Path:
+        return self.directorio / self.ACTIVO
+
+    def registros(self, columnas: dict) -> np.ndarray:
+        """
+        Arma registros DTYPE a partir de columnas
+
+        Args:
+            columnas: Campo -> valores (todos los campos de DTYPE, mismo largo);
+                metros_cuadrados se redondea al entero mas cercano
+
+        Returns:
+            Array estructurado DTYPE
+
+        Raises:
+            ValueError: Si un valor entero no entra en el tipo de su campo
+                (NumPy lo truncaria sin avisar)
+        """
+        n = len(columnas['precio_eth'])
+        registros = np.empty(n, dtype=self.DTYPE)
+        for campo in self.DTYPE.names:
+            valores = np.asarray(columnas[campo])
+            if campo == 'metros_cuadrados':
+                valores = np.rint(valores)
+            tipo = self.DTYPE[campo]
+            if tipo.kind == 'i' and len(valores):
+                rango = np.iinfo(tipo)
+                if valores.min() < rango.min or valores.max() > rango.max:
+                    raise ValueError(f"{campo} fuera de rango [{rango.min}, {rango.max}]")
+            registros[campo] = valores
+        return registros
+
+    def agregar(self, registros: np.ndarray) -> int:
+        """
+        Agrega registros al segmento activo (un write y fsync)
+
+        Args:
+            registros: Array estructurado DTYPE
+
+        Returns:
+            Registros pendientes en el segmento activo despues de agregar
+        """
+        registros = np.ascontiguousarray(registros, dtype=self.DTYPE)
+        with self._bloqueo('.agregar.lock'):
+            with open(self.activo, 'ab') as archivo:
+                fin = archivo.seek(0, os.SEEK_END)
+                if fin < TAMANO_ENCABEZADO:
+                    archivo.truncate(0)
+                    archivo.write(self._encabezado())
+                elif (fin - TAMANO_ENCABEZADO) % self.DTYPE.itemsize:
+                    # Registro incompleto de un write interrumpido: se descarta
+                    archivo.truncate(fin - (fin - TAMANO_ENCABEZADO) % self.DTYPE.itemsize)
+                archivo.write(registros.tobytes())
+                archivo.flush()
+                os.fsync(archivo.fileno())
+                return (archivo.tell() - TAMANO_ENCABEZADO) // self.DTYPE.itemsize
+
+    def pendientes(self) -> int:
+        """Registros en el segmento activo (todavia no sellados)"""
+        try:
+            return max(0, self.activo.stat().st_size - TAMANO_ENCABEZADO) // self.DTYPE.itemsize
+        except FileNotFoundError:
+            return 0
+
+    def sellados(self) -> list[Path]:
+        """Segmentos sellados pendientes de compactar, del mas viejo al mas nuevo"""
+        if not self.directorio.exists():
+            return []
+        return sorted(self.directorio.glob('sellado-*.log'))
+
+    def sellar(self, minimo: int = 1) -> int:
+        """
+        Cierra el segmento activo si tiene al menos `minimo` registros
+
+        Es un rename bajo el flock de agregar: de varios procesos que sellan
+        a la vez, solo uno encuentra los registros.
+
+        Returns:
+            Registros del segmento sellado (0 si no se sello)
+        """
+        with self._bloqueo('.agregar.lock'):
+            n = self.pendientes()
+            if n < max(1, minimo):
+                return 0
+            os.replace(self.activo, self.directorio / f"sellado-{time.time_ns():020d}-{os.getpid()}.log")
+            return n
+
+    def leer(self, ruta: Path) -> np.ndarray:
+        """
+        Registros de un segmento (mapeado en memoria, solo lectura)
+
+        Raises:
+            ValueError: Si el archivo no es un segmento compatible
+        """
+        with open(ruta, 'rb') as archivo:
+            encabezado = archivo.read(TAMANO_ENCABEZADO)
+        if len(encabezado) < TAMANO_ENCABEZADO or encabezado[:len(MAGIA)] != MAGIA:
+            raise ValueError(f"No es un segmento de observaciones: {ruta}")
+        version, tamano = np.frombuffer(encabezado, dtype='<u4', count=2, offset=len(MAGIA))
+        if version != VERSION_FORMATO or tamano != self.DTYPE.itemsize:
+            raise ValueError(f"Segmento de observaciones con formato incompatible: {ruta}")
+
+        n = (Path(ruta).stat().st_size - TAMANO_ENCABEZADO) // self.DTYPE.itemsize
+        if n == 0:
+            return np.empty(0, dtype=self.DTYPE)
+        return np.memmap(ruta, dtype=self.DTYPE, mode='r', offset=TAMANO_ENCABEZADO, shape=(n,))
+
+    def compactar(self, sellar: bool = True) -> dict:
+        """
+        Funde los segmentos sellados con el dataset columnar y los borra
+
+        El resultado se deduplica por IDENTIDAD (queda la observacion mas
+        reciente) y se escribe de forma atomica. Si el proceso muere despues
+        de escribir el dataset y antes de borrar los segmentos, la proxima
+        compactacion los vuelve a fundir con el mismo resultado.
+
+        Args:
+            sellar: Sellar antes el segmento activo
+
+        Returns:
+            Diccionario con 'compacted' (registros leidos del log),
+            'duplicates' (descartados) y 'rows' (filas del dataset)
+        """
+        from app.services.DatasetService import escribir_columnas, leer_columnas
+
+        with self._bloqueo('.compactar.lock'):
+            if sellar:
+                self.sellar()
+            segmentos = self.sellados()
+            existentes = leer_columnas(self.dataset) if self.dataset.exists() else None
+            filas_previas = len(existentes['precio_eth']) if existentes else 0
+            if not segmentos:
+                return {'compacted': 0, 'duplicates': 0, 'rows': filas_previas}
+
+            nuevos = np.concatenate([self.leer(segmento) for segmento in segmentos])
+            columnas = {
+                campo: np.concatenate(([existentes[campo]] if existentes else []) + [nuevos[campo]])
+                for campo in self.DTYPE.names
+            }
+            columnas = self.deduplicar(columnas)
+
+            escribir_columnas(columnas, self.dataset)
+            for segmento in segmentos:
+                segmento.unlink()
+
+        filas = len(columnas['precio_eth'])
+        print(f"[Info] Observaciones compactadas: {len(nuevos)} nuevas, {filas} filas en {self.dataset}")
+        return {
+            'compacted': len(nuevos),
+            'duplicates': filas_previas + len(nuevos) - filas,
+            'rows': filas
+        }
+
+    @classmethod
+    def deduplicar(cls, columnas: dict) -> dict:
+        """
+        Una fila por inmueble (IDENTIDAD): la de observado_en mas reciente
+
+        A igual fecha gana la que aparece despues. Las filas quedan ordenadas
+        por IDENTIDAD.
+        """
+        n = len(columnas['observado_en'])
+        if n == 0:
+            return columnas
+        # lexsort ordena por la ultima clave primero; el indice desempata por posicion
+        orden = np.lexsort(
+            [np.arange(n), columnas['observado_en']] + [columnas[campo] for campo in reversed(cls.IDENTIDAD)]
+        )
+        ordenadas = {campo: valores[orden] for campo, valores in columnas.items()}
+
+        # Ultima fila de cada grupo con la misma identidad
+        ultima = np.ones(n, dtype=bool)
+        ultima[:-1] = np.any([ordenadas[campo][1:] != ordenadas[campo][:-1] for campo in cls.IDENTIDAD], axis=0)
+        return {campo: valores[ultima] for campo, valores in ordenadas.items()}
+
+    def estadisticas(self) -> dict:
+        """Pendientes, segmentos sellados y filas del dataset compactado"""
+        from app.services.DatasetService import DatasetService
+
+        return {
+            'pending': self.pendientes(),
+            'sealed_segments': len(self.sellados()),
+            'dataset_rows': DatasetService.contar_filas(self.dataset) if self.dataset.exists() else 0,
+            'dataset': str(self.dataset)
+        }
+
+    def _encabezado(self) -> bytes:
+        return MAGIA + np.array([VERSION_FORMATO, self.DTYPE.itemsize], dtype='<u4').tobytes()
+
+    @contextlib.contextmanager
+    def _bloqueo(self, nombre: str):
+        """Lock exclusivo entre threads (del proceso) y procesos (flock)"""
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        with self._locks[nombre], open(self.directorio / nombre, 'a+b') as archivo:
+            if fcntl is not None:
+                fcntl.flock(archivo.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
@@ -2,21 +2,53 @@
 """
 Random Forest Model - Modelo de Machine Learning
 Entrenamiento y prediccin de precios
+
+sklearn, pandas y joblib se importan recien al entrenar o al cargar un
+pickle: servir un modelo .forest solo necesita NumPy, y el servidor arranca
+sin pagar esos imports.
 """
-import joblib
+import threading
+from typing import TYPE_CHECKING
 import numpy as np
-import pandas as pd
 from pathlib import Path
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 from app.config.settings import settings
-from app.services.DatasetService import DatasetService
+from app.models.FlatForest import FlatForest, EspacioTrabajo
+from app.models.ModelRegistry import escribir_atomico, metricas_a_json
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from sklearn.ensemble import RandomForestRegressor
+
+
+def redondear(valor: float, decimales: int = 6) -> float:
+    """
+    Redondea un float con la misma semantica que np.round
+
+    (multiplicar por 10^decimales, rint y dividir), que es la que se aplicaba
+    sobre los escalares de NumPy que devolvia sklearn.
+    """
+    factor = 10.0 ** decimales
+    return round(valor * factor) / factor
 
 
 class RandomForestModel:
     """Modelo Random Forest para prediccin de precios"""
 
+    # Columna del modelo -> clave del diccionario de features
+    FEATURE_KEYS = {
+        'metros_cuadrados': 'metros',
+        'num_habitacion': 'cuartos',
+        'num_banos': 'banos',
+        'zona_id': 'zona_id',
+        'parking': 'parking',
+        'piscina': 'piscina'
+    }
+
+    BACKENDS = ('sklearn', 'flat')
+
+    # Extension del formato compacto (FlatForest serializado, sin sklearn)
+    SUFIJO_COMPACTO = '.forest'
+
     def __init__(self):
         """Inicializa el modelo"""
         self.model = None
@@ -28,19 +60,68 @@ class RandomForestModel:
             'parking',
             'piscina'
         ]
+        self.engine = None
+        self._hiperparametros = {}
         self.is_trained = False
         self.metrics = {}
+        self.confianza = 0.85
+
+        # Cambia cada vez que se instala un modelo (entrenar o cargar); siempre
+        # str: con el registro es el nombre de la version (p. ej. 'v000003') y
+        # sin registro 'local-<n>', con n el contador de instalaciones
+        self._instalaciones = 0
+        self.version_modelo = 'local-0'
+
+        # Orden de columnas resuelto una vez al cargar/entrenar
+        self._columnas = ()
+        self._columnas_request = ()
+        self._columna_zona = None
+
+        # Espacio de trabajo preasignado por thread
+        self._local = threading.local()
+
+    def _preparar_features(self):
+        """
+        Valida feature_names y resuelve una vez el orden de las columnas
+
+        Se llama al entrenar y al cargar, de modo que la ruta de prediccion
+        solo escribe valores en posiciones ya conocidas.
 
-    def entrenar(self, df: pd.DataFrame = None) -> dict:
+        Raises:
+            ValueError: Si el modelo usa features desconocidas o le faltan
+        """
+        desconocidas = [name for name in self.feature_names if name not in self.FEATURE_KEYS]
+        faltantes = [name for name in self.FEATURE_KEYS if name not in self.feature_names]
+        if desconocidas or faltantes:
+            raise ValueError(
+                f"Features del modelo incompatibles (desconocidas: {desconocidas}, faltantes: {faltantes})"
+            )
+
+        self._columnas = tuple(
+            (col, self.FEATURE_KEYS[name]) for col, name in enumerate(self.feature_names)
+        )
+        self._columnas_request = tuple((col, key) for col, key in self._columnas if key != 'zona_id')
+        self._columna_zona = self.feature_names.index('zona_id')
+        # R2 de test como confianza; PredictionResponse se arma con model_construct
+        # (sin validar) y declara confianza en [0, 1]: un R2 negativo queda en 0
+        r2 = float(self.metrics.get('test', {}).get('r2', 0.85))
+        self.confianza = redondear(min(max(r2, 0.0), 1.0), 2)
+
+    def entrenar(self, df: "pd.DataFrame" = None, hiperparametros: dict = None) -> dict:
         """
         Entrena el modelo Random Forest
 
         Args:
             df: DataFrame con datos de entrenamiento (opcional)
+            hiperparametros: Parametros de RandomForestRegressor que reemplazan
+                los de settings (p. ej. {'n_estimators': 50, 'max_depth': 8})
 
         Returns:
             Diccionario con mtricas de entrenamiento
         """
+        from sklearn.model_selection import train_test_split
+        from app.services.DatasetService import DatasetService
+
         # Si no se proporciona dataset, generar uno sinttico
         if df is None:
             print("[Dataset] Generando dataset sinttico...")
@@ -63,16 +144,112 @@ class RandomForestModel:
         print(f"   - Features: {self.feature_names}")
 
         # Crear y entrenar modelo
-        self.model = RandomForestRegressor(
-            n_estimators=settings.N_ESTIMATORS,
-            max_depth=settings.MAX_DEPTH,
-            min_samples_split=settings.MIN_SAMPLES_SPLIT,
-            random_state=settings.RANDOM_STATE,
-            n_jobs=-1  # Usar todos los cores
-        )
-
+        self.model = self._crear_bosque(hiperparametros)
         self.model.fit(X_train, y_train)
 
+        return self._finalizar_entrenamiento(X_train, y_train, X_test, y_test)
+
+    def entrenar_por_bloques(self, filename: str = None, filas_por_bloque: int = None,
+                             hiperparametros: dict = None) -> dict:
+        """
+        Entrena el bosque leyendo el dataset de disco por bloques
+
+        Con warm_start cada bloque agrega sus propios arboles (entrenados con
+        bootstrap sobre ese bloque), repartiendo N_ESTIMATORS en proporcion
+        a las filas del bloque y al menos uno por bloque. La memoria maxima
+        depende de filas_por_bloque y no del tamano del dataset.
+
+        De cada bloque se separa TEST_SIZE como prueba; para las metricas se
+        guarda una muestra uniforme de a lo sumo TRAINING_EVAL_MAX_ROWS filas
+        de entrenamiento y otra de prueba.
+
+        Args:
+            filename: CSV, directorio .cols o directorio de shards (por defecto DATASET_PATH)
+            filas_por_bloque: Filas por bloque (por defecto TRAINING_CHUNK_ROWS)
+            hiperparametros: Como en entrenar(); n_estimators es el total del bosque
+
+        Returns:
+            Diccionario con metricas de entrenamiento
+        """
+        import pandas as pd
+        from sklearn.model_selection import train_test_split
+        from app.services.DatasetService import DatasetService
+
+        filas = DatasetService.contar_filas(filename)
+        if filas == 0:
+            raise ValueError("El dataset esta vacio")
+
+        # Fraccion de cada bloque que se guarda para las metricas
+        fraccion_test = min(1.0, settings.TRAINING_EVAL_MAX_ROWS / (filas * settings.TEST_SIZE))
+        fraccion_train = min(1.0, settings.TRAINING_EVAL_MAX_ROWS / (filas * (1 - settings.TEST_SIZE)))
+
+        self.model = self._crear_bosque(hiperparametros)
+        n_estimators = self.model.n_estimators
+        self.model.set_params(n_estimators=0, warm_start=True)
+
+        print(f"[Info] Entrenando Random Forest por bloques...")
+        print(f"   - Filas: {filas}")
+        print(f"   - Features: {self.feature_names}")
+
+        muestras_train, muestras_test = [], []
+        filas_vistas = 0
+        bloques = DatasetService.iterar_bloques(filename, filas_por_bloque)
+        for i, df in enumerate(bloques):
+            X_train, X_test, y_train, y_test = train_test_split(
+                df[self.feature_names], df['precio_eth'],
+                test_size=settings.TEST_SIZE,
+                random_state=settings.RANDOM_STATE + i
+            )
+            del df
+
+            # Arboles hasta la cuota acumulada de n_estimators para las filas vistas
+            filas_vistas += len(X_train) + len(X_test)
+            objetivo = round(n_estimators * filas_vistas / filas)
+            self.model.n_estimators = max(objetivo, self.model.n_estimators + 1)
+            self.model.fit(X_train, y_train)
+            print(f"   - Bloque {i + 1}: {len(X_train)} filas, {self.model.n_estimators} arboles")
+
+            muestras_train.append(self._muestra(X_train, y_train, fraccion_train, i))
+            muestras_test.append(self._muestra(X_test, y_test, fraccion_test, i))
+
+        # Un fit posterior vuelve a entrenar desde cero, como entrenar()
+        self.model.warm_start = False
+
+        X_train, y_train = (pd.concat(partes) for partes in zip(*muestras_train))
+        X_test, y_test = (pd.concat(partes) for partes in zip(*muestras_test))
+        return self._finalizar_entrenamiento(X_train, y_train, X_test, y_test)
+
+    @staticmethod
+    def _crear_bosque(hiperparametros: dict = None) -> "RandomForestRegressor":
+        """RandomForestRegressor con los parametros de settings, reemplazados por hiperparametros"""
+        from sklearn.ensemble import RandomForestRegressor
+
+        parametros = {
+            'n_estimators': settings.N_ESTIMATORS,
+            'max_depth': settings.MAX_DEPTH,
+            'min_samples_split': settings.MIN_SAMPLES_SPLIT,
+            'random_state': settings.RANDOM_STATE,
+            'n_jobs': -1  # Usar todos los cores
+        }
+        return RandomForestRegressor(**{**parametros, **(hiperparametros or {})})
+
+    @staticmethod
+    def _muestra(X: "pd.DataFrame", y: "pd.Series", fraccion: float, semilla: int) -> tuple:
+        """Submuestra uniforme (X, y) de una fraccion de las filas"""
+        if fraccion >= 1.0:
+            return X, y
+        indices = np.random.default_rng(semilla).random(len(X)) < fraccion
+        return X[indices], y[indices]
+
+    def _finalizar_entrenamiento(self, X_train, y_train, X_test, y_test) -> dict:
+        """
+        Calcula metricas, construye el motor de inferencia y marca el modelo como entrenado
+
+        Returns:
+            Diccionario con metricas de entrenamiento
+        """
+        from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
+
         # Evaluar modelo
         y_pred_train = self.model.predict(X_train)
         y_pred_test = self.model.predict(X_test)
@@ -95,6 +272,9 @@ class RandomForestModel:
             ))
         }
 
+        self.engine = FlatForest.desde_sklearn(self.model)
+        self._preparar_features()
+        self._nueva_version()
         self.is_trained = True
 
         # Mostrar resultados
@@ -109,55 +289,194 @@ class RandomForestModel:
 
         return self.metrics
 
-    def predecir(self, features: dict) -> dict:
+    def predecir(self, features: dict, backend: str = None) -> dict:
         """
         Realiza prediccin de precio
 
         Args:
             features: Diccionario con caractersticas del inmueble
+            backend: 'sklearn' o 'flat' (por defecto settings.INFERENCE_BACKEND)
 
         Returns:
             Diccionario con prediccin
         """
-        if not self.is_trained or self.model is None:
+        return self.predecir_batch([features], backend=backend)[0]
+
+    def predecir_batch(self, features_list: list[dict], backend: str = None) -> list[dict]:
+        """
+        Realiza la prediccion de precio para N inmuebles en una sola pasada
+
+        Construye una matriz de N filas y recorre el bosque una sola vez
+        (un predict por arbol sobre las N filas en lugar de uno por inmueble).
+
+        Args:
+            features_list: Lista de diccionarios con caracteristicas de cada inmueble
+            backend: 'sklearn' o 'flat' (por defecto settings.INFERENCE_BACKEND)
+
+        Returns:
+            Lista de diccionarios con la prediccion, en el mismo orden de entrada
+        """
+        if not self.is_trained or self.engine is None:
             raise ValueError("El modelo no ha sido entrenado. Llama a entrenar() primero.")
 
-        # Preparar features en el orden correcto
-        X = pd.DataFrame([{
-            'metros_cuadrados': features['metros'],
-            'num_habitacion': features['cuartos'],
-            'num_banos': features['banos'],
-            'zona_id': features['zona_id'],
-            'parking': features['parking'],
-            'piscina': features['piscina']
-        }])
+        if not features_list:
+            return []
+
+        n = len(features_list)
+
+        # Escribir features en el buffer preasignado, en el orden de feature_names
+        ws = self.espacio_trabajo(n)
+        for i, features in enumerate(features_list):
+            fila = ws.X[i]
+            for col, key in self._columnas:
+                fila[col] = features[key]
+
+        # Prediccion e intervalo de confianza en una sola pasada por el bosque
+        precios_sugeridos, stds = self.predecir_buffer(ws, n, backend)
 
-        # Prediccin
-        precio_sugerido = self.model.predict(X)[0]
+        resultados = []
+        for precio_sugerido, std in zip(precios_sugeridos.tolist(), stds.tolist()):
+            precio, precio_min, precio_max = self.intervalo_precio(precio_sugerido, std)
+            resultados.append({
+                'precio_sugerido': precio,
+                'precio_min': precio_min,
+                'precio_max': precio_max,
+                'confianza': self.confianza
+            })
 
-        # Intervalo de confianza (basado en desviacin de rboles individuales)
-        predicciones_arboles = np.array([tree.predict(X)[0] for tree in self.model.estimators_])
-        std = np.std(predicciones_arboles)
+        return resultados
 
-        precio_min = max(0.0001, precio_sugerido - (1.5 * std))  # Mnimo 0.0001 ETH
+    def intervalo_precio(self, precio_sugerido: float, std: float) -> tuple[float, float, float]:
+        """
+        Precio sugerido e intervalo de confianza redondeados a 6 decimales
+
+        Args:
+            precio_sugerido: Media de las predicciones de los arboles
+            std: Desviacion estandar de las predicciones de los arboles
+
+        Returns:
+            Tupla (precio_sugerido, precio_min, precio_max)
+        """
+        precio_min = max(0.0001, precio_sugerido - (1.5 * std))  # Minimo 0.0001 ETH
         precio_max = precio_sugerido + (1.5 * std)
 
-        # Confianza basada en R score
-        confianza = self.metrics.get('test', {}).get('r2', 0.85)
+        return redondear(precio_sugerido), redondear(precio_min), redondear(precio_max)
 
-        resultado = {
-            'precio_sugerido': round(precio_sugerido, 6),
-            'precio_min': round(precio_min, 6),
-            'precio_max': round(precio_max, 6),
-            'confianza': round(confianza, 2)
-        }
+    def espacio_trabajo(self, n: int) -> EspacioTrabajo:
+        """
+        Espacio de trabajo del thread actual con capacidad para n filas
+
+        Se reutiliza entre llamadas; solo se vuelve a asignar si cambia el
+        motor (nuevo modelo) o si n supera la capacidad actual.
+
+        Args:
+            n: Numero de filas que se van a escribir
+
+        Returns:
+            EspacioTrabajo cuyo buffer `X` sigue el orden de feature_names
+        """
+        engine = self.engine
+        ws = getattr(self._local, 'ws', None)
+
+        if ws is None or self._local.engine is not engine or ws.capacidad < n:
+            capacidad = max(n, 2 * ws.capacidad if ws is not None and self._local.engine is engine else 1)
+            ws = engine.crear_espacio_trabajo(capacidad)
+            self._local.ws = ws
+            self._local.engine = engine
+
+        return ws
+
+    def escribir_fila(self, X: np.ndarray, i: int, request, zona_id: int):
+        """
+        Escribe los campos de un request directamente en la fila i del buffer
+
+        Args:
+            X: Buffer de entrada (EspacioTrabajo.X)
+            i: Fila a escribir
+            request: Objeto con atributos metros, cuartos, banos, parking, piscina
+            zona_id: Zona detectada por geolocalizacion
+        """
+        fila = X[i]
+        for col, key in self._columnas_request:
+            fila[col] = getattr(request, key)
+        fila[self._columna_zona] = zona_id
+
+    def predecir_buffer(self, ws: EspacioTrabajo, n: int, backend: str = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Media y desviacion de los arboles para las primeras n filas de ws.X
+
+        Con el backend 'flat' no asigna memoria: los resultados son vistas
+        del espacio de trabajo, validas hasta la siguiente llamada del thread.
+
+        Args:
+            ws: Espacio de trabajo con las filas ya escritas
+            n: Numero de filas
+            backend: 'sklearn' o 'flat' (por defecto settings.INFERENCE_BACKEND)
+
+        Returns:
+            Tupla (media, std), cada una con n elementos
+        """
+        if not self.is_trained or self.engine is None:
+            raise ValueError("El modelo no ha sido entrenado. Llama a entrenar() primero.")
+
+        backend = backend or settings.INFERENCE_BACKEND
+        if backend == 'flat':
+            return self.engine.predecir_en(ws, n)
 
-        return resultado
+        return self._predecir_bosque(ws.X[:n], backend)
+
+    def _predecir_bosque(self, X: np.ndarray, backend: str = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Recorre el bosque una sola vez y devuelve la media y la desviacion
+        estandar de las predicciones de los arboles para cada fila
+
+        Con el backend 'sklearn' llama directamente a `tree_.predict` de cada
+        arbol (sin la validacion de entrada de `predict`) y acumula la media en
+        el mismo orden que `RandomForestRegressor.predict`. Con 'flat' evalua
+        el FlatForest exportado, que da exactamente los mismos valores.
+
+        Args:
+            X: Matriz float32 (N x n_features) en el orden de feature_names
+            backend: 'sklearn' o 'flat' (por defecto settings.INFERENCE_BACKEND)
+
+        Returns:
+            Tupla (media, std), cada una con N elementos
+        """
+        backend = backend or settings.INFERENCE_BACKEND
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Backend de inferencia desconocido: {backend}")
+
+        if backend == 'flat':
+            return self.engine.predecir(X)
+
+        if self.model is None:
+            raise ValueError("El backend 'sklearn' no esta disponible: el modelo se cargo en formato compacto")
+
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        estimators = self.model.estimators_
+
+        predicciones_arboles = np.empty((X.shape[0], len(estimators)), dtype=np.float64)
+        suma = np.zeros(X.shape[0], dtype=np.float64)
+
+        for i, tree in enumerate(estimators):
+            prediccion = tree.tree_.predict(X)[:, 0]
+            predicciones_arboles[:, i] = prediccion
+            suma += prediccion
+
+        media = suma / len(estimators)
+        std = np.std(predicciones_arboles, axis=1)
+
+        return media, std
 
     def guardar(self, filepath: str = None) -> Path:
         """
         Guarda el modelo entrenado
 
+        Con extension .forest se guarda en formato compacto: solo el
+        FlatForest compactado (ver FlatForest.compactar) y los metadatos,
+        sin el objeto de sklearn. Cualquier otra extension es un pickle de
+        joblib con el RandomForestRegressor completo.
+
         Args:
             filepath: Ruta donde guardar (opcional)
 
@@ -173,6 +492,23 @@ class RandomForestModel:
         full_path = settings.get_full_path(filepath)
         full_path.parent.mkdir(parents=True, exist_ok=True)
 
+        if full_path.suffix == self.SUFIJO_COMPACTO:
+            compacto = self.engine.compactar()
+            metadatos = {
+                'feature_names': self.feature_names,
+                'metrics': metricas_a_json(self.metrics),
+                'hyperparameters': self.hiperparametros(),
+                'version': settings.APP_VERSION
+            }
+            escribir_atomico(full_path, lambda ruta: compacto.guardar(ruta, metadatos))
+            print(f"[Guardado] Modelo compacto guardado en: {full_path}")
+            return full_path
+
+        if self.model is None:
+            raise ValueError("El modelo se cargo en formato compacto: solo se puede guardar como .forest")
+
+        import joblib
+
         # Guardar modelo y metadatos
         model_data = {
             'model': self.model,
@@ -181,17 +517,23 @@ class RandomForestModel:
             'version': settings.APP_VERSION
         }
 
-        joblib.dump(model_data, full_path)
+        # Temporal + rename: quien lea el archivo nunca ve un pickle a medias
+        escribir_atomico(full_path, lambda ruta: joblib.dump(model_data, ruta))
         print(f"[Guardado] Modelo guardado en: {full_path}")
 
         return full_path
 
-    def cargar(self, filepath: str = None) -> bool:
+    def cargar(self, filepath: str = None, version_modelo: str = None, mmap: bool = True) -> bool:
         """
         Carga un modelo entrenado
 
         Args:
             filepath: Ruta del modelo (opcional)
+            version_modelo: Version del registro que se carga (por defecto
+                'local-<n>', con el contador de instalaciones)
+            mmap: En formato compacto, mapear el archivo en memoria en vez
+                de leerlo (los procesos que cargan el mismo archivo comparten
+                las paginas del bosque)
 
         Returns:
             True si se carg exitosamente
@@ -205,12 +547,23 @@ class RandomForestModel:
             print(f"[Advertencia] Modelo no encontrado en: {full_path}")
             return False
 
-        # Cargar modelo y metadatos
-        model_data = joblib.load(full_path)
-
-        self.model = model_data['model']
-        self.feature_names = model_data['feature_names']
-        self.metrics = model_data.get('metrics', {})
+        # Cargar modelo y metadatos (formato compacto: directo al motor)
+        if FlatForest.es_archivo_compacto(full_path):
+            self.engine, metadatos = FlatForest.cargar(full_path, mmap=mmap)
+            self.model = None
+            self.feature_names = metadatos['feature_names']
+            self.metrics = metadatos.get('metrics', {})
+            self._hiperparametros = metadatos.get('hyperparameters', {})
+        else:
+            import joblib
+
+            model_data = joblib.load(full_path)
+            self.model = model_data['model']
+            self.feature_names = model_data['feature_names']
+            self.metrics = model_data.get('metrics', {})
+            self.engine = FlatForest.desde_sklearn(self.model)
+        self._preparar_features()
+        self._nueva_version(version_modelo)
         self.is_trained = True
 
         print(f"[OK] Modelo cargado desde: {full_path}")
@@ -218,6 +571,25 @@ class RandomForestModel:
 
         return True
 
+    def _nueva_version(self, version_modelo: str = None):
+        """Cuenta una instalacion y fija version_modelo (la del registro o 'local-<n>')"""
+        self._instalaciones += 1
+        self.version_modelo = version_modelo if version_modelo is not None else f"local-{self._instalaciones}"
+
+    def hiperparametros(self) -> dict:
+        """n_estimators, max_depth y min_samples_split del bosque"""
+        if self.model is not None:
+            return {
+                'n_estimators': self.model.n_estimators,
+                'max_depth': self.model.max_depth,
+                'min_samples_split': self.model.min_samples_split
+            }
+        return {
+            'n_estimators': self.engine.n_arboles if self.engine else 0,
+            'max_depth': self._hiperparametros.get('max_depth'),
+            'min_samples_split': self._hiperparametros.get('min_samples_split')
+        }
+
     def get_info(self) -> dict:
         """
         Obtiene informacin del modelo
@@ -235,6 +607,8 @@ class RandomForestModel:
             'status': 'trained',
             'features': self.feature_names,
             'metrics': self.metrics,
-            'n_estimators': self.model.n_estimators if self.model else 0,
-            'max_depth': self.model.max_depth if self.model else 0
+            **self.hiperparametros(),
+            'format': 'sklearn' if self.model is not None else 'compact',
+            'inference_backend': settings.INFERENCE_BACKEND,
+            'version_modelo': self.version_modelo
         }
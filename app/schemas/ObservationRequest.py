@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Pydantic Schemas - Observaciones de alquileres reales
+Validacion de los lotes de POST /observations
+"""
+from datetime import datetime
+from pydantic import BaseModel, Field
+from app.config.settings import settings
+from app.schemas.PredictionRequest import PredictionRequest
+
+
+class ObservationRequest(PredictionRequest):
+    """Inmueble alquilado: los campos de PredictionRequest mas el precio observado"""
+
+    precio_eth: float = Field(
+        ...,
+        gt=0,
+        le=1000,
+        description="Precio de alquiler observado en ETH",
+        example=0.0015
+    )
+    observado_en: datetime | None = Field(
+        default=None,
+        description="Fecha de la observacion (por defecto, la de recepcion)",
+        example="2026-10-01T12:00:00Z"
+    )
+
+
+class ObservationBatchRequest(BaseModel):
+    """Schema para un lote de observaciones (se acepta o rechaza completo)"""
+
+    observaciones: list[ObservationRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.INGEST_MAX_BATCH,
+        description="Inmuebles alquilados con su precio"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "observaciones": [
+                    {
+                        "metros": 80.0,
+                        "cuartos": 2,
+                        "banos": 1,
+                        "lat": -17.783889,
+                        "lon": -63.182222,
+                        "parking": 1,
+                        "piscina": 0,
+                        "precio_eth": 0.0015
+                    }
+                ]
+            }
+        }
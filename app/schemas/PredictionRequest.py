@@ -3,7 +3,9 @@
 Pydantic Schemas - Similar a Laravel Requests
 Validacin de datos de entrada
 """
+from typing import Any
 from pydantic import BaseModel, Field, field_validator
+from app.config.settings import settings
 
 
 class PredictionRequest(BaseModel):
@@ -110,3 +112,50 @@ class PredictionResponse(BaseModel):
                 "zona_especial": None
             }
         }
+
+
+class PredictionBatchRequest(BaseModel):
+    """Schema para request de prediccion por lotes"""
+
+    inmuebles: list[dict[str, Any]] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.BATCH_MAX_SIZE,
+        description="Lista de inmuebles; cada uno se valida como PredictionRequest"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "inmuebles": [
+                    {
+                        "metros": 80.0,
+                        "cuartos": 2,
+                        "banos": 1,
+                        "lat": -17.783889,
+                        "lon": -63.182222,
+                        "parking": 1,
+                        "piscina": 0
+                    }
+                ]
+            }
+        }
+
+
+class PredictionBatchItemError(BaseModel):
+    """Errores de validacion de un inmueble dentro del lote"""
+
+    index: int = Field(..., description="Posicion del inmueble en el lote", example=3)
+    errores: list[dict[str, Any]] = Field(..., description="Errores de validacion del inmueble")
+
+
+class PredictionBatchResponse(BaseModel):
+    """Schema para response de prediccion por lotes"""
+
+    total: int = Field(..., description="Numero de inmuebles recibidos", example=2)
+    exitosos: int = Field(..., description="Numero de inmuebles predichos", example=1)
+    resultados: list[PredictionResponse | None] = Field(
+        ...,
+        description="Predicciones en el mismo orden del request (null si el inmueble es invalido)"
+    )
+    errores: list[PredictionBatchItemError] = Field(default_factory=list, description="Errores por indice")
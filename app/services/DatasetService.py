@@ -3,11 +3,97 @@
 Dataset Service - Genera datos sintticos para entrenamiento
 Basado en precios reales de Santa Cruz en ETH
 """
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from app.config.settings import settings
 
+# Extension de los datasets columnares: un directorio con un .npy por columna
+SUFIJO_COLUMNAR = '.cols'
+
+
+def es_columnar(ruta: Path) -> bool:
+    """True si la ruta apunta a un dataset columnar (por su extension)"""
+    return Path(ruta).suffix == SUFIJO_COLUMNAR
+
+
+def escribir_columnas(columnas: dict, ruta: Path):
+    """
+    Escribe un dataset columnar de forma atomica
+
+    Cada columna va a <ruta>/<columna>.npy y el orden y los dtypes a
+    schema.json. Se escribe en un directorio temporal hermano que despues se
+    renombra, asi un lector nunca ve el dataset a medio escribir.
+
+    Args:
+        columnas: Nombre de columna -> array 1D (todas del mismo largo)
+        ruta: Directorio destino (termina en .cols)
+    """
+    ruta = Path(ruta)
+    tmp = _directorio_temporal(ruta)
+    try:
+        for nombre, valores in columnas.items():
+            np.save(tmp / f"{nombre}.npy", np.ascontiguousarray(valores))
+        _publicar_columnas(tmp, ruta, list(columnas))
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def _directorio_temporal(ruta: Path) -> Path:
+    """Directorio temporal junto a ruta (mismo filesystem, para renombrar)"""
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix=f".{ruta.name}.", dir=ruta.parent))
+
+
+def _publicar_columnas(tmp: Path, ruta: Path, nombres: list):
+    """Escribe schema.json para los .npy de tmp y renombra tmp a ruta"""
+    esquema, filas = {}, 0
+    for nombre in nombres:
+        valores = np.load(tmp / f"{nombre}.npy", mmap_mode='r')
+        esquema[nombre], filas = valores.dtype.str, len(valores)
+    (tmp / 'schema.json').write_text(json.dumps({'rows': filas, 'columns': esquema}, indent=2))
+
+    if ruta.exists():
+        viejo = ruta.with_name(f".{ruta.name}.viejo")
+        os.replace(ruta, viejo)
+        os.replace(tmp, ruta)
+        shutil.rmtree(viejo, ignore_errors=True)
+    else:
+        os.replace(tmp, ruta)
+
+
+def leer_columnas(ruta: Path, mmap: bool = True) -> dict:
+    """
+    Abre un dataset columnar
+
+    Args:
+        ruta: Directorio .cols
+        mmap: Mapear los .npy en memoria (solo lectura) en vez de leerlos
+
+    Returns:
+        Nombre de columna -> array (np.memmap si mmap), en el orden guardado
+    """
+    ruta = Path(ruta)
+    esquema = json.loads((ruta / 'schema.json').read_text())
+    return {
+        nombre: np.load(ruta / f"{nombre}.npy", mmap_mode='r' if mmap else None)
+        for nombre in esquema['columns']
+    }
+
+
+def _escribir_shard(tarea: tuple) -> Path:
+    """Genera y escribe un shard; corre en los procesos de generar_dataset_sharded"""
+    ruta, n_samples, semilla = tarea
+    DatasetService.escribir(DatasetService.generar_shard(n_samples, semilla), ruta)
+    return ruta
+
 
 class DatasetService:
     """Servicio para generacin y manejo de datasets"""
@@ -31,81 +117,122 @@ class DatasetService:
         103: 0.1385, # Norte: MEDIO-ALTO (~2500 BOB)
     }
 
+    # Tipos compactos de las columnas del dataset (los mismos en memoria y en disco)
+    ESQUEMA = {
+        'metros_cuadrados': np.int16,
+        'num_habitacion': np.int8,
+        'num_banos': np.int8,
+        # int16: ids de zonas de poligonos GeoJSON (201, 1000, ...) ademas de anillos y 101-103
+        'zona_id': np.int16,
+        'parking': np.int8,
+        'piscina': np.int8,
+        'precio_eth': np.float32,
+    }
+
+    # Distribucion realista: mas inmuebles en anillos intermedios
+    PROBABILIDAD_ZONAS = {
+        0: 0.02, 1: 0.05, 2: 0.08, 3: 0.12, 4: 0.15, 5: 0.15, 6: 0.15,
+        7: 0.11, 8: 0.07, 9: 0.05, 10: 0.03, 101: 0.01, 102: 0.005, 103: 0.005,
+    }
+
+    @staticmethod
+    def generar_shard(n_samples: int, semilla: np.random.SeedSequence) -> pd.DataFrame:
+        """
+        Genera un bloque de inmuebles sinteticos columna por columna
+
+        Args:
+            n_samples: Numero de muestras del bloque
+            semilla: SeedSequence del bloque (determina todo su contenido)
+
+        Returns:
+            DataFrame con las columnas del dataset
+        """
+        rng = np.random.default_rng(semilla)
+
+        # Caracteristicas del inmueble
+        metros = rng.integers(30, 250, n_samples)       # 30m a 249m
+        cuartos = rng.integers(1, 6, n_samples)         # 1 a 5 habitaciones
+        banos = np.maximum(1, cuartos - rng.integers(0, 2, n_samples))  # Banos proporcionales
+        parking = (rng.random(n_samples) < 0.60).astype(np.int64)   # 60% tiene parking
+        piscina = (rng.random(n_samples) < 0.15).astype(np.int64)   # 15% tiene piscina
+
+        # Zona (centro 0, anillos 1-10 y zonas especiales 101-103)
+        zonas = np.array(list(DatasetService.PROBABILIDAD_ZONAS), dtype=np.int64)
+        probabilidades = np.array(list(DatasetService.PROBABILIDAD_ZONAS.values()))
+        indice_zona = rng.choice(len(zonas), size=n_samples, p=probabilidades)
+        precios_base = np.array([DatasetService.PRECIOS_BASE_ETH[zona] for zona in zonas])
+
+        # Precio base segun zona + ajustes por caracteristicas (mismas reglas en ETH):
+        # +0.0001 por m2, +0.003 por habitacion, +0.002 por bano,
+        # +0.008 con parking y +0.015 con piscina
+        precio_total = (
+            precios_base[indice_zona] +
+            metros * 0.0001 +
+            cuartos * 0.003 +
+            banos * 0.002 +
+            parking * 0.008 +
+            piscina * 0.015
+        )
+
+        # Ruido realista (10%)
+        ruido = rng.uniform(0.90, 1.10, n_samples)
+
+        columnas = {
+            'metros_cuadrados': metros,
+            'num_habitacion': cuartos,
+            'num_banos': banos,
+            'zona_id': zonas[indice_zona],
+            'parking': parking,
+            'piscina': piscina,
+            'precio_eth': np.round(precio_total * ruido, 6)
+        }
+        return pd.DataFrame({
+            nombre: valores.astype(DatasetService.ESQUEMA[nombre]) for nombre, valores in columnas.items()
+        })
+
+    @staticmethod
+    def _plan_shards(n_samples: int, seed: int = None, filas_por_shard: int = None) -> list[tuple]:
+        """
+        Reparte n_samples en shards con una SeedSequence hija cada uno
+
+        El shard i siempre recibe la hija i de SeedSequence(seed), asi el
+        contenido depende solo de la semilla y del tamano de shard, no de
+        cuantos procesos lo generen.
+
+        Returns:
+            Lista de (numero_de_filas, semilla) por shard
+        """
+        if seed is None:
+            seed = settings.RANDOM_STATE
+        if filas_por_shard is None:
+            filas_por_shard = settings.DATASET_SHARD_ROWS
+
+        tamanos = [min(filas_por_shard, n_samples - inicio) for inicio in range(0, n_samples, filas_por_shard)]
+        semillas = np.random.SeedSequence(seed).spawn(len(tamanos))
+        return list(zip(tamanos, semillas))
+
     @staticmethod
-    def generar_dataset_sintetico(n_samples: int = 500) -> pd.DataFrame:
+    def generar_dataset_sintetico(n_samples: int = 500, seed: int = None,
+                                  filas_por_shard: int = None) -> pd.DataFrame:
         """
         Genera dataset sinttico basado en datos reales de Santa Cruz
 
+        Es determinista para una misma semilla y da las mismas filas que
+        generar_dataset_sharded con los mismos parametros.
+
         Args:
             n_samples: Nmero de muestras a generar
+            seed: Semilla (por defecto RANDOM_STATE)
+            filas_por_shard: Filas por bloque (por defecto DATASET_SHARD_ROWS)
 
         Returns:
             DataFrame con datos sintticos
         """
-        np.random.seed(settings.RANDOM_STATE)
-
-        data = []
-
-        for _ in range(n_samples):
-            # Caractersticas del inmueble
-            metros = np.random.randint(30, 250)  # 30m a 250m
-            cuartos = np.random.randint(1, 6)    # 1 a 5 habitaciones
-            banos = max(1, cuartos - np.random.randint(0, 2))  # Baos proporcionales
-            parking = np.random.choice([0, 1], p=[0.4, 0.6])  # 60% tiene parking
-            piscina = np.random.choice([0, 1], p=[0.85, 0.15])  # 15% tiene piscina
-
-            # Zona (centro 0, anillos 1-10 y zonas especiales 101-103)
-            # Distribucin realista: ms inmuebles en anillos intermedios
-            zona_id = np.random.choice(
-                [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 101, 102, 103],
-                p=[0.02, 0.05, 0.08, 0.12, 0.15, 0.15, 0.15, 0.11, 0.07, 0.05, 0.03, 0.01, 0.005, 0.005]
-            )
-
-            # Precio base segn zona
-            precio_base = DatasetService.PRECIOS_BASE_ETH[zona_id]
-
-            # Ajustes por caractersticas (escalados a precios reales)
-            # Metros cuadrados: +0.0001 ETH por m (~1.8 BOB/m)
-            precio_metros = metros * 0.0001
-
-            # Habitaciones: +0.003 ETH por habitacin (~54 BOB)
-            precio_cuartos = cuartos * 0.003
-
-            # Baos: +0.002 ETH por bao (~36 BOB)
-            precio_banos = banos * 0.002
-
-            # Parking: +0.008 ETH (~144 BOB)
-            precio_parking = 0.008 if parking == 1 else 0
-
-            # Piscina: +0.015 ETH (~270 BOB)
-            precio_piscina = 0.015 if piscina == 1 else 0
-
-            # Precio total
-            precio_total = (
-                precio_base +
-                precio_metros +
-                precio_cuartos +
-                precio_banos +
-                precio_parking +
-                precio_piscina
-            )
-
-            # Agregar ruido realista (10%)
-            ruido = np.random.uniform(0.90, 1.10)
-            precio_final = round(precio_total * ruido, 6)
-
-            # Agregar a dataset
-            data.append({
-                'metros_cuadrados': metros,
-                'num_habitacion': cuartos,
-                'num_banos': banos,
-                'zona_id': zona_id,
-                'parking': parking,
-                'piscina': piscina,
-                'precio_eth': precio_final
-            })
-
-        df = pd.DataFrame(data)
+        shards = [
+            DatasetService.generar_shard(n, semilla)
+            for n, semilla in DatasetService._plan_shards(n_samples, seed, filas_por_shard)
+        ]
+        df = pd.concat(shards, ignore_index=True) if len(shards) > 1 else shards[0]
 
         # Estadsticas
         print(f"[Dataset] Dataset generado: {len(df)} inmuebles")
@@ -115,10 +242,58 @@ class DatasetService:
 
         return df
 
+    @staticmethod
+    def generar_dataset_sharded(n_samples: int, directorio: str, seed: int = None,
+                                filas_por_shard: int = None, workers: int = 1,
+                                formato: str = 'cols') -> list[Path]:
+        """
+        Genera un dataset grande bloque por bloque directo a disco
+
+        Cada shard se genera y escribe por separado (part-00000.cols, ...), de
+        modo que la memoria queda acotada por filas_por_shard. Con workers > 1
+        los shards se reparten entre procesos; el resultado es identico.
+
+        Args:
+            n_samples: Numero total de muestras
+            directorio: Directorio destino (relativo a BASE_DIR o absoluto)
+            seed: Semilla (por defecto RANDOM_STATE)
+            filas_por_shard: Filas por bloque (por defecto DATASET_SHARD_ROWS)
+            workers: Procesos generadores
+            formato: 'cols' (columnar) o 'csv'
+
+        Returns:
+            Paths de los shards en orden
+        """
+        destino = settings.get_full_path(directorio)
+        destino.mkdir(parents=True, exist_ok=True)
+
+        tareas = [
+            (destino / f"part-{i:05d}.{formato}", n, semilla)
+            for i, (n, semilla) in enumerate(DatasetService._plan_shards(n_samples, seed, filas_por_shard))
+        ]
+
+        if workers <= 1 or len(tareas) <= 1:
+            rutas = [_escribir_shard(tarea) for tarea in tareas]
+        else:
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as pool:
+                rutas = list(pool.map(_escribir_shard, tareas))
+
+        print(f"[OK] Dataset de {n_samples} inmuebles guardado en {len(rutas)} shards: {destino}")
+        return rutas
+
+    @staticmethod
+    def escribir(df: pd.DataFrame, filepath: Path):
+        """Escribe el DataFrame en CSV o columnar segun la extension de filepath"""
+        if es_columnar(filepath):
+            escribir_columnas({col: df[col].to_numpy() for col in df.columns}, filepath)
+        else:
+            df.to_csv(filepath, index=False)
+
     @staticmethod
     def guardar_dataset(df: pd.DataFrame, filename: str = None) -> Path:
         """
-        Guarda dataset en CSV
+        Guarda dataset en CSV o en formato columnar (.cols)
 
         Args:
             df: DataFrame a guardar
@@ -133,35 +308,180 @@ class DatasetService:
         filepath = settings.get_full_path(filename)
         filepath.parent.mkdir(parents=True, exist_ok=True)
 
-        df.to_csv(filepath, index=False)
+        DatasetService.escribir(df, filepath)
         print(f"[OK] Dataset guardado en: {filepath}")
 
         return filepath
 
     @staticmethod
-    def cargar_dataset(filename: str = None) -> pd.DataFrame:
+    def resolver_ruta(filename: str = None) -> Path:
         """
-        Carga dataset desde CSV
+        Path de un dataset (por defecto DATASET_PATH)
+
+        Si es un .cols que todavia no existe pero hay un CSV con el mismo
+        nombre al lado (un checkout nuevo solo trae synthetic_data.csv), lo
+        convierte en ese momento.
 
         Args:
             filename: Nombre del archivo (opcional)
 
         Returns:
-            DataFrame cargado
+            Path absoluto del dataset
         """
-        if filename is None:
-            filename = settings.DATASET_PATH
+        filepath = settings.get_full_path(filename or settings.DATASET_PATH)
+        csv = filepath.with_suffix('.csv')
+        if es_columnar(filepath) and not filepath.exists() and csv.is_file():
+            try:
+                DatasetService.convertir_csv(csv, filepath)
+            except OSError:
+                # Otro proceso lo convirtio al mismo tiempo y renombro primero
+                if not filepath.exists():
+                    raise
+        return filepath
 
-        filepath = settings.get_full_path(filename)
+    @staticmethod
+    def cargar_dataset(filename: str = None, mmap: bool = True) -> pd.DataFrame:
+        """
+        Carga dataset desde CSV o formato columnar (.cols)
+
+        Args:
+            filename: Nombre del archivo (opcional)
+            mmap: En datasets columnares, mapear las columnas en vez de leerlas
+
+        Returns:
+            DataFrame cargado (columnas conocidas con los dtypes de ESQUEMA)
+        """
+        filepath = DatasetService.resolver_ruta(filename)
 
         if not filepath.exists():
             raise FileNotFoundError(f"Dataset no encontrado: {filepath}")
 
-        df = pd.DataFrame(pd.read_csv(filepath))
+        if es_columnar(filepath):
+            # np.asarray: vista ndarray sobre el mapeo, sin copiar
+            columnas = leer_columnas(filepath, mmap=mmap)
+            df = pd.DataFrame({col: np.asarray(valores) for col, valores in columnas.items()}, copy=False)
+        else:
+            df = pd.read_csv(filepath, dtype=DatasetService._dtypes_csv(filepath))
         print(f"[Cargado] Dataset cargado: {len(df)} registros desde {filepath}")
 
         return df
 
+    @staticmethod
+    def _archivos(filepath: Path) -> list[Path]:
+        """Archivos de datos de un dataset: el mismo, o sus shards si es un directorio"""
+        if es_columnar(filepath) or not filepath.is_dir():
+            return [filepath]
+        return sorted(ruta for ruta in filepath.glob('part-*') if es_columnar(ruta) or ruta.suffix == '.csv')
+
+    @staticmethod
+    def contar_filas(filename: str = None) -> int:
+        """
+        Numero de filas de un dataset sin cargarlo
+
+        Args:
+            filename: CSV, directorio .cols o directorio de shards (part-*)
+
+        Returns:
+            Numero de filas
+        """
+        filepath = DatasetService.resolver_ruta(filename)
+        filas = 0
+        for archivo in DatasetService._archivos(filepath):
+            if es_columnar(archivo):
+                filas += json.loads((archivo / 'schema.json').read_text())['rows']
+            else:
+                filas += sum(len(bloque) for bloque in pd.read_csv(archivo, usecols=[0], chunksize=1_000_000))
+        return filas
+
+    @staticmethod
+    def iterar_bloques(filename: str = None, filas_por_bloque: int = None):
+        """
+        Recorre un dataset por bloques sin cargarlo entero
+
+        Los .cols se leen mapeados y se copia solo el bloque actual; los CSV
+        se parsean de a filas_por_bloque. Un directorio de shards (part-*)
+        se recorre shard por shard.
+
+        Args:
+            filename: CSV, directorio .cols o directorio de shards
+            filas_por_bloque: Maximo de filas por bloque (por defecto TRAINING_CHUNK_ROWS)
+
+        Yields:
+            DataFrames de a lo sumo filas_por_bloque filas, en orden
+        """
+        filepath = DatasetService.resolver_ruta(filename)
+        if filas_por_bloque is None:
+            filas_por_bloque = settings.TRAINING_CHUNK_ROWS
+        if not filepath.exists():
+            raise FileNotFoundError(f"Dataset no encontrado: {filepath}")
+
+        for archivo in DatasetService._archivos(filepath):
+            if es_columnar(archivo):
+                columnas = leer_columnas(archivo)
+                filas = len(next(iter(columnas.values()))) if columnas else 0
+                for inicio in range(0, filas, filas_por_bloque):
+                    yield pd.DataFrame({
+                        col: np.array(valores[inicio:inicio + filas_por_bloque])
+                        for col, valores in columnas.items()
+                    })
+            else:
+                dtypes = DatasetService._dtypes_csv(archivo)
+                yield from pd.read_csv(archivo, dtype=dtypes, chunksize=filas_por_bloque)
+
+    @staticmethod
+    def _dtypes_csv(filepath: Path) -> dict:
+        """dtypes de ESQUEMA para las columnas presentes en el encabezado del CSV"""
+        encabezado = pd.read_csv(filepath, nrows=0).columns
+        return {col: dtype for col, dtype in DatasetService.ESQUEMA.items() if col in encabezado}
+
+    @staticmethod
+    def convertir_csv(origen: str, destino: str = None, filas_por_bloque: int = 1_000_000) -> Path:
+        """
+        Convierte un dataset CSV al formato columnar
+
+        Lee el CSV por bloques y los vuelca en .npy mapeados en memoria, asi
+        la memoria queda acotada por filas_por_bloque.
+
+        Args:
+            origen: CSV de origen
+            destino: Directorio .cols (por defecto, el del CSV con extension .cols)
+            filas_por_bloque: Filas leidas por bloque
+
+        Returns:
+            Path del dataset columnar
+        """
+        origen = settings.get_full_path(origen)
+        destino = origen.with_suffix(SUFIJO_COLUMNAR) if destino is None else settings.get_full_path(destino)
+        dtypes = DatasetService._dtypes_csv(origen)
+
+        # Primera pasada: contar filas para dimensionar los .npy
+        filas = sum(len(bloque) for bloque in pd.read_csv(origen, usecols=[0], chunksize=filas_por_bloque))
+
+        tmp = _directorio_temporal(destino)
+        try:
+            columnas, inicio = {}, 0
+            for bloque in pd.read_csv(origen, dtype=dtypes, chunksize=filas_por_bloque):
+                if not columnas:
+                    columnas = {
+                        col: np.lib.format.open_memmap(
+                            tmp / f"{col}.npy", mode='w+', dtype=bloque[col].dtype, shape=(filas,)
+                        )
+                        for col in bloque.columns
+                    }
+                for col, valores in columnas.items():
+                    valores[inicio:inicio + len(bloque)] = bloque[col].to_numpy()
+                inicio += len(bloque)
+
+            for valores in columnas.values():
+                valores.flush()
+            _publicar_columnas(tmp, destino, list(columnas))
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        print(f"[OK] {filas} registros convertidos de {origen} a {destino}")
+        return destino
+
     @staticmethod
     def generar_y_guardar(n_samples: int = 500) -> Path:
         """
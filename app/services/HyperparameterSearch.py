@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Hyperparameter Search - Busqueda de hiperparametros del Random Forest
+Evalua configuraciones por precision, latencia de servicio y tamano, y
+calcula el frente de Pareto
+"""
+import itertools
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+from app.config.settings import settings
+from app.models.ModelRegistry import ModelRegistry
+from app.models.RandomForestModel import RandomForestModel
+from app.services.DatasetService import DatasetService, es_columnar
+
+# Objetivos del frente de Pareto: campo del resultado -> 'max' o 'min'
+OBJETIVOS = {
+    'r2': 'max',
+    'latencia_individual_us': 'min',
+    'latencia_lote_us': 'min',
+    'tamano_bytes': 'min',
+}
+
+# Hiperparametros que se buscan y sus valores por defecto
+GRILLA_DEFECTO = {
+    'n_estimators': [25, 50, 100],
+    'max_depth': [6, 10, 14],
+    'min_samples_split': [2, 5, 20],
+}
+
+
+def _evaluar_configuracion(tarea: tuple) -> dict:
+    """
+    Entrena una configuracion y mide su precision; corre en los procesos del pool
+
+    El dataset .cols se abre mapeado: los workers leen las columnas de las
+    mismas paginas del page cache, sin parsear un CSV cada uno. La matriz de
+    entrenamiento si es propia de cada worker: entrenar selecciona las
+    features, hace el split train/test y sklearn la convierte a float32,
+    y todo eso copia los datos.
+    """
+    indice, hiperparametros, ruta_dataset, directorio_modelos = tarea
+    df = DatasetService.cargar_dataset(ruta_dataset, mmap=True)
+
+    model = RandomForestModel()
+    inicio = time.perf_counter()
+    # Un core por worker: el paralelismo lo pone el pool
+    metrics = model.entrenar(df, hiperparametros={**hiperparametros, 'n_jobs': 1})
+    segundos = time.perf_counter() - inicio
+
+    ruta_modelo = model.guardar(Path(directorio_modelos) / f"config-{indice:03d}.pkl")
+
+    return {
+        'indice': indice,
+        'hiperparametros': hiperparametros,
+        'r2': float(metrics['test']['r2']),
+        'mae': float(metrics['test']['mae']),
+        'rmse': float(metrics['test']['rmse']),
+        'entrenamiento_s': round(segundos, 3),
+        'nodos': model.engine.n_nodos,
+        'tamano_bytes': ruta_modelo.stat().st_size,
+        'ruta_modelo': str(ruta_modelo),
+    }
+
+
+def medir_latencia(model: RandomForestModel, features: list[dict],
+                   repeticiones: int = 1000, tamano_lote: int = 256) -> dict:
+    """
+    Latencia de prediccion de un modelo, como la ve el servicio
+
+    Args:
+        model: Modelo entrenado
+        features: Inmuebles de muestra (diccionarios de features)
+        repeticiones: Predicciones individuales medidas
+        tamano_lote: Filas por llamada a predecir_batch
+
+    Returns:
+        Diccionario con la mediana de una prediccion individual y el costo
+        por fila de un lote, en microsegundos
+    """
+    model.predecir(features[0])
+
+    tiempos = np.empty(repeticiones)
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        model.predecir(features[i % len(features)])
+        tiempos[i] = time.perf_counter() - inicio
+
+    lote = [features[i % len(features)] for i in range(tamano_lote)]
+    model.predecir_batch(lote)
+    tiempos_lote = np.empty(max(5, repeticiones // 10))
+    for i in range(len(tiempos_lote)):
+        inicio = time.perf_counter()
+        model.predecir_batch(lote)
+        tiempos_lote[i] = time.perf_counter() - inicio
+
+    return {
+        'latencia_individual_us': round(float(np.median(tiempos)) * 1e6, 2),
+        'latencia_lote_us': round(float(np.median(tiempos_lote)) / tamano_lote * 1e6, 3),
+    }
+
+
+def frente_pareto(resultados: list[dict], objetivos: dict = None) -> list[dict]:
+    """
+    Resultados no dominados
+
+    Un resultado domina a otro si no es peor en ningun objetivo y es mejor
+    en al menos uno.
+
+    Args:
+        resultados: Resultados de la busqueda
+        objetivos: Campo -> 'max' o 'min' (por defecto OBJETIVOS)
+
+    Returns:
+        Los resultados del frente, ordenados por el primer objetivo (el mejor primero)
+    """
+    objetivos = objetivos or OBJETIVOS
+    signos = np.array([1.0 if sentido == 'max' else -1.0 for sentido in objetivos.values()])
+    # Todo a maximizar
+    valores = np.array([[r[campo] for campo in objetivos] for r in resultados], dtype=float) * signos
+
+    frente = []
+    for i, fila in enumerate(valores):
+        dominado = np.any(np.all(valores >= fila, axis=1) & np.any(valores > fila, axis=1))
+        if not dominado:
+            frente.append(resultados[i])
+
+    primero = next(iter(objetivos))
+    return sorted(frente, key=lambda r: r[primero], reverse=objetivos[primero] == 'max')
+
+
+class HyperparameterSearch:
+    """
+    Busqueda en grilla de hiperparametros del Random Forest
+
+    Las configuraciones se entrenan en un pool de procesos (un core cada
+    una) que leen una misma copia .cols del dataset mapeada en memoria
+    (cada worker arma su propia matriz de entrenamiento). La
+    latencia se mide despues, de a un modelo por vez, para que los
+    entrenamientos en curso no la distorsionen. Los modelos evaluados quedan
+    en un directorio temporal hasta `cerrar()`, para poder registrar el
+    elegido sin reentrenarlo.
+    """
+
+    def __init__(self, grilla: dict = None, dataset: str | Path = None, workers: int = None):
+        """
+        Args:
+            grilla: Hiperparametro -> lista de valores (por defecto GRILLA_DEFECTO)
+            dataset: Dataset .cols o CSV (por defecto DATASET_PATH)
+            workers: Procesos del pool (por defecto, uno por core)
+        """
+        self.grilla = grilla or GRILLA_DEFECTO
+        self.dataset = settings.get_full_path(dataset or settings.DATASET_PATH)
+        self.workers = workers or os.cpu_count() or 1
+        self.directorio = Path(tempfile.mkdtemp(prefix="busqueda_hiperparametros_"))
+        self.resultados = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def configuraciones(self) -> list[dict]:
+        """Todas las combinaciones de la grilla"""
+        nombres = list(self.grilla)
+        return [dict(zip(nombres, valores)) for valores in itertools.product(*self.grilla.values())]
+
+    def ejecutar(self, n_muestras_latencia: int = 256) -> list[dict]:
+        """
+        Evalua todas las configuraciones
+
+        Args:
+            n_muestras_latencia: Filas del dataset usadas para medir latencia
+
+        Returns:
+            Resultados (hiperparametros, R2/MAE/RMSE de test, latencias,
+            nodos y tamano del artefacto), en el orden de la grilla
+        """
+        ruta = self._dataset_columnar()
+        tareas = [
+            (indice, configuracion, str(ruta), str(self.directorio))
+            for indice, configuracion in enumerate(self.configuraciones())
+        ]
+
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(tareas)), mp_context=contexto) as pool:
+            resultados = list(pool.map(_evaluar_configuracion, tareas))
+
+        muestra = DatasetService.cargar_dataset(ruta).head(n_muestras_latencia)
+        features = [
+            {key: row[col] for col, key in RandomForestModel.FEATURE_KEYS.items()}
+            for row in muestra.to_dict('records')
+        ]
+        for resultado in resultados:
+            model = RandomForestModel()
+            model.cargar(resultado['ruta_modelo'])
+            resultado.update(medir_latencia(model, features))
+
+        self.resultados = resultados
+        return resultados
+
+    def elegir(self, max_latencia_us: float = None) -> dict:
+        """
+        Configuracion del frente de Pareto con mejor R2
+
+        Args:
+            max_latencia_us: Tope de latencia individual (opcional)
+
+        Returns:
+            El resultado elegido
+
+        Raises:
+            ValueError: Si ninguna configuracion cumple el tope
+        """
+        candidatos = [
+            r for r in frente_pareto(self.resultados)
+            if max_latencia_us is None or r['latencia_individual_us'] <= max_latencia_us
+        ]
+        if not candidatos:
+            raise ValueError(f"Ninguna configuracion predice en menos de {max_latencia_us} us")
+        return max(candidatos, key=lambda r: r['r2'])
+
+    def registrar(self, resultado: dict, activar: bool = True, registry: ModelRegistry = None) -> str:
+        """
+        Registra el modelo ya entrenado de una configuracion como version nueva
+
+        Args:
+            resultado: Resultado de la busqueda (p. ej. el de elegir())
+            activar: Apuntar `current` a la version nueva
+            registry: Registro destino (por defecto MODEL_REGISTRY_DIR)
+
+        Returns:
+            Nombre de la version registrada
+        """
+        model = RandomForestModel()
+        model.cargar(resultado['ruta_modelo'])
+        busqueda = {
+            campo: resultado[campo]
+            for campo in ('latencia_individual_us', 'latencia_lote_us', 'nodos', 'tamano_bytes')
+        }
+        return (registry or ModelRegistry()).registrar(
+            model,
+            activar=activar,
+            metadatos={'hyperparameters': resultado['hiperparametros'], 'search': busqueda}
+        )
+
+    def cerrar(self):
+        """Borra los modelos y el dataset temporales"""
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def _dataset_columnar(self) -> Path:
+        """El dataset en formato .cols (convierte un CSV a una copia temporal)"""
+        self.dataset = DatasetService.resolver_ruta(self.dataset)
+        if not self.dataset.exists():
+            raise FileNotFoundError(f"Dataset no encontrado: {self.dataset}")
+        if es_columnar(self.dataset):
+            return self.dataset
+        return DatasetService.convertir_csv(self.dataset, self.directorio / "dataset.cols")
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Inference Executor - Ejecuta la inferencia fuera del event loop
+Pool de threads o de procesos con cola acotada y timeout por request
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+class ColaLlenaError(RuntimeError):
+    """Se alcanzo el maximo de predicciones pendientes"""
+
+
+# Servicio propio de cada proceso del pool (modo 'process')
+_servicio_worker = None
+
+
+def _inicializar_worker():
+    """Crea el MLPredictionService del proceso (carga el modelo guardado)"""
+    global _servicio_worker
+    from app.services.MLPredictionService import MLPredictionService
+    _servicio_worker = MLPredictionService()
+
+
+def _ejecutar_en_worker(metodo: str, argumento):
+    """Llama a un metodo del servicio del proceso (debe ser picklable)"""
+    return getattr(_servicio_worker, metodo)(argumento)
+
+
+class InferenceExecutor:
+    """
+    Ejecuta metodos de MLPredictionService sin bloquear el event loop
+
+    Modos:
+        - 'thread': ThreadPoolExecutor que comparte el servicio (y el modelo)
+          del proceso. NumPy libera el GIL en los recorridos del bosque.
+        - 'process': ProcessPoolExecutor; cada proceso carga su propio
+          servicio con la version actual del registro (con MODEL_MMAP los
+          arrays del bosque se mapean del mismo .forest y comparten las
+          paginas fisicas). Hay que llamar a `reiniciar` despues de instalar otra version para que la carguen.
+        - 'inline': ejecuta en el event loop (comportamiento anterior, util
+          para comparar y depurar).
+
+    `max_pendientes` acota las llamadas en curso mas las encoladas: al
+    superarlo se lanza ColaLlenaError en vez de encolar sin limite. Una
+    llamada que tarda mas de `timeout_segundos` lanza TimeoutError; la
+    tarea sigue ocupando su lugar en la cola hasta que el pool la termina.
+    """
+
+    MODOS = ('thread', 'process', 'inline')
+
+    def __init__(self, servicio, modo: str, workers: int, max_pendientes: int, timeout_segundos: float):
+        """
+        Args:
+            servicio: MLPredictionService del proceso principal
+            modo: 'thread', 'process' o 'inline'
+            workers: Threads o procesos del pool
+            max_pendientes: Maximo de llamadas en curso + encoladas
+            timeout_segundos: Tiempo maximo de espera por llamada (0 = sin limite)
+        """
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo de ejecucion desconocido: {modo} (usar uno de {self.MODOS})")
+
+        self.servicio = servicio
+        self.modo = modo
+        self.workers = workers
+        self.max_pendientes = max_pendientes
+        self.timeout_segundos = timeout_segundos
+
+        self._pool = None
+        self._lock = threading.Lock()
+        self.pendientes = 0
+        self.rechazadas = 0
+        self.timeouts = 0
+
+    async def _obtener_pool(self):
+        """Crea el pool en la primera llamada"""
+        if self._pool is None:
+            # Entrenar una sola vez antes de arrancar los workers, en lugar de
+            # que cada thread o proceso lo haga en su primera prediccion. Cargar
+            # o entrenar tarda: se hace en un thread para que el event loop siga
+            # atendiendo /health, /ready y el resto de los requests
+            await asyncio.to_thread(self.servicio.modelo_entrenado)
+
+            # Otra llamada pudo crearlo mientras se esperaba el modelo
+            if self._pool is None:
+                if self.modo == 'thread':
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='inferencia')
+                else:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_inicializar_worker)
+        return self._pool
+
+    async def ejecutar(self, metodo: str, argumento):
+        """
+        Ejecuta servicio.<metodo>(argumento) en el pool y espera el resultado
+
+        Args:
+            metodo: Nombre del metodo de MLPredictionService
+            argumento: Unico argumento del metodo
+
+        Returns:
+            Resultado del metodo
+
+        Raises:
+            ColaLlenaError: Si ya hay max_pendientes llamadas pendientes
+            TimeoutError: Si el resultado no llega en timeout_segundos
+        """
+        if self.modo == 'inline':
+            return getattr(self.servicio, metodo)(argumento)
+
+        with self._lock:
+            if self.pendientes >= self.max_pendientes:
+                self.rechazadas += 1
+                raise ColaLlenaError(
+                    f"Hay {self.pendientes} predicciones pendientes (maximo {self.max_pendientes})"
+                )
+            self.pendientes += 1
+
+        try:
+            pool = await self._obtener_pool()
+            if self.modo == 'thread':
+                future = pool.submit(getattr(self.servicio, metodo), argumento)
+            else:
+                future = pool.submit(_ejecutar_en_worker, metodo, argumento)
+        except BaseException:
+            self._liberar()
+            raise
+
+        # El lugar en la cola se libera cuando el pool termina, no cuando se deja de esperar
+        future.add_done_callback(self._liberar)
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future),
+                timeout=self.timeout_segundos or None
+            )
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def _liberar(self, _future=None):
+        with self._lock:
+            self.pendientes -= 1
+
+    def reiniciar(self):
+        """Descarta el pool actual (el siguiente se crea con el modelo guardado)"""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def cerrar(self):
+        """Apaga el pool esperando las tareas en curso"""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def estadisticas(self) -> dict:
+        """
+        Estado del executor para /status
+
+        Returns:
+            Diccionario con configuracion y contadores
+        """
+        return {
+            'mode': self.modo,
+            'workers': self.workers,
+            'max_pending': self.max_pendientes,
+            'timeout_seconds': self.timeout_segundos,
+            'pending': self.pendientes,
+            'rejected': self.rechazadas,
+            'timeouts': self.timeouts
+        }
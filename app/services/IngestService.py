@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Ingest Service - Ingesta de observaciones de alquileres reales
+Las agrega al ObservationLog y dispara el reentrenamiento con ellas al
+juntar suficientes o cada cierto tiempo
+"""
+import threading
+import time
+import numpy as np
+from app.models.ObservationLog import ObservationLog
+from app.services.GeolocationService import GeolocationService
+from app.services.TrainingJobService import TrainingJobService, EntrenamientoEnCursoError
+from app.schemas.ObservationRequest import ObservationRequest
+
+
+class IngestService:
+    """
+    Ingesta de observaciones y reentrenamiento con ellas
+
+    Cada lote se convierte a registros (lat/lon -> zona_id con
+    GeolocationService, vectorizado) y se agrega al log con un solo write.
+    El reentrenamiento se dispara cuando el segmento activo junta `umbral`
+    observaciones o, con `intervalo_segundos`, periodicamente si hay alguna:
+    primero se sella el segmento (un rename bajo flock, asi de varios
+    workers que lo intentan a la vez dispara uno solo) y despues se crea un
+    job de TrainingJobService que compacta el log y entrena con el dataset
+    compactado.
+    """
+
+    def __init__(self, log: ObservationLog, training_jobs: TrainingJobService,
+                 umbral: int = 0, intervalo_segundos: float = 0):
+        """
+        Args:
+            log: Log de observaciones
+            training_jobs: Servicio de jobs donde se lanzan los reentrenamientos
+            umbral: Observaciones pendientes que disparan un reentrenamiento (0 = nunca)
+            intervalo_segundos: Periodo del reentrenamiento programado (0 = nunca)
+        """
+        self.log = log
+        self.training_jobs = training_jobs
+        self.umbral = umbral
+        self.intervalo_segundos = intervalo_segundos
+
+        self._lock = threading.Lock()
+        self._job_id = None
+        self._programacion = None
+        self._detener = threading.Event()
+
+    def ingestar(self, observaciones: list[ObservationRequest]) -> dict:
+        """
+        Agrega un lote de observaciones al log
+
+        Args:
+            observaciones: Observaciones validadas
+
+        Returns:
+            Diccionario con 'accepted', 'pending' (en el segmento activo) y
+            'retraining_job' (el job lanzado por el umbral, o None)
+        """
+        ahora = time.time()
+        ubicaciones = GeolocationService.analizar_ubicacion_batch(
+            [o.lat for o in observaciones],
+            [o.lon for o in observaciones]
+        )
+        registros = self.log.registros({
+            'metros_cuadrados': [o.metros for o in observaciones],
+            'num_habitacion': [o.cuartos for o in observaciones],
+            'num_banos': [o.banos for o in observaciones],
+            'zona_id': ubicaciones['zona_id'],
+            'parking': [o.parking for o in observaciones],
+            'piscina': [o.piscina for o in observaciones],
+            'precio_eth': [o.precio_eth for o in observaciones],
+            'lat': [o.lat for o in observaciones],
+            'lon': [o.lon for o in observaciones],
+            'observado_en': np.array([
+                o.observado_en.timestamp() if o.observado_en else ahora for o in observaciones
+            ]),
+        })
+        pendientes = self.log.agregar(registros)
+
+        job = None
+        if self.umbral and pendientes >= self.umbral:
+            job = self._disparar(minimo=self.umbral)
+
+        return {
+            'accepted': len(registros),
+            'pending': self.log.pendientes() if job else pendientes,
+            'retraining_job': job
+        }
+
+    def reentrenar(self) -> dict:
+        """
+        Lanza ya un reentrenamiento con las observaciones
+
+        Returns:
+            Estado inicial del job
+
+        Raises:
+            ValueError: Si no hay observaciones sin compactar
+            EntrenamientoEnCursoError: Si no se puede aceptar otro job
+        """
+        if not self.log.sellar() and not self.log.sellados():
+            raise ValueError("No hay observaciones nuevas para entrenar")
+        return self._crear_job()
+
+    def _disparar(self, minimo: int) -> dict | None:
+        """Sella el segmento activo y lanza un job si no hay uno de ingesta en curso"""
+        with self._lock:
+            job = self.training_jobs.obtener(self._job_id) if self._job_id else None
+            if job is not None and job['status'] in ('queued', 'running'):
+                return None
+            if not self.log.sellar(minimo):
+                return None
+        try:
+            return self._crear_job()
+        except EntrenamientoEnCursoError:
+            # El segmento sellado queda para el proximo job
+            return None
+
+    def _crear_job(self) -> dict:
+        job = self.training_jobs.crear(observaciones=(str(self.log.directorio), str(self.log.dataset)))
+        with self._lock:
+            self._job_id = job['job_id']
+        return job
+
+    def iniciar_programacion(self):
+        """Arranca el reentrenamiento periodico (si intervalo_segundos > 0)"""
+        if self.intervalo_segundos <= 0 or self._programacion is not None:
+            return
+        self._programacion = threading.Thread(target=self._programar, name='reentrenamiento', daemon=True)
+        self._programacion.start()
+
+    def detener_programacion(self):
+        self._detener.set()
+
+    def _programar(self):
+        while not self._detener.wait(self.intervalo_segundos):
+            try:
+                job = self._disparar(minimo=1)
+                if job is not None:
+                    print(f"[Info] Reentrenamiento programado con observaciones: job {job['job_id']}")
+            except Exception as e:
+                print(f"[Error] Fallo el reentrenamiento programado: {type(e).__name__}: {e}")
+
+    def estadisticas(self) -> dict:
+        """Estado del log y del ultimo job de reentrenamiento lanzado desde aqui"""
+        return {
+            **self.log.estadisticas(),
+            'retrain_threshold': self.umbral,
+            'retrain_interval_seconds': self.intervalo_segundos,
+            'last_job': self.training_jobs.obtener(self._job_id) if self._job_id else None
+        }
@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+Load Generator - Prueba de carga asincrona del servicio
+Genera requests realistas y mide throughput, latencias y recursos
+"""
+import asyncio
+import os
+import time
+from pathlib import Path
+import numpy as np
+from app.services.DatasetService import DatasetService
+from app.services.GeolocationService import GeolocationService
+
+# Percentiles del reporte (etiqueta -> percentil)
+PERCENTILES = {'p50': 50, 'p95': 95, 'p99': 99, 'p999': 99.9}
+
+# Mezcla por defecto: proporcion de cada tipo de request
+MEZCLA_DEFECTO = {'predict': 0.95, 'batch': 0.05}
+
+
+def ubicaciones_por_zona(zonas: np.ndarray, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Latitud y longitud al azar dentro de cada zona
+
+    Centro (0): dentro de RADIO_CENTRO_KM. Anillo k (1-10): rumbo uniforme y
+    distancia uniforme entre el radio del anillo anterior y el del anillo k
+    en ese rumbo (tabla polar). Zonas especiales (101+): uniforme en su
+    bounding box.
+
+    Args:
+        zonas: zona_id de cada inmueble (como en el dataset sintetico)
+        rng: Generador aleatorio
+
+    Returns:
+        Tupla (lats, lons)
+    """
+    geo = GeolocationService
+    n = len(zonas)
+    rumbos = rng.uniform(0, 360, n)
+    bins = np.rint(rumbos * (geo.BINS_RUMBO / 360.0)).astype(np.int64) % geo.BINS_RUMBO
+
+    # Radios [centro, anillo 1, ..., anillo 10] para el rumbo de cada inmueble
+    radios = np.column_stack([np.full(n, geo.RADIO_CENTRO_KM), geo.TABLA_POLAR[bins]])
+    anillos = np.clip(zonas, 0, radios.shape[1] - 1)
+    interior = np.where(anillos == 0, 0.0, radios[np.arange(n), np.maximum(anillos - 1, 0)])
+    exterior = radios[np.arange(n), anillos]
+    # Un margen para no caer justo en el borde entre dos anillos
+    margen = 0.02 * (exterior - interior)
+    distancias = rng.uniform(interior + margen, exterior - margen)
+
+    # Desplazamiento local (km) -> grados, con los radios de curvatura WGS84 del centro
+    centro_lat, centro_lon = geo.CENTRO_SCZ
+    w = 1 - geo.WGS84_E2 * np.sin(np.radians(centro_lat)) ** 2
+    km_por_grado_lat = np.radians(geo.WGS84_A_KM * (1 - geo.WGS84_E2) / (w * np.sqrt(w)))
+    km_por_grado_lon = np.radians(geo.WGS84_A_KM / np.sqrt(w) * np.cos(np.radians(centro_lat)))
+    lats = centro_lat + distancias * np.cos(np.radians(rumbos)) / km_por_grado_lat
+    lons = centro_lon + distancias * np.sin(np.radians(rumbos)) / km_por_grado_lon
+
+    for datos in geo.ZONAS_ESPECIALES.values():
+        en_zona = zonas == datos['zona_id']
+        bbox = datos['bbox']
+        lats[en_zona] = rng.uniform(bbox['lat_min'], bbox['lat_max'], en_zona.sum())
+        lons[en_zona] = rng.uniform(bbox['lon_min'], bbox['lon_max'], en_zona.sum())
+
+    return lats, lons
+
+
+def generar_inmuebles(n: int, semilla: int = 0) -> list[dict]:
+    """
+    Inmuebles para los requests, con la distribucion del dataset sintetico
+
+    Caracteristicas y zona salen de DatasetService.generar_shard (mismas
+    proporciones de anillos y zonas especiales que el entrenamiento); la
+    ubicacion se sortea dentro de la zona.
+
+    Returns:
+        Cuerpos de /predict
+    """
+    secuencia = np.random.SeedSequence(semilla)
+    df = DatasetService.generar_shard(n, secuencia)
+    rng = np.random.default_rng(secuencia.spawn(1)[0])
+    lats, lons = ubicaciones_por_zona(df['zona_id'].to_numpy(dtype=np.int64), rng)
+    # Metros con decimales, como llegan de los clientes
+    metros = df['metros_cuadrados'].to_numpy() + rng.choice([0.0, 0.5], n)
+
+    return [
+        {
+            'metros': float(m), 'cuartos': int(c), 'banos': int(b),
+            'lat': round(float(lat), 6), 'lon': round(float(lon), 6),
+            'parking': int(p), 'piscina': int(s)
+        }
+        for m, c, b, lat, lon, p, s in zip(
+            metros, df['num_habitacion'], df['num_banos'], lats, lons, df['parking'], df['piscina']
+        )
+    ]
+
+
+def leer_mezcla(texto: str) -> dict:
+    """'predict:0.9,batch:0.1' -> {'predict': 0.9, 'batch': 0.1} (normalizada)"""
+    mezcla = {}
+    for parte in texto.split(','):
+        tipo, _, peso = parte.partition(':')
+        if tipo not in MEZCLA_DEFECTO:
+            raise ValueError(f"Tipo de request desconocido: {tipo} (validos: {', '.join(MEZCLA_DEFECTO)})")
+        mezcla[tipo] = float(peso or 1)
+    total = sum(mezcla.values())
+    if total <= 0:
+        raise ValueError("La mezcla no tiene ningun peso positivo")
+    return {tipo: peso / total for tipo, peso in mezcla.items()}
+
+
+class MonitorRecursos:
+    """
+    CPU y memoria de un proceso y sus descendientes (Linux, via /proc)
+
+    Con varios workers pre-fork el servidor es el supervisor mas sus hijos:
+    se suman todos. Fuera de Linux los valores quedan en None.
+    """
+
+    def __init__(self, pid: int = None):
+        self.pid = pid or os.getpid()
+        self.rss_max_mb = None
+        self._cpu_inicio = None
+        self._reloj_inicio = None
+
+    def _pids(self) -> list[int]:
+        pids, pendientes = [], [self.pid]
+        while pendientes:
+            pid = pendientes.pop()
+            pids.append(pid)
+            for tarea in Path(f"/proc/{pid}/task").glob('*/children'):
+                try:
+                    pendientes.extend(int(hijo) for hijo in tarea.read_text().split())
+                except OSError:
+                    pass
+        return pids
+
+    def _cpu_segundos(self) -> float | None:
+        total = 0.0
+        try:
+            for pid in self._pids():
+                campos = Path(f"/proc/{pid}/stat").read_text().rsplit(')', 1)[1].split()
+                total += (int(campos[11]) + int(campos[12])) / os.sysconf('SC_CLK_TCK')
+        except (OSError, ValueError, IndexError):
+            return None
+        return total
+
+    def _rss_mb(self) -> float | None:
+        total = 0
+        try:
+            for pid in self._pids():
+                for linea in Path(f"/proc/{pid}/status").read_text().splitlines():
+                    if linea.startswith('VmRSS:'):
+                        total += int(linea.split()[1])
+        except (OSError, ValueError):
+            return None
+        return total / 1024
+
+    def iniciar(self):
+        self._cpu_inicio = self._cpu_segundos()
+        self._reloj_inicio = time.perf_counter()
+        self.rss_max_mb = self._rss_mb()
+
+    def muestrear(self):
+        rss = self._rss_mb()
+        if rss is not None:
+            self.rss_max_mb = max(self.rss_max_mb or 0, rss)
+
+    def resultado(self) -> dict:
+        """CPU usada (segundos y cores promedio) y RSS maximo desde iniciar()"""
+        cpu_fin = self._cpu_segundos()
+        segundos = time.perf_counter() - self._reloj_inicio
+        cpu = None if cpu_fin is None or self._cpu_inicio is None else cpu_fin - self._cpu_inicio
+        return {
+            'pid': self.pid,
+            'cpu_seconds': round(cpu, 3) if cpu is not None else None,
+            'cpu_cores': round(cpu / segundos, 3) if cpu is not None else None,
+            'rss_max_mb': round(self.rss_max_mb, 1) if self.rss_max_mb is not None else None
+        }
+
+
+class LoadGenerator:
+    """
+    Prueba de carga asincrona contra el servicio
+
+    Dos modelos de carga:
+    - rps (lazo abierto): los requests salen a la tasa objetivo, sin esperar
+      respuestas; la latencia se mide desde el instante programado, asi una
+      cola en el servidor se ve en la latencia (sin omision coordinada). Si
+      hay max_en_vuelo requests sin responder, los siguientes se descartan y
+      se cuentan como errores.
+    - concurrencia (lazo cerrado): N clientes que envian el siguiente
+      request apenas reciben la respuesta.
+
+    Los requests del calentamiento no entran en el reporte.
+    """
+
+    def __init__(self, cliente, inmuebles: list[dict], mezcla: dict = None, tamano_lote: int = 20,
+                 repetidos: float = 0.0, semilla: int = 0, monitor: MonitorRecursos = None):
+        """
+        Args:
+            cliente: httpx.AsyncClient (contra la app ASGI o un servidor)
+            inmuebles: Cuerpos de /predict (ver generar_inmuebles)
+            mezcla: Proporcion de cada tipo de request ('predict', 'batch')
+            tamano_lote: Inmuebles por request de /predict/batch
+            repetidos: Fraccion de /predict que repite un inmueble ya pedido (aciertos de cache)
+            semilla: Semilla del orden de los requests
+            monitor: Recursos a medir (por defecto, este proceso)
+        """
+        self.cliente = cliente
+        self.inmuebles = inmuebles
+        self.mezcla = mezcla or MEZCLA_DEFECTO
+        self.tamano_lote = tamano_lote
+        self.repetidos = repetidos
+        self.rng = np.random.default_rng(semilla)
+        self.monitor = monitor or MonitorRecursos()
+
+        # Umbrales acumulados de la mezcla para sortear el tipo con un solo random()
+        self._tipos = list(self.mezcla)
+        self._umbrales = np.cumsum(list(self.mezcla.values())).tolist()
+        self._siguiente = 0
+        self._latencias = {tipo: [] for tipo in self.mezcla}
+        self._errores = {}
+        self._midiendo = False
+
+    def _request(self) -> tuple[str, str, object]:
+        """(tipo, ruta, cuerpo) del siguiente request segun la mezcla"""
+        sorteo = self.rng.random()
+        tipo = next((t for t, umbral in zip(self._tipos, self._umbrales) if sorteo < umbral), self._tipos[-1])
+        if tipo == 'batch':
+            indices = self.rng.integers(0, len(self.inmuebles), self.tamano_lote)
+            return tipo, '/predict/batch', {'inmuebles': [self.inmuebles[i] for i in indices]}
+
+        if self._siguiente and self.rng.random() < self.repetidos:
+            inmueble = self.inmuebles[self.rng.integers(0, min(self._siguiente, len(self.inmuebles)))]
+        else:
+            inmueble = self.inmuebles[self._siguiente % len(self.inmuebles)]
+            self._siguiente += 1
+        return tipo, '/predict', inmueble
+
+    async def _enviar(self, inicio: float = None):
+        tipo, ruta, cuerpo = self._request()
+        inicio = inicio if inicio is not None else time.perf_counter()
+        midiendo = self._midiendo
+        try:
+            response = await self.cliente.post(ruta, json=cuerpo)
+            error = None if response.status_code == 200 else str(response.status_code)
+        except Exception as e:
+            error = type(e).__name__
+        if not midiendo:
+            return
+        if error is None:
+            self._latencias[tipo].append(time.perf_counter() - inicio)
+        else:
+            self._errores[error] = self._errores.get(error, 0) + 1
+
+    async def _lazo_abierto(self, rps: float, fin: float, max_en_vuelo: int):
+        en_vuelo = set()
+        intervalo = 1.0 / rps
+        programado = time.perf_counter()
+        while programado < fin:
+            espera = programado - time.perf_counter()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            if len(en_vuelo) >= max_en_vuelo:
+                if self._midiendo:
+                    self._errores['descartado'] = self._errores.get('descartado', 0) + 1
+            else:
+                tarea = asyncio.ensure_future(self._enviar(programado))
+                en_vuelo.add(tarea)
+                tarea.add_done_callback(en_vuelo.discard)
+            programado += intervalo
+        if en_vuelo:
+            await asyncio.wait(en_vuelo)
+
+    async def _lazo_cerrado(self, concurrencia: int, fin: float):
+        async def cliente():
+            while time.perf_counter() < fin:
+                await self._enviar()
+        await asyncio.gather(*[cliente() for _ in range(concurrencia)])
+
+    async def _muestrear(self, fin: float):
+        while time.perf_counter() < fin:
+            self.monitor.muestrear()
+            await asyncio.sleep(0.25)
+
+    async def ejecutar(self, duracion: float, rps: float = None, concurrencia: int = None,
+                       calentamiento: float = 1.0, max_en_vuelo: int = 1000) -> dict:
+        """
+        Corre la prueba y devuelve el reporte
+
+        Args:
+            duracion: Segundos medidos (despues del calentamiento)
+            rps: Tasa objetivo (lazo abierto)
+            concurrencia: Clientes simultaneos (lazo cerrado; si no hay rps)
+            calentamiento: Segundos iniciales que no se miden
+            max_en_vuelo: Tope de requests sin responder en lazo abierto
+
+        Returns:
+            Reporte (ver reporte())
+        """
+        if not rps and not concurrencia:
+            raise ValueError("Indicar rps o concurrencia")
+
+        inicio = time.perf_counter()
+        fin = inicio + calentamiento + duracion
+        carga = (self._lazo_abierto(rps, fin, max_en_vuelo) if rps
+                 else self._lazo_cerrado(concurrencia, fin))
+        tarea = asyncio.ensure_future(carga)
+
+        await asyncio.sleep(calentamiento)
+        self._midiendo = True
+        self.monitor.iniciar()
+        inicio_medicion = time.perf_counter()
+        muestreo = asyncio.ensure_future(self._muestrear(fin))
+        await tarea
+        segundos = time.perf_counter() - inicio_medicion
+        await muestreo
+
+        return self.reporte(segundos, {
+            'mode': 'rps' if rps else 'concurrency',
+            'target_rps': rps,
+            'concurrency': None if rps else concurrencia,
+            'duration_seconds': duracion,
+            'warmup_seconds': calentamiento,
+            'mix': self.mezcla,
+            'batch_size': self.tamano_lote,
+            'repeated_fraction': self.repetidos
+        })
+
+    def reporte(self, segundos: float, configuracion: dict) -> dict:
+        """Throughput, latencias por tipo y en total, errores y recursos"""
+        todas = [latencia for latencias in self._latencias.values() for latencia in latencias]
+        exitosos = len(todas)
+        errores = sum(self._errores.values())
+        return {
+            'config': configuracion,
+            'requests': exitosos + errores,
+            'ok': exitosos,
+            'errors': dict(sorted(self._errores.items())),
+            'error_rate': round(errores / (exitosos + errores), 6) if exitosos + errores else 0.0,
+            'throughput_rps': round(exitosos / segundos, 2),
+            'elapsed_seconds': round(segundos, 3),
+            'latency_ms': resumen_latencias(todas),
+            'latency_ms_by_type': {tipo: resumen_latencias(latencias) for tipo, latencias in self._latencias.items()},
+            'resources': self.monitor.resultado()
+        }
+
+
+def resumen_latencias(latencias: list[float]) -> dict:
+    """Media, maximo y PERCENTILES en milisegundos (None sin datos)"""
+    if not latencias:
+        return {'mean': None, **{nombre: None for nombre in PERCENTILES}, 'max': None}
+    ms = np.asarray(latencias) * 1e3
+    valores = np.percentile(ms, list(PERCENTILES.values()))
+    return {
+        'mean': round(float(ms.mean()), 3),
+        **{nombre: round(float(valor), 3) for nombre, valor in zip(PERCENTILES, valores)},
+        'max': round(float(ms.max()), 3)
+    }
+
+
+def comparar_reportes(base: dict, nuevo: dict) -> list[tuple]:
+    """
+    Metricas principales de dos reportes lado a lado
+
+    Returns:
+        Filas (metrica, base, nuevo, variacion relativa o None)
+    """
+    metricas = [('throughput_rps', base['throughput_rps'], nuevo['throughput_rps']),
+                ('error_rate', base['error_rate'], nuevo['error_rate'])]
+    for nombre in ('mean', *PERCENTILES, 'max'):
+        metricas.append((f"latency_ms.{nombre}", base['latency_ms'].get(nombre), nuevo['latency_ms'].get(nombre)))
+    for nombre in ('cpu_cores', 'rss_max_mb'):
+        metricas.append((f"resources.{nombre}", base['resources'].get(nombre), nuevo['resources'].get(nombre)))
+
+    return [
+        (nombre, antes, despues, despues / antes - 1 if antes and despues is not None else None)
+        for nombre, antes, despues in metricas
+    ]
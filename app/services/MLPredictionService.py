@@ -3,76 +3,311 @@
 ML Prediction Service - Similar a Laravel Service
 Orquesta geolocalizacin y prediccin ML
 """
-from app.models.RandomForestModel import RandomForestModel
+import threading
+import time
+from app.models.RandomForestModel import RandomForestModel, redondear
+from app.models.ModelRegistry import ModelRegistry
 from app.services.GeolocationService import GeolocationService
+from app.services.PredictionCache import PredictionCache
+from app.services.MetricsRegistry import DURACION_ETAPA, CARGA_MODELO, MODELO_INFO
+from app.config.settings import settings
 from app.schemas.PredictionRequest import PredictionRequest, PredictionResponse
 
 
+def _medir_etapa(etapa: str, desde: float, tiempos: dict = None) -> float:
+    """
+    Registra la duracion de una etapa de la prediccion y devuelve el instante actual
+
+    Con `tiempos` (request perfilado) la duracion tambien se guarda ahi.
+    """
+    ahora = time.perf_counter()
+    DURACION_ETAPA.etiquetar(etapa).observar(ahora - desde)
+    if tiempos is not None:
+        tiempos[etapa] = ahora - desde
+    return ahora
+
+
 class MLPredictionService:
     """Servicio principal de prediccin ML"""
 
-    def __init__(self):
-        """Inicializa el servicio con modelo cargado"""
-        self.model = RandomForestModel()
+    def __init__(self, cargar: bool = True):
+        """
+        Inicializa el servicio con modelo cargado
+
+        Args:
+            cargar: Cargar el modelo ahora; con False se carga en la primera
+                llamada a modelo_entrenado (el servidor lo hace en su fase de
+                arranque, ver PredictionController.preparar)
+        """
+        self.registry = ModelRegistry()
         self.geo_service = GeolocationService()
+        self.cache = PredictionCache(
+            max_size=settings.CACHE_MAX_SIZE,
+            ttl_segundos=settings.CACHE_TTL_SECONDS,
+            decimales=settings.CACHE_LAT_LON_DECIMALS
+        )
+
+        # Serializa la carga diferida y los entrenamientos automaticos (un solo hilo entrena)
+        self._lock_entrenamiento = threading.Lock()
+
+        # Intentar cargar modelo existente: version actual del registro o,
+        # si el registro esta vacio, el archivo de MODEL_PATH
+        self.model = RandomForestModel()
+        if cargar:
+            self.model = self.cargar_version(self.registry.version_actual())
+            if not self.model.is_trained:
+                print("[Advertencia] Modelo no encontrado. Se entrenar automticamente en la primera prediccin.")
+
+    def cargar_version(self, version: str = None) -> RandomForestModel:
+        """
+        Construye un RandomForestModel aparte con una version del registro
+
+        No toca el modelo que esta sirviendo: para ponerlo en uso hay que
+        pasarlo a instalar_modelo. Con MODEL_MMAP (y el backend 'flat') se
+        carga el .forest de la version mapeado en memoria, asi todos los
+        procesos que sirven la misma version comparten sus paginas; las
+        versiones sin .forest se cargan del pickle.
+
+        Args:
+            version: Version del registro (None = archivo de MODEL_PATH)
+
+        Returns:
+            Modelo cargado (sin entrenar si no se encontro el archivo)
+
+        Raises:
+            ValueError: Si la version no esta registrada
+        """
+        model = RandomForestModel()
+        inicio = time.perf_counter()
+        artefacto = settings.MODEL_PATH if version is None else self._artefacto(version)
+        if version is None:
+            model.cargar()
+        elif not model.cargar(artefacto, version_modelo=version):
+            raise ValueError(f"Version de modelo no registrada: {version}")
+        if model.is_trained:
+            formato = 'forest' if str(artefacto).endswith(RandomForestModel.SUFIJO_COMPACTO) else 'pickle'
+            CARGA_MODELO.etiquetar(formato).observar(time.perf_counter() - inicio)
+        return model
+
+    def _artefacto(self, version: str):
+        """Archivo del registro desde el que se sirve una version"""
+        compacto = self.registry.ruta_compacta(version)
+        if settings.MODEL_MMAP and settings.INFERENCE_BACKEND == 'flat' and compacto.exists():
+            return compacto
+        return self.registry.ruta(version)
+
+    def instalar_modelo(self, model: RandomForestModel):
+        """
+        Pone en uso un modelo ya construido con una sola asignacion
+
+        Las predicciones en curso terminan con la referencia que tomaron al
+        empezar; las siguientes usan el modelo nuevo. Las entradas del cache
+        del modelo anterior se descartan.
+        """
+        self.model = model
+        self.cache.sincronizar_version(model.version_modelo)
+        MODELO_INFO.limpiar()
+        MODELO_INFO.etiquetar(str(model.version_modelo)).establecer(1)
+
+    def instalar_version(self, version: str = None) -> str:
+        """
+        Carga y pone en uso una version del registro
+
+        Args:
+            version: Version a instalar (por defecto la actual del registro)
+
+        Returns:
+            Version instalada
+        """
+        version = version or self.registry.version_actual()
+        self.instalar_modelo(self.cargar_version(version))
+        return version
+
+    def rollback(self, version: str = None) -> str:
+        """
+        Vuelve a una version anterior del registro y la pone en uso
+
+        Args:
+            version: Version destino (por defecto la anterior a la actual)
+
+        Returns:
+            Version activada
+        """
+        version = self.registry.rollback(version)
+        return self.instalar_version(version)
+
+    def modelo_entrenado(self) -> RandomForestModel:
+        """
+        Modelo en uso; si no hay ninguno, lo carga del registro (o de
+        MODEL_PATH) y si tampoco hay uno guardado, entrena uno una sola vez
+
+        Returns:
+            Referencia al modelo que debe usar toda la prediccion
+        """
+        model = self.model
+        if model.is_trained:
+            return model
+
+        with self._lock_entrenamiento:
+            if not self.model.is_trained:
+                guardado = self.cargar_version(self.registry.version_actual())
+                if guardado.is_trained:
+                    self.instalar_modelo(guardado)
+                else:
+                    print("[Info] Modelo no entrenado. Entrenando automticamente...")
+                    nuevo = RandomForestModel()
+                    nuevo.entrenar()
+                    self.instalar_version(self.registry.registrar(nuevo))
+            return self.model
+
+    def calentar(self) -> PredictionResponse:
+        """
+        Prediccion completa de prueba, sin pasar por el cache
 
-        # Intentar cargar modelo existente
-        if not self.model.cargar():
-            print("[Advertencia] Modelo no encontrado. Se entrenar automticamente en la primera prediccin.")
+        Ejercita geolocalizacion, espacio de trabajo y recorrido del bosque
+        (y carga el modelo si hacia falta) para que el primer request no
+        pague esos costos.
+        """
+        request = PredictionRequest(
+            metros=100.0, cuartos=3, banos=2,
+            lat=self.geo_service.CENTRO_SCZ[0], lon=self.geo_service.CENTRO_SCZ[1]
+        )
+        return self._predecir_con(self.modelo_entrenado(), [request])[0]
 
     def predecir_precio(self, request: PredictionRequest) -> PredictionResponse:
         """
         Predice el precio de un inmueble
 
+        Pasa primero por el cache (entradas cuantizadas + version del modelo);
+        solo los misses llegan al modelo.
+
         Args:
             request: Request con datos del inmueble
 
         Returns:
             Response con prediccin
         """
-        # 1. Anlisis de geolocalizacin
-        ubicacion = self.geo_service.analizar_ubicacion(request.lat, request.lon)
-
-        # 2. Preparar features para el modelo
-        features = {
-            'metros': request.metros,
-            'cuartos': request.cuartos,
-            'banos': request.banos,
-            'zona_id': ubicacion['zona_id'],
-            'parking': request.parking,
-            'piscina': request.piscina
-        }
+        return self.predecir_precios_cache([request])[0]
 
-        # 3. Entrenar modelo si no est entrenado
-        if not self.model.is_trained:
-            print("[Info] Modelo no entrenado. Entrenando automticamente...")
-            self.model.entrenar()
-            self.model.guardar()
+    def predecir_precios_cache(self, requests: list[PredictionRequest]) -> list[PredictionResponse]:
+        """
+        Predice N inmuebles resolviendo primero cada uno en el cache
 
-        # 4. Predecir precio
-        prediccion = self.model.predecir(features)
+        Los misses se predicen juntos en una sola pasada del modelo y se
+        guardan en el cache. Es la ruta de los micro-lotes de /predict.
 
-        # 5. Aplicar multiplicador de zona especial si aplica
-        if ubicacion['multiplicador_precio'] != 1.0:
-            mult = ubicacion['multiplicador_precio']
-            prediccion['precio_sugerido'] *= mult
-            prediccion['precio_min'] *= mult
-            prediccion['precio_max'] *= mult
-            prediccion['precio_sugerido'] = round(prediccion['precio_sugerido'], 6)
-            prediccion['precio_min'] = round(prediccion['precio_min'], 6)
-            prediccion['precio_max'] = round(prediccion['precio_max'], 6)
-
-        # 6. Construir response
-        response = PredictionResponse(
-            precio_sugerido=prediccion['precio_sugerido'],
-            precio_min=prediccion['precio_min'],
-            precio_max=prediccion['precio_max'],
-            confianza=prediccion['confianza'],
-            anillo=ubicacion['anillo'],
-            zona_especial=ubicacion['zona_especial']
+        Args:
+            requests: Requests ya validados con datos de cada inmueble
+
+        Returns:
+            Responses con la prediccion, en el mismo orden de entrada
+        """
+        model = self.modelo_entrenado()
+        if not self.cache.activo:
+            return self._predecir_con(model, requests)
+
+        version = model.version_modelo
+        self.cache.sincronizar_version(version)
+        claves = [self.cache.clave(request, version) for request in requests]
+        responses = [self.cache.obtener(clave) for clave in claves]
+
+        faltantes = [i for i, response in enumerate(responses) if response is None]
+        if faltantes:
+            nuevas = self._predecir_con(model, [requests[i] for i in faltantes])
+            for i, response in zip(faltantes, nuevas):
+                responses[i] = response
+                self.cache.guardar(claves[i], response)
+
+        return responses
+
+    def predecir_precios(self, requests: list[PredictionRequest]) -> list[PredictionResponse]:
+        """
+        Predice el precio de N inmuebles con una sola llamada al modelo
+
+        Args:
+            requests: Requests ya validados con datos de cada inmueble
+
+        Returns:
+            Responses con la prediccion, en el mismo orden de entrada
+        """
+        return self._predecir_con(self.modelo_entrenado(), requests)
+
+    def predecir_perfilado(self, request: PredictionRequest, tiempos: dict) -> PredictionResponse:
+        """
+        Prediccion de un request perfilado (X-Profile): sin cache, para que
+        las etapas medidas sean las del modelo
+
+        Args:
+            request: Request con datos del inmueble
+            tiempos: Diccionario donde se guarda la duracion de cada etapa (segundos)
+
+        Returns:
+            Response con la prediccion
+        """
+        return self._predecir_con(self.modelo_entrenado(), [request], tiempos)[0]
+
+    def _predecir_con(self, model: RandomForestModel, requests: list[PredictionRequest],
+                      tiempos: dict = None) -> list[PredictionResponse]:
+        """
+        Prediccion por lotes con un modelo fijo
+
+        Toda la prediccion usa la referencia `model`, aunque mientras tanto
+        se instale otro modelo en el servicio. Con `tiempos` se guarda ahi
+        la duracion de cada etapa.
+        """
+        # Cada etapa registra su duracion en DURACION_ETAPA (GET /metrics)
+        marca = time.perf_counter()
+
+        # 1. Analisis de geolocalizacion (vectorizado para todo el lote)
+        ubicaciones = self.geo_service.analizar_ubicacion_batch(
+            [r.lat for r in requests],
+            [r.lon for r in requests]
         )
+        zona_ids = ubicaciones['zona_id'].tolist()
+        marca = _medir_etapa('geolocalizacion', marca, tiempos)
+
+        n = len(requests)
+
+        # 2. Escribir features directamente en el buffer preasignado del modelo
+        ws = model.espacio_trabajo(n)
+        for i, request in enumerate(requests):
+            model.escribir_fila(ws.X, i, request, zona_ids[i])
+        marca = _medir_etapa('features', marca, tiempos)
+
+        # 3. Predecir precios: media y dispersion de los arboles en una sola pasada por el bosque
+        medias, stds = model.predecir_buffer(ws, n)
+        marca = _medir_etapa('bosque', marca, tiempos)
+
+        # 4. Intervalo de confianza a partir de la dispersion de los arboles
+        intervalos = [model.intervalo_precio(media, std) for media, std in zip(medias.tolist(), stds.tolist())]
+        marca = _medir_etapa('incertidumbre', marca, tiempos)
+
+        # 5. Aplicar multiplicador de zona especial si aplica
+        intervalos = [
+            intervalo if mult == 1.0 else tuple(redondear(valor * mult) for valor in intervalo)
+            for intervalo, mult in zip(intervalos, ubicaciones['multiplicador_precio'].tolist())
+        ]
+        marca = _medir_etapa('multiplicador', marca, tiempos)
+
+        # 6. Construir responses (valores ya validos: sin re-validar)
+        responses = [
+            PredictionResponse.model_construct(
+                precio_sugerido=precio,
+                precio_min=precio_min,
+                precio_max=precio_max,
+                confianza=model.confianza,
+                anillo=float(anillo),
+                zona_especial=zona_especial
+            )
+            for (precio, precio_min, precio_max), anillo, zona_especial in zip(
+                intervalos,
+                ubicaciones['anillo'].tolist(),
+                ubicaciones['zona_especial']
+            )
+        ]
+        _medir_etapa('respuesta', marca, tiempos)
 
-        return response
+        return responses
 
     def get_model_status(self) -> dict:
         """
@@ -81,18 +316,25 @@ class MLPredictionService:
         Returns:
             Diccionario con informacin del modelo
         """
-        model_info = self.model.get_info()
+        model = self.model
+        model_info = model.get_info()
 
         return {
             'service': 'ML Prediction Service',
-            'status': 'operational' if self.model.is_trained else 'requires_training',
+            'status': 'operational' if model.is_trained else 'requires_training',
             'model': model_info,
+            'registry': {
+                'current': self.registry.version_actual(),
+                'versions': len(self.registry.versiones())
+            },
+            'cache': self.cache.estadisticas(),
             'geolocation': {
                 'centro_scz': {
                     'lat': self.geo_service.CENTRO_SCZ[0],
                     'lon': self.geo_service.CENTRO_SCZ[1]
                 },
                 'anillos_por_sector': {sector: len(radios) for sector, radios in self.geo_service.ANILLOS_RADIOS_POR_SECTOR.items()},
+                'bins_rumbo': self.geo_service.BINS_RUMBO,
                 'zonas_especiales': list(self.geo_service.ZONAS_ESPECIALES.keys())
             }
         }
@@ -112,11 +354,14 @@ class MLPredictionService:
         # Generar dataset
         df = DatasetService.generar_dataset_sintetico(n_samples)
 
-        # Entrenar
-        metrics = self.model.entrenar(df)
+        # Entrenar aparte: el modelo en uso sigue sirviendo mientras tanto
+        nuevo = RandomForestModel()
+        metrics = nuevo.entrenar(df)
 
-        # Guardar
-        self.model.guardar()
+        # Registrar como version nueva y ponerla en uso con una asignacion; se
+        # instala desde el registro para servir el mismo artefacto que los
+        # demas procesos
+        version = self.instalar_version(self.registry.registrar(nuevo, metadatos={'n_samples': n_samples}))
 
         # Guardar dataset tambin
         DatasetService.guardar_dataset(df)
@@ -124,5 +369,6 @@ class MLPredictionService:
         return {
             'status': 'success',
             'samples_trained': n_samples,
+            'version': version,
             'metrics': metrics
         }
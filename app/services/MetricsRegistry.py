@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+Metrics Registry - Contadores, histogramas y medidores del servicio
+Se exponen en GET /metrics con el formato de texto de Prometheus
+"""
+import bisect
+import math
+import os
+import threading
+import weakref
+
+# Limites de los histogramas de latencia (segundos)
+BUCKETS_LATENCIA = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+# Limites para duraciones largas: carga del modelo y entrenamientos (segundos)
+BUCKETS_LARGOS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+def _formatear(valor: float) -> str:
+    if valor == math.inf:
+        return '+Inf'
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class _DuenoCelda:
+    """Lo que cada thread guarda en su threading.local; se libera cuando el thread termina"""
+
+    __slots__ = ('__weakref__',)
+
+
+class _PorThread:
+    """
+    Celdas de acumulacion, una por thread
+
+    Cada thread suma solo en su propia celda (una lista), asi registrar no
+    toma ningun lock: el lock solo se usa la primera vez que un thread
+    registra. Al exponer se suman las celdas de todos los threads.
+
+    Los threads de los pools terminan y se reemplazan: cuando un thread
+    termina se libera su _DuenoCelda y un weakref.finalize suma la celda a
+    la base y la descarta, asi las celdas no crecen sin limite.
+    """
+
+    def __init__(self, tamano: int):
+        self._tamano = tamano
+        self._local = threading.local()
+        self._base = [0] * tamano
+        self._celdas = {}
+        # Reentrante: el finalize puede correr en el thread que ya tiene el lock
+        self._lock = threading.RLock()
+
+    def celda(self) -> list:
+        celda = getattr(self._local, 'celda', None)
+        if celda is None:
+            celda = self._local.celda = [0] * self._tamano
+            dueno = self._local.dueno = _DuenoCelda()
+            with self._lock:
+                self._celdas[id(celda)] = celda
+            weakref.finalize(dueno, self._plegar, celda).atexit = False
+        return celda
+
+    def _plegar(self, celda: list):
+        """Suma la celda de un thread terminado a la base y la descarta"""
+        with self._lock:
+            # Lista nueva: un total() en curso conserva la base que copio
+            self._base = [base + valor for base, valor in zip(self._base, celda)]
+            del self._celdas[id(celda)]
+
+    def total(self) -> list:
+        with self._lock:
+            celdas = [self._base, *self._celdas.values()]
+        return [sum(valores) for valores in zip(*celdas)]
+
+
+class _Metrica:
+    """Base: nombre, ayuda y una serie por combinacion de valores de etiquetas"""
+
+    tipo = ''
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._series = {}
+        self._lock = threading.Lock()
+        if not self.etiquetas:
+            self._series[()] = self._crear_serie()
+
+    def etiquetar(self, *valores: str):
+        """
+        Serie para unos valores de etiquetas (str, en el orden de `etiquetas`)
+
+        Raises:
+            ValueError: Si no se pasa un valor por etiqueta
+        """
+        serie = self._series.get(valores)
+        if serie is None:
+            if len(valores) != len(self.etiquetas):
+                raise ValueError(f"{self.nombre} espera las etiquetas {self.etiquetas}")
+            with self._lock:
+                serie = self._series.get(valores)
+                if serie is None:
+                    serie = self._series[valores] = self._crear_serie()
+        return serie
+
+    def limpiar(self):
+        """Descarta todas las series (las etiquetas que ya no aplican)"""
+        with self._lock:
+            self._series = {(): self._crear_serie()} if not self.etiquetas else {}
+
+    def _crear_serie(self):
+        raise NotImplementedError
+
+    def _lineas_serie(self, etiquetas: str, serie) -> list[str]:
+        raise NotImplementedError
+
+    def exponer(self) -> list[str]:
+        with self._lock:
+            series = sorted(self._series.items())
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        for valores, serie in series:
+            etiquetas = ','.join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(self.etiquetas, valores))
+            lineas.extend(self._lineas_serie(etiquetas, serie))
+        return lineas
+
+
+class _SerieContador:
+    __slots__ = ('_celdas',)
+
+    def __init__(self):
+        self._celdas = _PorThread(1)
+
+    def incrementar(self, cantidad: float = 1):
+        self._celdas.celda()[0] += cantidad
+
+    @property
+    def valor(self) -> float:
+        return self._celdas.total()[0]
+
+
+class Contador(_Metrica):
+    """Valor que solo crece (requests atendidos, errores...)"""
+
+    tipo = 'counter'
+
+    def _crear_serie(self):
+        return _SerieContador()
+
+    def incrementar(self, cantidad: float = 1):
+        """Incrementa la serie sin etiquetas"""
+        self._series[()].incrementar(cantidad)
+
+    def _lineas_serie(self, etiquetas, serie):
+        return [f"{self.nombre}{{{etiquetas}}} {_formatear(serie.valor)}" if etiquetas
+                else f"{self.nombre} {_formatear(serie.valor)}"]
+
+
+class _SerieHistograma:
+    __slots__ = ('_limites', '_celdas')
+
+    def __init__(self, limites: tuple):
+        self._limites = limites
+        # Una cuenta por bucket (el ultimo es +Inf) y la suma de los valores
+        self._celdas = _PorThread(len(limites) + 2)
+
+    def observar(self, valor: float):
+        celda = self._celdas.celda()
+        celda[bisect.bisect_left(self._limites, valor)] += 1
+        celda[-1] += valor
+
+    def cuentas(self) -> tuple[list, float]:
+        """Cuentas acumuladas por limite (incluido +Inf) y suma de los valores"""
+        total = self._celdas.total()
+        acumuladas, cuenta = [], 0
+        for valor in total[:-1]:
+            cuenta += valor
+            acumuladas.append(cuenta)
+        return acumuladas, total[-1]
+
+
+class Histograma(_Metrica):
+    """Distribucion de una medida (latencias, duraciones) en buckets fijos"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = (), buckets: tuple = BUCKETS_LATENCIA):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(nombre, ayuda, etiquetas)
+
+    def _crear_serie(self):
+        return _SerieHistograma(self.buckets)
+
+    def observar(self, valor: float):
+        """Registra un valor en la serie sin etiquetas"""
+        self._series[()].observar(valor)
+
+    def _lineas_serie(self, etiquetas, serie):
+        acumuladas, suma = serie.cuentas()
+        previas = etiquetas + ',' if etiquetas else ''
+        lineas = [
+            f'{self.nombre}_bucket{{{previas}le="{_formatear(limite)}"}} {cuenta}'
+            for limite, cuenta in zip(self.buckets + (math.inf,), acumuladas)
+        ]
+        sufijo = f"{{{etiquetas}}}" if etiquetas else ''
+        lineas.append(f"{self.nombre}_sum{sufijo} {_formatear(suma)}")
+        lineas.append(f"{self.nombre}_count{sufijo} {acumuladas[-1]}")
+        return lineas
+
+
+class _SerieMedidor:
+    __slots__ = ('valor',)
+
+    def __init__(self):
+        self.valor = 0
+
+    def establecer(self, valor: float):
+        self.valor = valor
+
+
+class Medidor(_Metrica):
+    """Valor que sube y baja (version en uso, elementos en cola...)"""
+
+    tipo = 'gauge'
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = (), funcion=None):
+        """
+        Args:
+            funcion: Sin etiquetas, calcula el valor al exponer en vez de usar establecer()
+        """
+        self.funcion = funcion
+        super().__init__(nombre, ayuda, etiquetas)
+
+    def _crear_serie(self):
+        return _SerieMedidor()
+
+    def establecer(self, valor: float):
+        """Fija el valor de la serie sin etiquetas"""
+        self._series[()].establecer(valor)
+
+    def _lineas_serie(self, etiquetas, serie):
+        if etiquetas:
+            return [f"{self.nombre}{{{etiquetas}}} {_formatear(serie.valor)}"]
+        return [f"{self.nombre} {_formatear(self.funcion() if self.funcion else serie.valor)}"]
+
+
+class MetricsRegistry:
+    """
+    Metricas del proceso
+
+    Registrar un valor es sumar en una lista propia del thread (ver
+    _PorThread): sin locks ni asignaciones en la ruta caliente. Las metricas
+    son del proceso: con varios workers (SERVER_WORKERS > 1) cada /metrics
+    muestra las del worker que lo atendio, identificado por process_pid.
+    """
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica: _Metrica) -> _Metrica:
+        with self._lock:
+            if metrica.nombre in self._metricas:
+                raise ValueError(f"Metrica ya registrada: {metrica.nombre}")
+            self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: tuple = ()) -> Contador:
+        return self._registrar(Contador(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: tuple = (),
+                   buckets: tuple = BUCKETS_LATENCIA) -> Histograma:
+        return self._registrar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: tuple = (), funcion=None) -> Medidor:
+        return self._registrar(Medidor(nombre, ayuda, etiquetas, funcion))
+
+    def exponer(self) -> str:
+        """Todas las metricas en el formato de texto de Prometheus (version 0.0.4)"""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        lineas = []
+        for metrica in metricas:
+            lineas.extend(metrica.exponer())
+        return '\n'.join(lineas) + '\n'
+
+
+# Singleton del proceso y metricas del servicio
+metricas = MetricsRegistry()
+
+DURACION_ETAPA = metricas.histograma(
+    'ml_prediction_stage_seconds',
+    'Duracion de cada etapa de la prediccion, por llamada al modelo (un lote)',
+    ('stage',)
+)
+REQUESTS = metricas.contador(
+    'http_requests_total',
+    'Requests HTTP atendidos, por ruta y codigo de estado',
+    ('method', 'route', 'status')
+)
+DURACION_REQUEST = metricas.histograma(
+    'http_request_duration_seconds',
+    'Duracion de los requests HTTP hasta enviar la respuesta',
+    ('method', 'route')
+)
+DURACION_ENTRENAMIENTO = metricas.histograma(
+    'ml_training_duration_seconds',
+    'Duracion de los jobs de entrenamiento, por origen de los datos y estado final',
+    ('source', 'status'),
+    buckets=BUCKETS_LARGOS
+)
+CARGA_MODELO = metricas.histograma(
+    'ml_model_load_seconds',
+    'Duracion de la carga de una version del modelo, por formato del artefacto',
+    ('format',),
+    buckets=BUCKETS_LARGOS
+)
+MODELO_INFO = metricas.medidor(
+    'ml_model_info',
+    'Version del modelo en uso (siempre 1)',
+    ('version',)
+)
+PID = metricas.medidor('process_pid', 'PID del proceso que expone las metricas', funcion=os.getpid)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Micro Batcher - Agrupa los /predict concurrentes en un solo lote del modelo
+Ventana de espera configurable, despacho inmediato si hay workers libres
+"""
+import asyncio
+import time
+import weakref
+from collections import Counter, deque
+import numpy as np
+
+
+class _ColaLoop:
+    """Cola, timer y lotes en vuelo de un event loop"""
+
+    def __init__(self):
+        self.cola = []
+        self.timer = None
+        self.tareas = set()
+        self.en_vuelo = 0
+
+
+class MicroBatcher:
+    """
+    Planificador de micro-lotes para predicciones individuales
+
+    Cada llamada a `predecir` encola el request y espera su future. La cola
+    se despacha como un lote (predecir_precios_cache en el InferenceExecutor)
+    cuando:
+        - hay un worker libre (menos lotes en vuelo que workers): sin carga
+          no se agrega latencia,
+        - la cola llega a `max_lote`, o
+        - vence la ventana de `ventana_ms` desde el primer request encolado.
+
+    Al terminar un lote se despacha lo que se haya acumulado mientras tanto,
+    de modo que bajo carga el tamano de lote crece solo. Cada event loop
+    tiene su propia cola (los futures solo se resuelven desde su loop); todo
+    corre dentro del loop, sin locks.
+    """
+
+    # Limites superiores de los buckets del histograma de tamano de lote
+    BUCKETS_LOTE = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+    # Esperas recientes que se guardan para los percentiles
+    MUESTRAS_ESPERA = 10000
+
+    def __init__(self, executor, ventana_ms: float, max_lote: int):
+        """
+        Args:
+            executor: InferenceExecutor donde corren los lotes
+            ventana_ms: Espera maxima del primer request de la cola
+            max_lote: Tamano con el que la cola se despacha sin esperar
+        """
+        self.executor = executor
+        self.ventana_ms = ventana_ms
+        self.max_lote = max_lote
+        self.max_en_vuelo = executor.workers if executor.modo != 'inline' else 1
+
+        self._colas = weakref.WeakKeyDictionary()
+
+        self.lotes = 0
+        self.requests = 0
+        self.histograma_lote = Counter()
+        self.esperas_ms = deque(maxlen=self.MUESTRAS_ESPERA)
+        self.espera_max_ms = 0.0
+
+    async def predecir(self, request):
+        """
+        Predice un inmueble dentro del proximo micro-lote
+
+        Args:
+            request: PredictionRequest ya validado
+
+        Returns:
+            PredictionResponse del request
+
+        Raises:
+            Las mismas excepciones que InferenceExecutor.ejecutar, para todos
+            los requests del lote
+        """
+        loop = asyncio.get_running_loop()
+        estado = self._colas.get(loop)
+        if estado is None:
+            estado = self._colas[loop] = _ColaLoop()
+
+        future = loop.create_future()
+        estado.cola.append((request, future, time.perf_counter()))
+
+        if len(estado.cola) >= self.max_lote or estado.en_vuelo < self.max_en_vuelo:
+            self._despachar(estado)
+        elif estado.timer is None:
+            estado.timer = loop.call_later(self.ventana_ms / 1000, self._despachar, estado)
+
+        return await future
+
+    def _despachar(self, estado: _ColaLoop):
+        """Saca hasta max_lote requests de la cola y los lanza como un lote"""
+        if estado.timer is not None:
+            estado.timer.cancel()
+            estado.timer = None
+
+        lote, estado.cola = estado.cola[:self.max_lote], estado.cola[self.max_lote:]
+        if not lote:
+            return
+
+        ahora = time.perf_counter()
+        for _, _, encolado in lote:
+            espera = (ahora - encolado) * 1000
+            self.esperas_ms.append(espera)
+            self.espera_max_ms = max(self.espera_max_ms, espera)
+        self.lotes += 1
+        self.requests += len(lote)
+        self.histograma_lote[next((b for b in self.BUCKETS_LOTE if len(lote) <= b), 'inf')] += 1
+
+        estado.en_vuelo += 1
+        tarea = asyncio.ensure_future(self._ejecutar_lote(estado, lote))
+        estado.tareas.add(tarea)
+        tarea.add_done_callback(estado.tareas.discard)
+
+        # Lo que sobro de la cola espera su propia ventana
+        if estado.cola:
+            estado.timer = asyncio.get_running_loop().call_later(
+                self.ventana_ms / 1000, self._despachar, estado
+            )
+
+    async def _ejecutar_lote(self, estado: _ColaLoop, lote: list):
+        """Corre el lote en el executor y resuelve el future de cada request"""
+        try:
+            responses = await self.executor.ejecutar(
+                'predecir_precios_cache', [request for request, _, _ in lote]
+            )
+        except Exception as e:
+            for _, future, _ in lote:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            estado.en_vuelo -= 1
+            # Un worker quedo libre: despachar lo acumulado sin esperar la ventana
+            if estado.cola:
+                self._despachar(estado)
+
+        for (_, future, _), response in zip(lote, responses):
+            # El llamador pudo haber cancelado (timeout o desconexion)
+            if not future.done():
+                future.set_result(response)
+
+    def estadisticas(self) -> dict:
+        """
+        Distribucion de tamanos de lote y espera en cola para /status
+
+        Returns:
+            Diccionario con configuracion, histograma y percentiles de espera
+        """
+        esperas = np.fromiter(self.esperas_ms, dtype=np.float64)
+        p50, p99 = np.percentile(esperas, [50, 99]) if len(esperas) else (0.0, 0.0)
+
+        return {
+            'window_ms': self.ventana_ms,
+            'max_batch_size': self.max_lote,
+            'batches': self.lotes,
+            'requests': self.requests,
+            'mean_batch_size': round(self.requests / self.lotes, 2) if self.lotes else 0.0,
+            'batch_size_histogram': {
+                f"<={bucket}": self.histograma_lote[bucket] for bucket in self.BUCKETS_LOTE
+            } | {f">{self.BUCKETS_LOTE[-1]}": self.histograma_lote['inf']},
+            'queue_delay_ms': {
+                'p50': round(float(p50), 3),
+                'p99': round(float(p99), 3),
+                'max': round(self.espera_max_ms, 3)
+            },
+            'in_flight': sum(estado.en_vuelo for estado in list(self._colas.values())),
+            'queued': sum(len(estado.cola) for estado in list(self._colas.values()))
+        }
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Prediction Cache - Cache LRU con TTL para predicciones individuales
+Las claves usan entradas cuantizadas y la version del modelo
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Cache LRU acotado por tamano con expiracion por TTL
+
+    Guarda las respuestas de predecir_precio bajo una clave
+    (metros, cuartos, banos, parking, piscina, lat, lon, version_modelo) con
+    lat/lon redondeadas a `decimales`: dos puntos dentro de la misma celda
+    de cuantizacion comparten prediccion (5 decimales ~ 1.1 m).
+
+    Cuando se instala un modelo nuevo su version cambia: las claves viejas
+    dejan de coincidir y `sincronizar_version` vacia el cache para liberar
+    memoria. Es thread-safe (un lock protege el dict y los contadores).
+    """
+
+    def __init__(self, max_size: int, ttl_segundos: float, decimales: int):
+        """
+        Args:
+            max_size: Maximo de entradas (0 desactiva el cache)
+            ttl_segundos: Vida de cada entrada en segundos (0 = sin expiracion)
+            decimales: Decimales de lat/lon en la clave
+        """
+        self.max_size = max_size
+        self.ttl_segundos = ttl_segundos
+        self.decimales = decimales
+
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expiradas = 0
+        self.invalidaciones = 0
+
+    @property
+    def activo(self) -> bool:
+        return self.max_size > 0
+
+    def clave(self, request, version_modelo) -> tuple:
+        """
+        Clave de cache de un request ya validado
+
+        Args:
+            request: PredictionRequest
+            version_modelo: Version del modelo que haria la prediccion
+
+        Returns:
+            Tupla hashable con las entradas cuantizadas
+        """
+        return (
+            request.metros,
+            request.cuartos,
+            request.banos,
+            request.parking,
+            request.piscina,
+            round(request.lat, self.decimales),
+            round(request.lon, self.decimales),
+            version_modelo
+        )
+
+    def obtener(self, clave: tuple):
+        """
+        Valor guardado bajo la clave, o None si no esta o ya expiro
+
+        Un hit mueve la entrada al final (la mas recientemente usada).
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.misses += 1
+                return None
+
+            valor, expira = entrada
+            if expira is not None and time.monotonic() >= expira:
+                del self._entradas[clave]
+                self.expiradas += 1
+                self.misses += 1
+                return None
+
+            self._entradas.move_to_end(clave)
+            self.hits += 1
+            return valor
+
+    def guardar(self, clave: tuple, valor):
+        """Guarda un valor y desaloja las entradas menos usadas si se pasa de max_size"""
+        if not self.activo:
+            return
+
+        expira = time.monotonic() + self.ttl_segundos if self.ttl_segundos > 0 else None
+        with self._lock:
+            self._entradas[clave] = (valor, expira)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_size:
+                self._entradas.popitem(last=False)
+                self.evictions += 1
+
+    def sincronizar_version(self, version_modelo):
+        """Vacia el cache si el modelo instalado cambio desde la ultima consulta"""
+        if version_modelo != self._version:
+            with self._lock:
+                if version_modelo != self._version:
+                    if self._entradas:
+                        self.invalidaciones += 1
+                    self._entradas.clear()
+                    self._version = version_modelo
+
+    def invalidar(self):
+        """Descarta todas las entradas"""
+        with self._lock:
+            if self._entradas:
+                self.invalidaciones += 1
+            self._entradas.clear()
+
+    def estadisticas(self) -> dict:
+        """
+        Contadores del cache para /status
+
+        Returns:
+            Diccionario con configuracion, tamano y contadores
+        """
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'enabled': self.activo,
+                'size': len(self._entradas),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_segundos,
+                'lat_lon_decimals': self.decimales,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / consultas, 4) if consultas else 0.0,
+                'evictions': self.evictions,
+                'expired': self.expiradas,
+                'invalidations': self.invalidaciones,
+                'model_version': self._version
+            }
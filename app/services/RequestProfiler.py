@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Request Profiler - Perfil de un request puntual (header X-Profile: 1)
+Tiempos por etapa para el header Server-Timing y cProfile guardado en disco
+"""
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from app.config.settings import settings
+
+
+class PerfilRequest:
+    """
+    Tiempos y perfil de un request con X-Profile: 1
+
+    ProfilingMiddleware lo crea al llegar el request y lo deja en
+    `request.state.perfil`; el controller marca las etapas y corre la
+    prediccion con `perfilar`, y el middleware agrega el header
+    Server-Timing al enviar la respuesta.
+    """
+
+    # Lineas del resumen de texto que acompana al .prof
+    LINEAS_RESUMEN = 40
+
+    _lock_directorio = threading.Lock()
+
+    def __init__(self, directorio: str | Path = None):
+        """
+        Args:
+            directorio: Donde se guardan los perfiles (por defecto PROFILES_DIR)
+        """
+        self.directorio = settings.get_full_path(directorio or settings.PROFILES_DIR)
+        # Ordenable por fecha (los mas viejos se descartan primero) y unico entre workers
+        self.id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}"
+        self.tiempos = {}
+        self.archivo = None
+        self.inicio = self._ultima = time.perf_counter()
+
+    def marcar(self, etapa: str = None):
+        """
+        Cierra una etapa: su duracion es el tiempo desde la marca anterior
+
+        Args:
+            etapa: Nombre de la etapa (None: solo mueve la marca, sin registrar)
+        """
+        ahora = time.perf_counter()
+        if etapa is not None:
+            self.tiempos[etapa] = ahora - self._ultima
+        self._ultima = ahora
+
+    def perfilar(self, fn, *args):
+        """
+        Ejecuta fn(*args) bajo cProfile y guarda el perfil
+
+        cProfile solo ve el thread donde corre: hay que llamarlo desde el
+        thread que hace el trabajo.
+
+        Returns:
+            Lo que devuelve fn
+        """
+        perfilador = cProfile.Profile()
+        try:
+            return perfilador.runcall(fn, *args)
+        finally:
+            self.guardar(perfilador)
+
+    def guardar(self, perfilador: cProfile.Profile) -> Path:
+        """
+        Guarda <id>.prof (para pstats / snakeviz) y <id>.txt (resumen por
+        tiempo acumulado) y descarta los mas viejos por encima de PROFILES_MAX_FILES
+        """
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self.archivo = self.directorio / f"{self.id}.prof"
+        perfilador.dump_stats(self.archivo)
+
+        resumen = io.StringIO()
+        pstats.Stats(perfilador, stream=resumen).sort_stats('cumulative').print_stats(self.LINEAS_RESUMEN)
+        self.archivo.with_suffix('.txt').write_text(resumen.getvalue(), encoding='utf-8')
+
+        self._recortar()
+        return self.archivo
+
+    def server_timing(self) -> str:
+        """Valor del header Server-Timing: cada etapa y el total, en milisegundos"""
+        tiempos = {**self.tiempos, 'total': time.perf_counter() - self.inicio}
+        return ', '.join(f"{etapa};dur={segundos * 1e3:.3f}" for etapa, segundos in tiempos.items())
+
+    def _recortar(self):
+        with self._lock_directorio:
+            perfiles = sorted(self.directorio.glob('*.prof'))
+            for viejo in perfiles[:max(0, len(perfiles) - settings.PROFILES_MAX_FILES)]:
+                viejo.unlink(missing_ok=True)
+                viejo.with_suffix('.txt').unlink(missing_ok=True)
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Training Job Service - Entrenamiento en segundo plano
+Cada job corre en un proceso aparte y reporta etapas, tiempos y metricas
+"""
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from app.services.MetricsRegistry import DURACION_ENTRENAMIENTO
+
+
+class EntrenamientoEnCursoError(RuntimeError):
+    """Ya hay un job de entrenamiento corriendo y la politica es rechazar"""
+
+
+def _ahora_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def entrenar_en_proceso(n_samples: int, eventos, observaciones: tuple = None):
+    """
+    Entrena y guarda un modelo nuevo; corre en el proceso del job
+
+    Genera el dataset, entrena, registra el modelo como version nueva del
+    registro (y la activa) y guarda el dataset en DATASET_PATH, avisando por
+    `eventos` el inicio y la duracion de cada etapa.
+
+    Con `observaciones` entrena con las observaciones reales en vez de un
+    dataset sintetico: compacta el log en su dataset columnar y entrena por
+    bloques sobre ese dataset.
+
+    Args:
+        n_samples: Numero de muestras sinteticas
+        eventos: multiprocessing.Queue donde se publican los eventos
+        observaciones: (directorio del log, dataset .cols) de ObservationLog
+    """
+    try:
+        from app.models.ModelRegistry import ModelRegistry
+        from app.models.RandomForestModel import RandomForestModel
+        from app.services.DatasetService import DatasetService
+
+        def etapa(nombre, funcion, *args):
+            eventos.put(('etapa', nombre))
+            inicio = time.perf_counter()
+            resultado = funcion(*args)
+            eventos.put(('duracion', nombre, round(time.perf_counter() - inicio, 3)))
+            return resultado
+
+        model = RandomForestModel()
+        registry = ModelRegistry()
+
+        if observaciones is not None:
+            from app.models.ObservationLog import ObservationLog
+
+            log = ObservationLog(*observaciones)
+            resumen = etapa('compactar', log.compactar)
+            if resumen['compacted'] == 0:
+                raise ValueError("No hay observaciones nuevas para entrenar")
+            etapa('entrenar', model.entrenar_por_bloques, str(log.dataset))
+            version = etapa('guardar_modelo', registry.registrar, model, True, {
+                'n_samples': resumen['rows'], 'dataset': 'observations'
+            })
+            eventos.put(('resultado', version, registry.info(version)['metrics']))
+            return
+
+        df = etapa('generar_dataset', DatasetService.generar_dataset_sintetico, n_samples)
+        etapa('entrenar', model.entrenar, df)
+        version = etapa('guardar_modelo', registry.registrar, model, True, {'n_samples': n_samples})
+        etapa('guardar_dataset', DatasetService.guardar_dataset, df)
+
+        eventos.put(('resultado', version, registry.info(version)['metrics']))
+    except Exception as e:
+        eventos.put(('error', f"{type(e).__name__}: {e}"))
+
+
+class TrainingJobService:
+    """
+    Cola de jobs de entrenamiento ejecutados en procesos aparte
+
+    POST /train crea un job y responde enseguida; un thread monitor arranca
+    el proceso (contexto 'spawn', sin heredar los threads del servidor), lee
+    sus eventos y actualiza el estado del job. Al completarse se llama a
+    `al_completar(version)` para instalar la version registrada en el
+    proceso que sirve.
+
+    Si llega un job mientras otro corre, segun `politica`:
+        - 'reject': lanza EntrenamientoEnCursoError
+        - 'queue': lo deja en cola (hasta `max_en_cola`) y corre despues
+    """
+
+    POLITICAS = ('reject', 'queue')
+
+    # Jobs terminados que se conservan para GET /train/{job_id}
+    MAX_HISTORIAL = 100
+
+    def __init__(self, al_completar=None, politica: str = 'reject', max_en_cola: int = 4):
+        """
+        Args:
+            al_completar: Funcion llamada con la version nueva tras un job exitoso
+            politica: 'reject' o 'queue'
+            max_en_cola: Maximo de jobs esperando con la politica 'queue'
+        """
+        if politica not in self.POLITICAS:
+            raise ValueError(f"Politica de entrenamiento desconocida: {politica} (usar uno de {self.POLITICAS})")
+
+        self.al_completar = al_completar
+        self.politica = politica
+        self.max_en_cola = max_en_cola
+
+        self._jobs = {}
+        # job_id -> argumentos de entrenar_en_proceso (fuera del estado publico)
+        self._argumentos = {}
+        self._pendientes = []
+        self._activo = None
+        self._lock = threading.Lock()
+        self._contexto = multiprocessing.get_context('spawn')
+
+    def crear(self, n_samples: int = None, observaciones: tuple = None) -> dict:
+        """
+        Crea un job de entrenamiento y lo arranca (o encola)
+
+        Args:
+            n_samples: Numero de muestras sinteticas
+            observaciones: (directorio del log, dataset .cols) para entrenar
+                con las observaciones reales en vez de datos sinteticos
+
+        Returns:
+            Copia del estado inicial del job
+
+        Raises:
+            EntrenamientoEnCursoError: Si no se puede aceptar otro job
+        """
+        job = {
+            'job_id': uuid.uuid4().hex[:12],
+            'status': 'queued',
+            'n_samples': n_samples,
+            'source': 'observations' if observaciones is not None else 'synthetic',
+            'created_at': _ahora_iso(),
+            'started_at': None,
+            'finished_at': None,
+            'stage': None,
+            'stage_seconds': {},
+            'version': None,
+            'metrics': None,
+            'error': None
+        }
+
+        with self._lock:
+            if self._activo is not None:
+                if self.politica == 'reject':
+                    raise EntrenamientoEnCursoError(
+                        f"Ya hay un entrenamiento en curso (job {self._activo})"
+                    )
+                if len(self._pendientes) >= self.max_en_cola:
+                    raise EntrenamientoEnCursoError(
+                        f"Hay {len(self._pendientes)} entrenamientos en cola (maximo {self.max_en_cola})"
+                    )
+
+            self._jobs[job['job_id']] = job
+            self._argumentos[job['job_id']] = (n_samples, observaciones)
+            self._recortar_historial()
+
+            if self._activo is None:
+                self._iniciar(job)
+            else:
+                self._pendientes.append(job)
+
+            return self._copia(job)
+
+    def obtener(self, job_id: str) -> dict | None:
+        """Copia del estado de un job, o None si no existe"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._copia(job) if job else None
+
+    def esperar(self, job_id: str, timeout: float = None) -> dict | None:
+        """Espera a que el job termine (util en scripts y tests)"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.obtener(job_id)
+            if job is None or job['status'] in ('completed', 'failed'):
+                return job
+            if limite is not None and time.monotonic() >= limite:
+                return job
+            time.sleep(0.05)
+
+    def _iniciar(self, job: dict):
+        """Marca el job como activo y lanza su thread monitor (con el lock tomado)"""
+        self._activo = job['job_id']
+        job['status'] = 'running'
+        job['started_at'] = _ahora_iso()
+        threading.Thread(
+            target=self._monitorear, args=(job,), name=f"entrenamiento-{job['job_id']}", daemon=True
+        ).start()
+
+    def _monitorear(self, job: dict):
+        """Corre el proceso del job y vuelca sus eventos en el estado"""
+        eventos = self._contexto.Queue()
+        with self._lock:
+            n_samples, observaciones = self._argumentos.pop(job['job_id'])
+        proceso = self._contexto.Process(
+            target=entrenar_en_proceso, args=(n_samples, eventos, observaciones), daemon=True
+        )
+        inicio = time.perf_counter()
+        proceso.start()
+
+        version, resultado, error = None, None, None
+        while resultado is None and error is None:
+            vivo = proceso.is_alive()
+            try:
+                evento = eventos.get(timeout=0.5)
+            except queue.Empty:
+                # Si ya habia terminado antes del get, no queda nada por leer
+                if not vivo:
+                    error = f"El proceso de entrenamiento termino con codigo {proceso.exitcode}"
+                continue
+
+            with self._lock:
+                if evento[0] == 'etapa':
+                    job['stage'] = evento[1]
+                elif evento[0] == 'duracion':
+                    job['stage_seconds'][evento[1]] = evento[2]
+            if evento[0] == 'resultado':
+                version, resultado = evento[1], evento[2]
+            elif evento[0] == 'error':
+                error = evento[1]
+
+        proceso.join()
+
+        # Instalar el modelo antes de publicar el job como completado
+        if error is None and self.al_completar is not None:
+            try:
+                inicio_carga = time.perf_counter()
+                self.al_completar(version)
+                with self._lock:
+                    job['stage_seconds']['cargar_modelo'] = round(time.perf_counter() - inicio_carga, 3)
+            except Exception as e:
+                error = f"Modelo entrenado pero no se pudo cargar: {type(e).__name__}: {e}"
+
+        with self._lock:
+            job['stage'] = None
+            job['stage_seconds']['total'] = round(time.perf_counter() - inicio, 3)
+            job['finished_at'] = _ahora_iso()
+            job['version'] = version
+            job['metrics'] = resultado
+            job['error'] = error
+            job['status'] = 'failed' if error else 'completed'
+            DURACION_ENTRENAMIENTO.etiquetar(job['source'], job['status']).observar(job['stage_seconds']['total'])
+
+            self._activo = None
+            if self._pendientes:
+                self._iniciar(self._pendientes.pop(0))
+
+    def _recortar_historial(self):
+        """Descarta los jobs terminados mas viejos (con el lock tomado)"""
+        terminados = [
+            job_id for job_id, job in self._jobs.items() if job['status'] in ('completed', 'failed')
+        ]
+        for job_id in terminados[:max(0, len(self._jobs) - self.MAX_HISTORIAL)]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _copia(job: dict) -> dict:
+        return dict(job, stage_seconds=dict(job['stage_seconds']))
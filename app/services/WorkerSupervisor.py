@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Worker Supervisor - Servidor pre-fork con varios workers uvicorn
+El proceso padre carga el modelo una sola vez y hace fork de los workers,
+que lo heredan; reinicia los que se caen y los renueva cuando se publica
+otra version en el registro
+"""
+import gc
+import os
+import select
+import signal
+import socket
+import time
+import traceback
+import uvicorn
+
+
+class _ServidorWorker(uvicorn.Server):
+    """uvicorn.Server que avisa por un pipe cuando ya acepta conexiones"""
+
+    def __init__(self, config: uvicorn.Config, aviso: int):
+        super().__init__(config)
+        self.aviso = aviso
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            os.write(self.aviso, b'1')
+        os.close(self.aviso)
+
+
+class WorkerSupervisor:
+    """
+    Supervisor de workers uvicorn pre-fork (solo POSIX)
+
+    El padre abre el socket, deja el modelo cargado (lo entrena si no hay
+    ninguno) y hace fork de `workers` procesos que sirven la app sobre ese
+    mismo socket. Los workers heredan el servicio ya construido: no cargan
+    nada al arrancar, y los arrays del bosque (mapeados del .forest, o en
+    memoria del padre si no hay .forest) son las mismas paginas fisicas en
+    todos. Antes de cada fork se congela el GC (gc.freeze) para que los
+    workers no escriban, y asi copien, los objetos heredados.
+
+    El padre solo supervisa:
+        - Un worker que termina sin que se lo pida se reemplaza por otro.
+        - Cuando `current` del registro apunta a otra version (un /train o
+          un rollback en cualquier worker, o un registro externo), el padre
+          la carga y renueva los workers de a uno: hace fork del nuevo,
+          espera a que acepte conexiones y recien entonces pide al viejo
+          que termine (SIGTERM: uvicorn deja de aceptar y completa los
+          requests en curso). SIGHUP fuerza la misma renovacion.
+        - SIGTERM/SIGINT apagan todos los workers con el mismo mecanismo.
+    """
+
+    # Espera minima antes de reemplazar un worker que murio al arrancar
+    ESPERA_REINICIO = 1.0
+    # Tope para que un worker nuevo empiece a aceptar conexiones
+    TIMEOUT_ARRANQUE = 60.0
+
+    def __init__(
+        self,
+        app,
+        ml_service,
+        workers: int,
+        host: str,
+        port: int,
+        intervalo_version: float = 2.0,
+        timeout_apagado: float = 30.0
+    ):
+        """
+        Args:
+            app: Aplicacion ASGI (la de server.py)
+            ml_service: MLPredictionService que usa la app (el que heredan los workers)
+            workers: Procesos uvicorn
+            host: Interfaz de escucha
+            port: Puerto de escucha
+            intervalo_version: Segundos entre consultas del puntero `current`
+            timeout_apagado: Segundos de gracia para los requests en curso
+                de un worker que se retira (despues, SIGKILL)
+        """
+        self.app = app
+        self.ml_service = ml_service
+        self.n_workers = workers
+        self.host = host
+        self.port = port
+        self.intervalo_version = intervalo_version
+        self.timeout_apagado = timeout_apagado
+
+        self.socket = None
+        self.version = None
+        # pid -> instante de arranque de los workers activos
+        self.workers = {}
+        # pid -> instante limite de los workers que se estan retirando
+        self.retirados = {}
+        self._detener = False
+        self._renovar = False
+
+    def ejecutar(self):
+        """
+        Arranca los workers y los supervisa hasta recibir SIGTERM o SIGINT
+
+        Raises:
+            RuntimeError: Si la plataforma no tiene os.fork
+        """
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("El modo pre-fork necesita os.fork (Linux/macOS)")
+
+        self.socket = socket.create_server((self.host, self.port), backlog=2048)
+        self._preparar()
+
+        signal.signal(signal.SIGTERM, self._pedir_detener)
+        signal.signal(signal.SIGINT, self._pedir_detener)
+        signal.signal(signal.SIGHUP, self._pedir_renovar)
+
+        for _ in range(self.n_workers):
+            self._lanzar()
+        print(f"[OK] {self.n_workers} workers en http://{self.host}:{self.port} (version {self.version})")
+
+        proxima_consulta = time.monotonic() + self.intervalo_version
+        try:
+            while not self._detener:
+                self._recoger()
+                if time.monotonic() >= proxima_consulta:
+                    proxima_consulta = time.monotonic() + self.intervalo_version
+                    version = self.ml_service.registry.version_actual()
+                    if version != self.version:
+                        self._cambiar_version(version)
+                if self._renovar:
+                    self._renovar = False
+                    self._renovar_workers()
+                time.sleep(0.1)
+        finally:
+            self._apagar()
+
+    def _pedir_detener(self, *_):
+        self._detener = True
+
+    def _pedir_renovar(self, *_):
+        self._renovar = True
+
+    def _preparar(self):
+        """Deja el modelo listo en el padre y congela el GC antes de los fork"""
+        self.ml_service.modelo_entrenado()
+        self.version = self.ml_service.registry.version_actual()
+        gc.collect()
+        gc.freeze()
+
+    def _lanzar(self) -> bool:
+        """
+        Hace fork de un worker y espera a que acepte conexiones
+
+        Returns:
+            True si el worker aviso que arranco dentro de TIMEOUT_ARRANQUE
+        """
+        lectura, escritura = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(lectura)
+            self._correr_worker(escritura)
+
+        os.close(escritura)
+        self.workers[pid] = time.monotonic()
+        try:
+            listo, _, _ = select.select([lectura], [], [], self.TIMEOUT_ARRANQUE)
+            arranco = bool(listo) and os.read(lectura, 1) == b'1'
+        finally:
+            os.close(lectura)
+        if not arranco:
+            print(f"[Advertencia] El worker {pid} no arranco")
+        return arranco
+
+    def _correr_worker(self, aviso: int):
+        """Cuerpo del proceso hijo: sirve la app hasta que le piden terminar"""
+        codigo = 1
+        try:
+            for senal in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(senal, signal.SIG_DFL)
+            config = uvicorn.Config(
+                self.app,
+                host=self.host,
+                port=self.port,
+                timeout_graceful_shutdown=self.timeout_apagado
+            )
+            _ServidorWorker(config, aviso).run(sockets=[self.socket])
+            codigo = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            # Sin los atexit ni finalizadores heredados del padre
+            os._exit(codigo)
+
+    def _recoger(self):
+        """Recoge los workers terminados y reemplaza los que no se retiraron"""
+        while True:
+            try:
+                pid, estado = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+
+            self.retirados.pop(pid, None)
+            arranque = self.workers.pop(pid, None)
+            if arranque is None or self._detener:
+                continue
+
+            print(f"[Advertencia] El worker {pid} termino inesperadamente "
+                  f"(estado {os.waitstatus_to_exitcode(estado)}); reiniciando")
+            # Sin bucles de fork si muere apenas arranca
+            time.sleep(max(0.0, self.ESPERA_REINICIO - (time.monotonic() - arranque)))
+            self._lanzar()
+
+        ahora = time.monotonic()
+        for pid, limite in list(self.retirados.items()):
+            if ahora >= limite:
+                self._senal(pid, signal.SIGKILL)
+
+    def _cambiar_version(self, version: str):
+        """Carga en el padre la version activada y renueva los workers"""
+        try:
+            self.ml_service.instalar_version(version)
+        except Exception as e:
+            print(f"[Error] No se pudo cargar la version {version}: {e}")
+            # No reintentar en cada consulta: solo si `current` vuelve a cambiar
+            self.version = version
+            return
+
+        print(f"[Info] Version {version} publicada; renovando workers")
+        self.version = version
+        gc.collect()
+        gc.freeze()
+        self._renovar_workers()
+
+    def _renovar_workers(self):
+        """Reemplaza los workers de a uno sin dejar de aceptar conexiones"""
+        for pid in list(self.workers):
+            self._lanzar()
+            self._retirar(pid)
+
+    def _retirar(self, pid: int):
+        """Pide a un worker que termine; pasado timeout_apagado se lo mata"""
+        if self.workers.pop(pid, None) is not None:
+            self.retirados[pid] = time.monotonic() + self.timeout_apagado
+            self._senal(pid, signal.SIGTERM)
+
+    def _apagar(self):
+        """Retira todos los workers, espera que terminen y cierra el socket"""
+        for pid in list(self.workers):
+            self._retirar(pid)
+        while self.retirados:
+            self._recoger()
+            time.sleep(0.05)
+        self.socket.close()
+        print("[OK] Workers detenidos")
+
+    @staticmethod
+    def _senal(pid: int, senal: int):
+        try:
+            os.kill(pid, senal)
+        except ProcessLookupError:
+            pass
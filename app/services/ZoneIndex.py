@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+Zone Index - Indice espacial de zonas especiales
+Grilla uniforme sobre las zonas + refinamiento punto-en-poligono vectorizado
+"""
+import json
+import math
+from pathlib import Path
+import numpy as np
+
+
+class ZoneIndex:
+    """
+    Indice de zonas (rectangulos o poligonos) sobre una grilla uniforme
+
+    Cada celda de la grilla guarda las zonas cuyo bounding box la toca, en
+    orden de prioridad. Una consulta ubica la celda del punto, filtra las
+    candidatas por bounding box y solo para los poligonos cuenta cruces de
+    aristas (regla par-impar, que resuelve huecos y multipoligonos). Si un
+    punto cae en varias zonas gana la primera en el orden de construccion.
+
+    Los rectangulos (zonas definidas por 'bbox') usan comparaciones
+    inclusivas en los cuatro bordes, igual que el chequeo por bounding box
+    original. Las coordenadas de los poligonos van en (lon, lat) como en
+    GeoJSON.
+
+    La instancia es inmutable despues de construirla, por lo que se puede
+    usar desde varios threads sin locks.
+    """
+
+    # Tope de celdas por eje de la grilla
+    MAX_CELDAS_EJE = 1024
+
+    def __init__(self, zonas: list[dict]):
+        """
+        Args:
+            zonas: Lista de zonas en orden de prioridad. Cada zona tiene
+                'nombre', 'zona_id', 'multiplicador_precio' y, o bien 'bbox'
+                ({lat_min, lat_max, lon_min, lon_max}), o bien 'anillos'
+                (lista de anillos, cada uno una secuencia de (lon, lat))
+        """
+        n_zonas = len(zonas)
+        self.nombres = np.array([zona['nombre'] for zona in zonas], dtype=object)
+        self.zona_ids = np.array([zona['zona_id'] for zona in zonas], dtype=np.int64)
+        self.multiplicadores = np.array(
+            [zona['multiplicador_precio'] for zona in zonas], dtype=np.float64
+        )
+
+        self.lat_min = np.empty(n_zonas)
+        self.lat_max = np.empty(n_zonas)
+        self.lon_min = np.empty(n_zonas)
+        self.lon_max = np.empty(n_zonas)
+        self.es_rectangulo = np.zeros(n_zonas, dtype=bool)
+
+        # Aristas de todos los poligonos concatenadas; las de la zona z son
+        # arista_inicio[z]:arista_inicio[z + 1] (vacio para los rectangulos)
+        x1, y1, x2, y2 = [], [], [], []
+        self.arista_inicio = np.zeros(n_zonas + 1, dtype=np.int64)
+
+        for z, zona in enumerate(zonas):
+            if 'bbox' in zona:
+                bbox = zona['bbox']
+                self.lat_min[z], self.lat_max[z] = bbox['lat_min'], bbox['lat_max']
+                self.lon_min[z], self.lon_max[z] = bbox['lon_min'], bbox['lon_max']
+                self.es_rectangulo[z] = True
+                self.arista_inicio[z + 1] = self.arista_inicio[z]
+                continue
+
+            anillos = [np.asarray(anillo, dtype=np.float64) for anillo in zona['anillos']]
+            vertices = np.concatenate(anillos)
+            self.lon_min[z], self.lat_min[z] = vertices.min(axis=0)
+            self.lon_max[z], self.lat_max[z] = vertices.max(axis=0)
+
+            n_aristas = 0
+            for anillo in anillos:
+                # Cerrar el anillo (GeoJSON repite el primer vertice; se toleran ambos casos)
+                siguiente = np.roll(anillo, -1, axis=0)
+                x1.append(anillo[:, 0])
+                y1.append(anillo[:, 1])
+                x2.append(siguiente[:, 0])
+                y2.append(siguiente[:, 1])
+                n_aristas += len(anillo)
+            self.arista_inicio[z + 1] = self.arista_inicio[z] + n_aristas
+
+        vacio = np.empty(0)
+        self.x1 = np.concatenate(x1) if x1 else vacio
+        self.y1 = np.concatenate(y1) if y1 else vacio
+        self.y2 = np.concatenate(y2) if y2 else vacio
+        x2 = np.concatenate(x2) if x2 else vacio
+
+        # dx/dy de cada arista; las horizontales nunca se cruzan (queda en 0)
+        dy = self.y2 - self.y1
+        horizontal = dy == 0
+        self.pendiente_inv = np.where(horizontal, 0.0, (x2 - self.x1) / np.where(horizontal, 1.0, dy))
+
+        self._construir_grilla()
+
+    def _construir_grilla(self):
+        """Reparte las zonas en una grilla con celdas del tamano mediano de las zonas"""
+        n_zonas = len(self.zona_ids)
+        if n_zonas == 0:
+            self.lat0 = self.lon0 = 0.0
+            self.dlat = self.dlon = 1.0
+            self.nx = self.ny = 1
+            self.celda_inicio = np.zeros(2, dtype=np.int64)
+            self.celda_zonas = np.empty(0, dtype=np.int64)
+            return
+
+        self.lat0, self.lon0 = self.lat_min.min(), self.lon_min.min()
+        alto = max(self.lat_max.max() - self.lat0, 1e-9)
+        ancho = max(self.lon_max.max() - self.lon0, 1e-9)
+
+        # Celdas del tamano de una zona tipica: pocas candidatas por celda
+        dlat_zona = max(float(np.median(self.lat_max - self.lat_min)), alto / self.MAX_CELDAS_EJE)
+        dlon_zona = max(float(np.median(self.lon_max - self.lon_min)), ancho / self.MAX_CELDAS_EJE)
+        self.ny = max(1, min(self.MAX_CELDAS_EJE, math.ceil(alto / dlat_zona)))
+        self.nx = max(1, min(self.MAX_CELDAS_EJE, math.ceil(ancho / dlon_zona)))
+        self.dlat = alto / self.ny
+        self.dlon = ancho / self.nx
+
+        iy0, iy1 = self._celdas_eje(self.lat_min, self.lat_max, self.lat0, self.dlat, self.ny)
+        ix0, ix1 = self._celdas_eje(self.lon_min, self.lon_max, self.lon0, self.dlon, self.nx)
+
+        celdas, zonas = [], []
+        for z in range(n_zonas):
+            filas = np.arange(iy0[z], iy1[z] + 1)
+            columnas = np.arange(ix0[z], ix1[z] + 1)
+            celdas.append((filas[:, None] * self.nx + columnas[None, :]).ravel())
+            zonas.append(np.full(len(filas) * len(columnas), z, dtype=np.int64))
+
+        celdas = np.concatenate(celdas)
+        zonas = np.concatenate(zonas)
+
+        # Orden por celda y, dentro de la celda, por prioridad de zona
+        orden = np.lexsort((zonas, celdas))
+        self.celda_zonas = zonas[orden]
+        self.celda_inicio = np.zeros(self.nx * self.ny + 1, dtype=np.int64)
+        np.cumsum(np.bincount(celdas, minlength=self.nx * self.ny), out=self.celda_inicio[1:])
+
+    @staticmethod
+    def _celdas_eje(minimos, maximos, origen, paso, n):
+        """Rango de celdas [inicio, fin] que cubre cada intervalo en un eje"""
+        inicio = np.clip(np.floor((minimos - origen) / paso).astype(np.int64), 0, n - 1)
+        fin = np.clip(np.floor((maximos - origen) / paso).astype(np.int64), 0, n - 1)
+        return inicio, fin
+
+    def __len__(self) -> int:
+        return len(self.zona_ids)
+
+    def buscar_batch(self, lats, lons) -> np.ndarray:
+        """
+        Zona de cada punto (indice en el orden de construccion, -1 si ninguna)
+
+        Args:
+            lats: Latitudes de los puntos
+            lons: Longitudes de los puntos
+
+        Returns:
+            Array int64 con N indices de zona
+        """
+        lats = np.asarray(lats, dtype=np.float64).ravel()
+        lons = np.asarray(lons, dtype=np.float64).ravel()
+        resultado = np.full(len(lats), -1, dtype=np.int64)
+        if len(self) == 0 or len(lats) == 0:
+            return resultado
+
+        # Celda de cada punto; fuera de la grilla no hay candidatas
+        fy = np.floor((lats - self.lat0) / self.dlat)
+        fx = np.floor((lons - self.lon0) / self.dlon)
+        # El borde superior/derecho de la grilla pertenece a la ultima celda
+        fy = np.where(fy == self.ny, self.ny - 1, fy)
+        fx = np.where(fx == self.nx, self.nx - 1, fx)
+        en_grilla = (fy >= 0) & (fy < self.ny) & (fx >= 0) & (fx < self.nx)
+        celda = np.where(en_grilla, fy * self.nx + fx, 0).astype(np.int64)
+        n_candidatas = np.where(en_grilla, self.celda_inicio[celda + 1] - self.celda_inicio[celda], 0)
+
+        # Pares (punto, zona candidata), ordenados por punto y prioridad
+        punto, posicion = self._expandir(self.celda_inicio[celda], n_candidatas)
+        zona = self.celda_zonas[posicion]
+        lat_p, lon_p = lats[punto], lons[punto]
+        en_bbox = (
+            (self.lat_min[zona] <= lat_p) & (lat_p <= self.lat_max[zona]) &
+            (self.lon_min[zona] <= lon_p) & (lon_p <= self.lon_max[zona])
+        )
+        punto, zona = punto[en_bbox], zona[en_bbox]
+
+        # Los rectangulos ya quedaron resueltos; los poligonos cuentan cruces
+        dentro = self.es_rectangulo[zona]
+        poligono = np.flatnonzero(~dentro)
+        if len(poligono):
+            dentro[poligono] = self._cruces_impares(
+                lats[punto[poligono]], lons[punto[poligono]], zona[poligono]
+            )
+
+        # Primera zona (la de mayor prioridad) de cada punto
+        punto, zona = punto[dentro], zona[dentro]
+        primera = np.ones(len(punto), dtype=bool)
+        primera[1:] = punto[1:] != punto[:-1]
+        resultado[punto[primera]] = zona[primera]
+
+        return resultado
+
+    def _cruces_impares(self, lats, lons, zonas) -> np.ndarray:
+        """Regla par-impar: el rayo hacia el este cruza un numero impar de aristas"""
+        inicio = self.arista_inicio[zonas]
+        par, arista = self._expandir(inicio, self.arista_inicio[zonas + 1] - inicio)
+
+        y = lats[par]
+        y1 = self.y1[arista]
+        cruza = (y1 > y) != (self.y2[arista] > y)
+        cruza &= lons[par] < self.x1[arista] + (y - y1) * self.pendiente_inv[arista]
+
+        return np.bincount(par, weights=cruza, minlength=len(zonas)) % 2 == 1
+
+    @staticmethod
+    def _expandir(inicios: np.ndarray, cantidades: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Expande rangos [inicio, inicio + cantidad) en pares (fila, posicion)
+
+        Equivale a concatenar np.arange(inicio, inicio + cantidad) por fila
+        sin un bucle de Python.
+        """
+        total = int(cantidades.sum())
+        fila = np.repeat(np.arange(len(cantidades)), cantidades)
+        desplazamiento = np.arange(total) - np.repeat(np.cumsum(cantidades) - cantidades, cantidades)
+        return fila, inicios[fila] + desplazamiento
+
+    def buscar(self, lat: float, lon: float) -> int:
+        """
+        Zona de un punto (indice en el orden de construccion, -1 si ninguna)
+
+        Camino escalar en Python puro: evita el costo fijo de los arrays
+        para consultas de a un punto.
+        """
+        fy = math.floor((lat - self.lat0) / self.dlat)
+        fx = math.floor((lon - self.lon0) / self.dlon)
+        fy = self.ny - 1 if fy == self.ny else fy
+        fx = self.nx - 1 if fx == self.nx else fx
+        if len(self) == 0 or not (0 <= fy < self.ny and 0 <= fx < self.nx):
+            return -1
+
+        celda = fy * self.nx + fx
+        for z in self.celda_zonas[self.celda_inicio[celda]:self.celda_inicio[celda + 1]].tolist():
+            if not (self.lat_min[z] <= lat <= self.lat_max[z] and
+                    self.lon_min[z] <= lon <= self.lon_max[z]):
+                continue
+            if self.es_rectangulo[z]:
+                return z
+
+            dentro = False
+            for a in range(self.arista_inicio[z], self.arista_inicio[z + 1]):
+                y1, y2 = self.y1[a], self.y2[a]
+                if (y1 > lat) != (y2 > lat) and lon < self.x1[a] + (lat - y1) * self.pendiente_inv[a]:
+                    dentro = not dentro
+            if dentro:
+                return z
+
+        return -1
+
+    def zona(self, indice: int) -> dict | None:
+        """Info de la zona en el formato de detectar_zona_especial"""
+        if indice < 0:
+            return None
+        return {
+            'nombre': self.nombres[indice],
+            'zona_id': int(self.zona_ids[indice]),
+            'multiplicador': float(self.multiplicadores[indice])
+        }
+
+    @staticmethod
+    def convertir_zonas_especiales(zonas_especiales: dict) -> list[dict]:
+        """
+        Convierte el dict ZONAS_ESPECIALES ({nombre: config}) en lista de zonas
+
+        Returns:
+            Zonas en el formato del constructor, en el orden del dict
+        """
+        return [
+            {
+                'nombre': nombre,
+                'zona_id': config['zona_id'],
+                'multiplicador_precio': config['multiplicador_precio'],
+                'bbox': config['bbox']
+            }
+            for nombre, config in zonas_especiales.items()
+        ]
+
+    @staticmethod
+    def leer_geojson(ruta: str | Path) -> list[dict]:
+        """
+        Lee zonas de un FeatureCollection GeoJSON (Polygon o MultiPolygon)
+
+        Cada feature necesita en 'properties' un 'nombre' (o 'name'),
+        'zona_id' y 'multiplicador_precio' (1.0 si falta).
+
+        Args:
+            ruta: Ruta al archivo .geojson
+
+        Returns:
+            Zonas en el formato del constructor, en el orden del archivo
+        """
+        with open(ruta, encoding='utf-8') as archivo:
+            coleccion = json.load(archivo)
+
+        zonas = []
+        for feature in coleccion['features']:
+            geometria = feature['geometry']
+            propiedades = feature.get('properties') or {}
+
+            if geometria['type'] == 'Polygon':
+                anillos = geometria['coordinates']
+            elif geometria['type'] == 'MultiPolygon':
+                anillos = [anillo for poligono in geometria['coordinates'] for anillo in poligono]
+            else:
+                raise ValueError(f"Geometria no soportada: {geometria['type']}")
+
+            zonas.append({
+                'nombre': propiedades.get('nombre', propiedades.get('name')),
+                'zona_id': int(propiedades['zona_id']),
+                'multiplicador_precio': float(propiedades.get('multiplicador_precio', 1.0)),
+                # Solo (lon, lat): se descarta la altura si viene
+                'anillos': [[punto[:2] for punto in anillo] for anillo in anillos]
+            })
+
+        return zonas
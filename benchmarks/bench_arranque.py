@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: tiempo de arranque del servidor hasta el primer request
+
+Levanta `python main.py` (un worker) sobre un registro con una version y
+mide, desde que se lanza el proceso, cuando responde el primer /health, el
+primer /ready con 200 y el primer /predict. Casos: sirviendo el .forest
+mapeado en memoria (MODEL_MMAP=True, no importa sklearn) o el pickle
+(MODEL_MMAP=False). Mediana de REPETICIONES arranques.
+
+Ejecutar: python -m benchmarks.bench_arranque
+"""
+import contextlib
+import io
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import httpx
+import numpy as np
+from app.models.ModelRegistry import ModelRegistry
+from app.models.RandomForestModel import RandomForestModel
+from app.services.DatasetService import DatasetService
+
+RAIZ = Path(__file__).resolve().parents[1]
+REPETICIONES = 5
+INMUEBLE = {"metros": 95.0, "cuartos": 3, "banos": 2, "lat": -17.77, "lon": -63.19, "parking": 1, "piscina": 0}
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def arrancar(directorio: Path, mmap: bool) -> dict:
+    """Segundos desde el lanzamiento hasta cada primer request con exito"""
+    puerto = puerto_libre()
+    env = {
+        **os.environ,
+        'PORT': str(puerto),
+        'HOST': '127.0.0.1',
+        'MODEL_MMAP': str(mmap),
+        'MODEL_REGISTRY_DIR': str(directorio / "registry"),
+        'MODEL_PATH': str(directorio / "modelo.pkl"),
+        'DATASET_PATH': str(directorio / "dataset.cols"),
+    }
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen([sys.executable, "main.py"], cwd=RAIZ, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    tiempos = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{puerto}", timeout=30) as cliente:
+            for nombre, pedir in (
+                ('health', lambda: cliente.get("/health")),
+                ('ready', lambda: cliente.get("/ready")),
+                ('predict', lambda: cliente.post("/predict", json=INMUEBLE)),
+            ):
+                while True:
+                    try:
+                        if pedir().status_code == 200:
+                            break
+                    except httpx.TransportError:
+                        pass
+                    time.sleep(0.005)
+                tiempos[nombre] = time.perf_counter() - inicio
+            tiempos['etapas'] = cliente.get("/ready").json()["data"]["stage_seconds"]
+    finally:
+        proceso.terminate()
+        proceso.wait()
+    return tiempos
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        directorio = Path(tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            model = RandomForestModel()
+            model.entrenar(DatasetService.generar_dataset_sintetico(10_000))
+            ModelRegistry(directorio / "registry").registrar(model)
+
+        print(f"{'modelo':>8} {'1er /health s':>14} {'/ready s':>9} {'1er /predict s':>15} "
+              f"{'cargar_modelo s':>16} {'calentar s':>11}")
+        for mmap in (True, False):
+            corridas = [arrancar(directorio, mmap) for _ in range(REPETICIONES)]
+
+            def mediana(clave, etapa=False):
+                return float(np.median([c['etapas'][clave] if etapa else c[clave] for c in corridas]))
+
+            print(f"{'.forest' if mmap else 'pickle':>8} {mediana('health'):>14.2f} {mediana('ready'):>9.2f} "
+                  f"{mediana('predict'):>15.2f} {mediana('cargar_modelo', True):>16.3f} "
+                  f"{mediana('calentar', True):>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: formato compacto del bosque (.forest) contra el pickle de joblib
+
+Para cada configuracion entrena un modelo, lo guarda como pickle y como
+.forest y reporta tamano en disco, nodos antes y despues de fusionar hojas,
+tiempo de carga (cargar() completo, mediana de varias cargas) y la maxima
+desviacion de la prediccion del bosque compacto contra el original, en
+crudo y en el precio redondeado a 6 decimales que ve el cliente.
+
+Ejecutar: python -m benchmarks.bench_compactacion
+"""
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from app.models.RandomForestModel import RandomForestModel, redondear
+from app.services.DatasetService import DatasetService
+
+# (filas, n_estimators, max_depth, min_samples_split)
+CONFIGURACIONES = [
+    (10_000, 100, 10, 5),
+    (100_000, 100, 14, 2),
+    (100_000, 50, None, 2),
+]
+CARGAS = 5
+
+
+def tiempo_carga(ruta: Path) -> float:
+    tiempos = []
+    for _ in range(CARGAS):
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            RandomForestModel().cargar(ruta)
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos))
+
+
+def main():
+    print(f"{'filas':>8} {'arboles':>7} {'depth':>5} {'split':>5} {'pickle MB':>10} {'forest MB':>10} "
+          f"{'reduccion':>9} {'nodos':>9} {'fusionados':>10} {'carga pkl ms':>12} {'carga forest ms':>15} "
+          f"{'desv max':>9} {'desv precio':>11}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for filas, arboles, depth, split in CONFIGURACIONES:
+            with contextlib.redirect_stdout(io.StringIO()):
+                df = DatasetService.generar_dataset_sintetico(filas)
+                model = RandomForestModel()
+                model.entrenar(df, {'n_estimators': arboles, 'max_depth': depth, 'min_samples_split': split})
+                pkl = model.guardar(Path(tmp) / "modelo.pkl")
+                forest = model.guardar(Path(tmp) / "modelo.forest")
+                compacto = RandomForestModel()
+                compacto.cargar(forest)
+
+            X = df[model.feature_names].head(20_000).to_numpy(dtype=np.float32)
+            media, _ = model.engine.predecir(X)
+            media_compacta, _ = compacto.engine.predecir(X)
+            desviacion = float(np.abs(media - media_compacta).max())
+            desviacion_precio = max(abs(redondear(a) - redondear(b)) for a, b in zip(media, media_compacta))
+
+            print(f"{filas:>8,} {arboles:>7} {str(depth):>5} {split:>5} "
+                  f"{pkl.stat().st_size / 2**20:>10.2f} {forest.stat().st_size / 2**20:>10.2f} "
+                  f"{pkl.stat().st_size / forest.stat().st_size:>8.1f}x "
+                  f"{model.engine.n_nodos:>9} {model.engine.n_nodos - compacto.engine.n_nodos:>10} "
+                  f"{tiempo_carga(pkl) * 1e3:>12.1f} {tiempo_carga(forest) * 1e3:>15.2f} "
+                  f"{desviacion:>9.1e} {desviacion_precio:>11.1e}")
+
+
+if __name__ == "__main__":
+    main()
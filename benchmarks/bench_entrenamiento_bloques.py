@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: entrenamiento en memoria vs por bloques (out-of-core)
+
+Genera datasets de 1M y 10M filas en shards .cols y entrena en un proceso
+nuevo por caso: cargando todo en memoria (cargar_dataset + entrenar) o con
+entrenar_por_bloques. Reporta tiempo total, RSS pico (VmHWM, reiniciado
+despues de los imports) y cuanto crecio respecto del proceso recien
+importado. Solo Linux.
+
+Usa ARBOLES arboles en ambos casos para que el de 10M en memoria termine
+en un tiempo razonable.
+
+Ejecutar: python -m benchmarks.bench_entrenamiento_bloques
+"""
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+import pandas as pd
+from app.config.settings import settings
+from app.models.RandomForestModel import RandomForestModel
+from app.services.DatasetService import DatasetService
+
+FILAS = (1_000_000, 10_000_000)
+ARBOLES = 20
+FILAS_POR_BLOQUE = 500_000
+
+
+def memoria_mb(campo: str) -> float:
+    """VmRSS (actual) o VmHWM (pico) del proceso, en MB"""
+    for linea in Path('/proc/self/status').read_text().splitlines():
+        if linea.startswith(f'{campo}:'):
+            return int(linea.split()[1]) / 1024
+    return float('nan')
+
+
+def entrenar(ruta: str, modo: str, resultados):
+    settings.N_ESTIMATORS = ARBOLES
+    # Reiniciar el pico para no contar el de los imports
+    Path('/proc/self/clear_refs').write_text('5')
+    base = memoria_mb('VmRSS')
+    inicio = time.perf_counter()
+
+    model = RandomForestModel()
+    if modo == 'memoria':
+        partes = sorted(Path(ruta).glob('part-*'))
+        df = pd.concat([DatasetService.cargar_dataset(parte, mmap=False) for parte in partes], ignore_index=True)
+        metrics = model.entrenar(df)
+    else:
+        metrics = model.entrenar_por_bloques(ruta, filas_por_bloque=FILAS_POR_BLOQUE)
+
+    pico = memoria_mb('VmHWM')
+    resultados.put((time.perf_counter() - inicio, pico, pico - base, metrics['test']['r2']))
+
+
+def main():
+    contexto = multiprocessing.get_context('spawn')
+    filas_resultado = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for filas in FILAS:
+            ruta = DatasetService.generar_dataset_sharded(filas, Path(tmp) / f"d{filas}")[0].parent
+            for modo in ('memoria', 'bloques'):
+                resultados = contexto.Queue()
+                proceso = contexto.Process(target=entrenar, args=(str(ruta), modo, resultados))
+                proceso.start()
+                segundos, pico, extra, r2 = resultados.get()
+                proceso.join()
+                filas_resultado.append((filas, modo, segundos, pico, extra, r2))
+
+    print(f"\n{ARBOLES} arboles, bloques de {FILAS_POR_BLOQUE:,} filas\n")
+    print(f"{'filas':>11} {'modo':<8} {'tiempo s':>9} {'RSS pico MB':>12} {'sobre base MB':>14} {'R2 test':>8}")
+    for filas, modo, segundos, pico, extra, r2 in filas_resultado:
+        print(f"{filas:>11,} {modo:<8} {segundos:>9.1f} {pico:>12.0f} {extra:>14.0f} {r2:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga: latencia de /health con /predict saturado
+
+Lanza 32 clientes que envian /predict sin pausa durante unos segundos y,
+en paralelo, pide /health cada 10 ms. La latencia de /health incluye la
+espera del event loop: con el modo 'inline' (inferencia en el loop) crece
+con la carga, con 'thread' se mantiene plana. La app corre en el mismo
+proceso via httpx.ASGITransport.
+
+Ejecutar: python -m benchmarks.bench_event_loop
+"""
+import asyncio
+import time
+import httpx
+import numpy as np
+from app.api.routes import prediction
+from app.config.settings import settings
+from app.services.InferenceExecutor import InferenceExecutor
+from server import app
+
+CLIENTES = 32
+DURACION_S = 3.0
+INTERVALO_HEALTH_S = 0.01
+
+
+async def cliente_predict(client: httpx.AsyncClient, fin: float, rng: np.random.Generator) -> int:
+    """Envia /predict hasta `fin`; devuelve cuantas respuestas 200 recibio"""
+    exitosas = 0
+    while time.perf_counter() < fin:
+        inmueble = {
+            "metros": float(rng.uniform(40, 300)),
+            "cuartos": int(rng.integers(1, 6)),
+            "banos": int(rng.integers(1, 4)),
+            "lat": float(rng.uniform(-17.9, -17.65)),
+            "lon": float(rng.uniform(-63.3, -63.05))
+        }
+        response = await client.post("/predict", json=inmueble)
+        exitosas += response.status_code == 200
+    return exitosas
+
+
+async def sonda_health(client: httpx.AsyncClient, fin: float) -> list[float]:
+    """Latencias de /health (incluida la espera del loop) en milisegundos"""
+    latencias = []
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        await asyncio.sleep(INTERVALO_HEALTH_S)
+        await client.get("/health")
+        latencias.append((time.perf_counter() - inicio - INTERVALO_HEALTH_S) * 1e3)
+    return latencias
+
+
+async def escenario(modo: str) -> tuple[list[float], int]:
+    controller = prediction.prediction_controller
+    # Solo el executor: sin micro-lotes, cada /predict es una llamada
+    anterior = controller.executor, controller.batcher
+    controller.batcher = None
+    controller.executor = InferenceExecutor(
+        controller.ml_service,
+        modo=modo,
+        workers=settings.INFERENCE_WORKERS,
+        max_pendientes=settings.INFERENCE_MAX_PENDING,
+        timeout_segundos=settings.INFERENCE_TIMEOUT_SECONDS
+    )
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            fin = time.perf_counter() + DURACION_S
+            rngs = [np.random.default_rng(i) for i in range(CLIENTES)]
+            resultados = await asyncio.gather(
+                sonda_health(client, fin),
+                *[cliente_predict(client, fin, rng) for rng in rngs]
+            )
+        return resultados[0], sum(resultados[1:])
+    finally:
+        controller.executor.cerrar()
+        controller.executor, controller.batcher = anterior
+
+
+def main():
+    ml_service = prediction.prediction_controller.ml_service
+    if not ml_service.model.is_trained:
+        ml_service.model.entrenar()
+    # Sin cache: cada /predict llega al modelo
+    ml_service.cache.max_size = 0
+
+    print("=" * 72)
+    print(f"{'modo':<8} {'health p50 ms':>14} {'p99 ms':>10} {'max ms':>10} {'predict/s':>12}")
+    print("=" * 72)
+
+    for modo in ('inline', 'thread'):
+        latencias, exitosas = asyncio.run(escenario(modo))
+        p50, p99 = np.percentile(latencias, [50, 99])
+        print(f"{modo:<8} {p50:>14.2f} {p99:>10.2f} {max(latencias):>10.2f} {exitosas / DURACION_S:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
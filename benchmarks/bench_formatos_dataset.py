@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: tiempo de carga y memoria del dataset segun el formato
+
+Genera un dataset sintetico, lo guarda en CSV y en formato columnar (.cols)
+y mide en un proceso nuevo por caso el tiempo de cargar_dataset, el tiempo
+de recorrer todas las columnas (suma) y la memoria residente resultante.
+Con mmap la carga solo abre los archivos: las paginas se leen (y cuentan en
+el RSS, como memoria compartida con otros procesos) al recorrerlas.
+
+Ejecutar: python -m benchmarks.bench_formatos_dataset
+"""
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+import pandas as pd
+from app.services.DatasetService import DatasetService
+
+FILAS = 5_000_000
+
+
+def rss_mb() -> float:
+    """Memoria residente del proceso actual (Linux)"""
+    for linea in Path('/proc/self/status').read_text().splitlines():
+        if linea.startswith('VmRSS:'):
+            return int(linea.split()[1]) / 1024
+    return float('nan')
+
+
+def medir_carga(ruta: str, mmap: bool | None, resultados):
+    base = rss_mb()
+    inicio = time.perf_counter()
+    if mmap is None:
+        # Como antes: read_csv con dtypes inferidos (int64/float64)
+        df = pd.read_csv(ruta)
+    else:
+        df = DatasetService.cargar_dataset(ruta, mmap=mmap)
+    carga = time.perf_counter() - inicio
+    rss_carga = rss_mb() - base
+
+    inicio = time.perf_counter()
+    for col in df.columns:
+        df[col].sum()
+    recorrido = time.perf_counter() - inicio
+
+    resultados.put((carga, rss_carga, recorrido, rss_mb() - base))
+
+
+def tamano_mb(ruta: Path) -> float:
+    archivos = ruta.iterdir() if ruta.is_dir() else [ruta]
+    return sum(archivo.stat().st_size for archivo in archivos) / 2**20
+
+
+def main():
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        df = DatasetService.generar_dataset_sintetico(FILAS)
+        csv = DatasetService.guardar_dataset(df, Path(tmp) / "datos.csv")
+
+        inicio = time.perf_counter()
+        columnar = DatasetService.convertir_csv(csv)
+        conversion = time.perf_counter() - inicio
+        del df
+
+        casos = [
+            ("csv (inferido)", csv, None),
+            ("csv (ESQUEMA)", csv, False),
+            ("cols (lectura)", columnar, False),
+            ("cols (mmap)", columnar, True),
+        ]
+
+        print(f"\n{FILAS:,} filas; conversion csv -> cols: {conversion:.2f} s\n")
+        print(f"{'formato':<16} {'disco MB':>9} {'carga s':>9} {'RSS carga MB':>13} {'recorrer s':>11} {'RSS final MB':>13}")
+        for nombre, ruta, mmap in casos:
+            resultados = contexto.Queue()
+            proceso = contexto.Process(target=medir_carga, args=(str(ruta), mmap, resultados))
+            proceso.start()
+            carga, rss_carga, recorrido, rss_final = resultados.get()
+            proceso.join()
+            print(f"{nombre:<16} {tamano_mb(ruta):>9.1f} {carga:>9.3f} {rss_carga:>13.1f} {recorrido:>11.3f} {rss_final:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
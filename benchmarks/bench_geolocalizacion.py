@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: analisis de ubicacion
+
+Compara el calculo anterior con geopy (dos geodesic por punto: uno en
+detectar_anillo y otro en calcular_distancia) con analizar_ubicacion y
+analizar_ubicacion_batch. Los puntos se sortean en el rango de Santa Cruz
+que valida PredictionRequest.
+
+Ejecutar: python -m benchmarks.bench_geolocalizacion
+"""
+import time
+import numpy as np
+from geopy.distance import geodesic
+from app.services.GeolocationService import GeolocationService
+
+
+def analisis_geopy(lat: float, lon: float):
+    """Costo del calculo anterior: dos geodesic de Karney por punto"""
+    geodesic(GeolocationService.CENTRO_SCZ, (lat, lon)).kilometers
+    geodesic(GeolocationService.CENTRO_SCZ, (lat, lon)).kilometers
+    GeolocationService.detectar_zona_especial(lat, lon)
+
+
+def main():
+    rng = np.random.default_rng(42)
+    n = 20000
+    lats = rng.uniform(-18.0, -17.5, n)
+    lons = rng.uniform(-63.5, -62.5, n)
+
+    print("=" * 60)
+    print(f"{'metodo':<28} {'us/punto':>12}")
+    print("=" * 60)
+
+    inicio = time.perf_counter()
+    for lat, lon in zip(lats[:2000].tolist(), lons[:2000].tolist()):
+        analisis_geopy(lat, lon)
+    print(f"{'geopy (anterior)':<28} {(time.perf_counter() - inicio) / 2000 * 1e6:>12.2f}")
+
+    inicio = time.perf_counter()
+    for lat, lon in zip(lats[:2000].tolist(), lons[:2000].tolist()):
+        GeolocationService.analizar_ubicacion(lat, lon)
+    print(f"{'analizar_ubicacion':<28} {(time.perf_counter() - inicio) / 2000 * 1e6:>12.2f}")
+
+    for tamano in (100, 1000, n):
+        inicio = time.perf_counter()
+        GeolocationService.analizar_ubicacion_batch(lats[:tamano], lons[:tamano])
+        nombre = f"batch (N={tamano})"
+        print(f"{nombre:<28} {(time.perf_counter() - inicio) / tamano * 1e6:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
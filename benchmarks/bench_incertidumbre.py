@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: prediccion + incertidumbre del bosque
+
+Compara el loop anterior (un predict del bosque y uno por arbol) con la
+pasada unica de RandomForestModel._predecir_bosque, con los backends
+'sklearn' y 'flat', para 1 y N filas.
+
+Ejecutar: python -m benchmarks.bench_incertidumbre
+"""
+import timeit
+import warnings
+import numpy as np
+import pandas as pd
+from app.models.RandomForestModel import RandomForestModel
+from app.services.DatasetService import DatasetService
+
+
+def loop_por_arbol(model: RandomForestModel, X: pd.DataFrame):
+    """Implementacion anterior de predecir (101 llamadas a predict de sklearn)"""
+    media = model.model.predict(X)
+    std = np.std(np.array([tree.predict(X) for tree in model.model.estimators_]), axis=0)
+    return media, std
+
+
+def medir(fn, repeticiones: int) -> float:
+    """Mejor tiempo por llamada en milisegundos"""
+    tiempos = timeit.repeat(fn, number=repeticiones, repeat=5)
+    return min(tiempos) / repeticiones * 1000
+
+
+def main():
+    warnings.filterwarnings("ignore", message="X has feature names")
+
+    df = DatasetService.cargar_dataset("storage/datasets/synthetic_data.csv")
+    model = RandomForestModel()
+    model.entrenar(df)
+
+    print("\n" + "=" * 70)
+    print(f"{'filas':>8} {'loop (ms)':>12} {'sklearn (ms)':>14} {'flat (ms)':>12} {'speedup':>20}")
+    print("=" * 70)
+
+    for n in (1, 10, 100, 1000):
+        X_df = df[model.feature_names].head(n)
+        X = X_df.to_numpy(dtype=np.float32)
+        repeticiones = 20 if n <= 100 else 5
+
+        t_loop = medir(lambda: loop_por_arbol(model, X_df), repeticiones)
+        t_sklearn = medir(lambda: model._predecir_bosque(X, backend='sklearn'), repeticiones)
+        t_flat = medir(lambda: model._predecir_bosque(X, backend='flat'), repeticiones)
+        speedup = f"{t_loop / t_sklearn:.1f}x / {t_loop / t_flat:.1f}x"
+
+        print(f"{n:>8} {t_loop:>12.3f} {t_sklearn:>14.3f} {t_flat:>12.3f} {speedup:>20}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: throughput de /predict segun la ventana de micro-lotes
+
+64 clientes concurrentes piden predicciones individuales sin pausa durante
+2 s por configuracion. Sin micro-lotes cada request es una llamada al
+InferenceExecutor; con micro-lotes pasan por MicroBatcher con distintas
+ventanas. El cache esta desactivado para que cada request llegue al modelo.
+
+Ejecutar: python -m benchmarks.bench_microbatch
+"""
+import asyncio
+import time
+import numpy as np
+from app.config.settings import settings
+from app.schemas.PredictionRequest import PredictionRequest
+from app.services.InferenceExecutor import InferenceExecutor
+from app.services.MicroBatcher import MicroBatcher
+from app.services.MLPredictionService import MLPredictionService
+
+CLIENTES = 64
+DURACION_S = 2.0
+VENTANAS_MS = (0.5, 1, 2, 5)
+
+
+def requests_aleatorios(n: int, semilla: int) -> list[PredictionRequest]:
+    rng = np.random.default_rng(semilla)
+    return [
+        PredictionRequest(
+            metros=float(rng.uniform(40, 300)),
+            cuartos=int(rng.integers(1, 6)),
+            banos=int(rng.integers(1, 4)),
+            lat=float(rng.uniform(-17.9, -17.65)),
+            lon=float(rng.uniform(-63.3, -63.05)),
+            parking=int(rng.integers(0, 2)),
+            piscina=int(rng.integers(0, 2))
+        )
+        for _ in range(n)
+    ]
+
+
+async def cliente(predecir, requests: list, fin: float, latencias: list):
+    i = 0
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        await predecir(requests[i % len(requests)])
+        latencias.append((time.perf_counter() - inicio) * 1e3)
+        i += 1
+
+
+async def escenario(servicio: MLPredictionService, ventana_ms: float | None):
+    executor = InferenceExecutor(
+        servicio,
+        modo='thread',
+        workers=settings.INFERENCE_WORKERS,
+        max_pendientes=10 * CLIENTES,
+        timeout_segundos=0
+    )
+    batcher = None
+    if ventana_ms is None:
+        async def predecir(request):
+            return await executor.ejecutar('predecir_precio', request)
+    else:
+        batcher = MicroBatcher(executor, ventana_ms=ventana_ms, max_lote=settings.MICROBATCH_MAX_SIZE)
+        predecir = batcher.predecir
+
+    latencias = []
+    fin = time.perf_counter() + DURACION_S
+    try:
+        await asyncio.gather(*[
+            cliente(predecir, requests_aleatorios(100, semilla), fin, latencias)
+            for semilla in range(CLIENTES)
+        ])
+    finally:
+        executor.cerrar()
+
+    return latencias, batcher.estadisticas() if batcher else None
+
+
+def main():
+    servicio = MLPredictionService()
+    if not servicio.model.is_trained:
+        servicio.model.entrenar()
+    servicio.cache.max_size = 0
+
+    print("=" * 84)
+    print(f"{'ventana':<14} {'req/s':>10} {'lote medio':>11} {'cola p50 ms':>12} {'cola p99 ms':>12} "
+          f"{'lat p50 ms':>11} {'lat p99 ms':>11}")
+    print("=" * 84)
+
+    for ventana_ms in (None,) + VENTANAS_MS:
+        latencias, stats = asyncio.run(escenario(servicio, ventana_ms))
+        p50, p99 = np.percentile(latencias, [50, 99])
+        nombre = "sin lotes" if ventana_ms is None else f"{ventana_ms} ms"
+        lote = f"{stats['mean_batch_size']:.1f}" if stats else "1.0"
+        cola = stats['queue_delay_ms'] if stats else {'p50': 0.0, 'p99': 0.0}
+        print(f"{nombre:<14} {len(latencias) / DURACION_S:>10.0f} {lote:>11} {cola['p50']:>12.2f} "
+              f"{cola['p99']:>12.2f} {p50:>11.2f} {p99:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: request -> features -> prediccion -> response
+
+Compara la ruta anterior (dict de features, DataFrame de una fila, dict
+redondeado y PredictionResponse validado) con la ruta rapida de
+MLPredictionService.predecir_precios, que escribe los campos del request en
+el buffer preasignado del modelo y construye la respuesta sin re-validar.
+La geolocalizacion se precalcula para medir solo el pipeline.
+
+Reporta tiempo por request y bytes asignados (pico de tracemalloc) por request.
+
+Ejecutar: python -m benchmarks.bench_pipeline
+"""
+import timeit
+import tracemalloc
+import pandas as pd
+from app.models.RandomForestModel import RandomForestModel
+from app.schemas.PredictionRequest import PredictionRequest, PredictionResponse
+from app.services.DatasetService import DatasetService
+from app.services.GeolocationService import GeolocationService
+from app.services.MLPredictionService import MLPredictionService
+
+REQUEST = PredictionRequest(
+    metros=80.0, cuartos=2, banos=1, lat=-17.768, lon=-63.195, parking=1, piscina=0
+)
+
+
+def ruta_anterior(model: RandomForestModel, request: PredictionRequest, ubicacion: dict) -> PredictionResponse:
+    """Pipeline con dicts intermedios y DataFrame de una fila"""
+    features = {
+        'metros': request.metros,
+        'cuartos': request.cuartos,
+        'banos': request.banos,
+        'zona_id': ubicacion['zona_id'],
+        'parking': request.parking,
+        'piscina': request.piscina
+    }
+    X = pd.DataFrame([{
+        'metros_cuadrados': features['metros'],
+        'num_habitacion': features['cuartos'],
+        'num_banos': features['banos'],
+        'zona_id': features['zona_id'],
+        'parking': features['parking'],
+        'piscina': features['piscina']
+    }])
+    media, std = model.engine.predecir(X.to_numpy())
+    precio_sugerido, std = media[0], std[0]
+    prediccion = {
+        'precio_sugerido': round(precio_sugerido, 6),
+        'precio_min': round(max(0.0001, precio_sugerido - (1.5 * std)), 6),
+        'precio_max': round(precio_sugerido + (1.5 * std), 6),
+        'confianza': round(model.metrics.get('test', {}).get('r2', 0.85), 2)
+    }
+    if ubicacion['multiplicador_precio'] != 1.0:
+        mult = ubicacion['multiplicador_precio']
+        prediccion['precio_sugerido'] = round(prediccion['precio_sugerido'] * mult, 6)
+        prediccion['precio_min'] = round(prediccion['precio_min'] * mult, 6)
+        prediccion['precio_max'] = round(prediccion['precio_max'] * mult, 6)
+
+    return PredictionResponse(
+        precio_sugerido=prediccion['precio_sugerido'],
+        precio_min=prediccion['precio_min'],
+        precio_max=prediccion['precio_max'],
+        confianza=prediccion['confianza'],
+        anillo=ubicacion['anillo'],
+        zona_especial=ubicacion['zona_especial']
+    )
+
+
+def medir_tiempo(fn, repeticiones: int = 2000) -> float:
+    """Mejor tiempo por llamada en microsegundos"""
+    return min(timeit.repeat(fn, number=repeticiones, repeat=5)) / repeticiones * 1e6
+
+
+def medir_bytes(fn, repeticiones: int = 200) -> float:
+    """Pico de bytes asignados por llamada (tracemalloc)"""
+    fn()
+    tracemalloc.start()
+    picos = []
+    for _ in range(repeticiones):
+        tracemalloc.reset_peak()
+        actual, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, pico = tracemalloc.get_traced_memory()
+        picos.append(pico - actual)
+    tracemalloc.stop()
+    return sum(picos) / len(picos)
+
+
+def main():
+    df = DatasetService.cargar_dataset("storage/datasets/synthetic_data.csv")
+    service = MLPredictionService.__new__(MLPredictionService)
+    service.model = RandomForestModel()
+    service.model.entrenar(df)
+    service.geo_service = GeolocationService()
+
+    ubicacion = GeolocationService.analizar_ubicacion(REQUEST.lat, REQUEST.lon)
+    ubicacion_batch = GeolocationService.analizar_ubicacion_batch([REQUEST.lat], [REQUEST.lon])
+    service.geo_service.analizar_ubicacion_batch = lambda lats, lons: ubicacion_batch
+
+    anterior = lambda: ruta_anterior(service.model, REQUEST, ubicacion)
+    rapida = lambda: service.predecir_precios([REQUEST])
+
+    assert anterior().model_dump() == rapida()[0].model_dump()
+
+    print("\n" + "=" * 60)
+    print(f"{'ruta':<12} {'us/request':>12} {'bytes asignados/request':>26}")
+    print("=" * 60)
+    for nombre, fn in (("anterior", anterior), ("rapida", rapida)):
+        print(f"{nombre:<12} {medir_tiempo(fn):>12.1f} {medir_bytes(fn):>26.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: deteccion de zonas especiales
+
+Mide ZoneIndex.buscar_batch con 3 zonas (las ZONAS_ESPECIALES fijas), 300 y
+3000 (las fijas mas poligonos sinteticos de 12 vertices repartidos sobre la
+ciudad), frente al recorrido lineal de todas las zonas por bounding box.
+
+Ejecutar: python -m benchmarks.bench_zonas
+"""
+import time
+import numpy as np
+from app.services.GeolocationService import GeolocationService
+from app.services.ZoneIndex import ZoneIndex
+
+
+def zonas_sinteticas(n: int, semilla: int = 0) -> list[dict]:
+    """Las zonas fijas mas n - 3 poligonos estrellados de 12 vertices"""
+    zonas = ZoneIndex.convertir_zonas_especiales(GeolocationService.ZONAS_ESPECIALES)
+    rng = np.random.default_rng(semilla)
+    angulos = np.linspace(0, 2 * np.pi, 12, endpoint=False)
+
+    for i in range(n - len(zonas)):
+        lon_c, lat_c = rng.uniform(-63.35, -63.0), rng.uniform(-17.95, -17.6)
+        radios = rng.uniform(0.002, 0.006, len(angulos))
+        anillo = np.column_stack([lon_c + radios * np.cos(angulos), lat_c + radios * np.sin(angulos)])
+        zonas.append({
+            'nombre': f"Barrio {i}",
+            'zona_id': 1000 + i,
+            'multiplicador_precio': 1.1,
+            'anillos': [anillo]
+        })
+
+    return zonas
+
+
+def recorrido_lineal(indice: ZoneIndex, lats: np.ndarray, lons: np.ndarray):
+    """Referencia: una pasada vectorizada por zona (solo bounding box)"""
+    resultado = np.full(len(lats), -1, dtype=np.int64)
+    for z in range(len(indice)):
+        dentro = (resultado < 0) & (
+            (indice.lat_min[z] <= lats) & (lats <= indice.lat_max[z]) &
+            (indice.lon_min[z] <= lons) & (lons <= indice.lon_max[z])
+        )
+        resultado[dentro] = z
+    return resultado
+
+
+def medir(funcion, repeticiones: int = 5) -> float:
+    """Mejor tiempo de varias repeticiones, en segundos"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    rng = np.random.default_rng(42)
+    n = 100000
+    lats = rng.uniform(-18.0, -17.5, n)
+    lons = rng.uniform(-63.5, -62.5, n)
+
+    print("=" * 72)
+    print(f"{'zonas':>6} {'construir ms':>14} {'batch us/pto':>14} {'escalar us':>12} {'lineal us/pto':>14}")
+    print("=" * 72)
+
+    for n_zonas in (3, 300, 3000):
+        zonas = zonas_sinteticas(n_zonas)
+
+        inicio = time.perf_counter()
+        indice = ZoneIndex(zonas)
+        construir = time.perf_counter() - inicio
+
+        batch = medir(lambda: indice.buscar_batch(lats, lons)) / n
+        escalar = medir(lambda: [indice.buscar(lat, lon) for lat, lon in zip(lats[:2000].tolist(), lons[:2000].tolist())], 3) / 2000
+        lineal = medir(lambda: recorrido_lineal(indice, lats, lons), 1) / n
+
+        print(f"{n_zonas:>6} {construir * 1e3:>14.2f} {batch * 1e6:>14.3f} {escalar * 1e6:>12.2f} {lineal * 1e6:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
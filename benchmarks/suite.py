@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Suite de benchmarks de las rutas calientes, con baseline en JSON
+
+Mide, sin red y con datos sinteticos, cada caso de CASOS: prediccion
+individual y por lotes, geolocalizacion, generacion del dataset a varios
+tamanos, entrenamiento, guardar/cargar (pickle y .forest) y el round trip
+completo de /predict por la app ASGI (httpx.ASGITransport, cache apagado).
+
+Cada caso se repite REPETICIONES veces y se reporta el tiempo por llamada:
+minimo y mediana. La comparacion contra el baseline usa el minimo (el menos
+afectado por el ruido de la maquina) y marca como regresion lo que sea mas
+lento que el baseline en mas de --umbral (por defecto 25%), despues de
+volver a medirlo REINTENTOS veces para descartar el ruido de la maquina; en
+ese caso el proceso termina con codigo 1. El baseline guarda tambien el entorno (CPU,
+Python, NumPy, scikit-learn): comparar contra el de otra maquina solo sirve
+como referencia.
+
+Ejecutar: python -m benchmarks.suite [--solo predecir,geo] [--guardar] [--umbral 0.25]
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+
+BASELINE = Path(__file__).resolve().parent / "baselines" / "suite.json"
+REPETICIONES = 10
+UMBRAL = 0.25
+# Mediciones extra antes de dar por buena una regresion
+REINTENTOS = 2
+
+FILAS_ENTRENAMIENTO = 10_000
+INMUEBLE = {"metros": 95.0, "cuartos": 3, "banos": 2, "lat": -17.77, "lon": -63.19, "parking": 1, "piscina": 0}
+
+
+@contextlib.contextmanager
+def silencio():
+    """Descarta los print de los servicios mientras se mide"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def features_aleatorias(n: int, semilla: int = 0) -> list[dict]:
+    """Features de predecir() para n inmuebles, con la distribucion del dataset sintetico"""
+    rng = np.random.default_rng(semilla)
+    return [
+        {
+            'metros': float(rng.uniform(40, 300)),
+            'cuartos': int(rng.integers(1, 6)),
+            'banos': int(rng.integers(1, 4)),
+            'zona_id': int(rng.integers(0, 8)),
+            'parking': int(rng.integers(0, 2)),
+            'piscina': int(rng.integers(0, 2)),
+        }
+        for _ in range(n)
+    ]
+
+
+class Contexto:
+    """Estado compartido entre casos (modelo entrenado, directorio temporal)"""
+
+    def __init__(self, directorio: Path):
+        self.directorio = directorio
+        self._modelo = None
+
+    @property
+    def modelo(self):
+        if self._modelo is None:
+            from app.models.RandomForestModel import RandomForestModel
+            from app.services.DatasetService import DatasetService
+
+            with silencio():
+                self._modelo = RandomForestModel()
+                self._modelo.entrenar(DatasetService.generar_dataset_sintetico(FILAS_ENTRENAMIENTO, seed=0))
+        return self._modelo
+
+
+# Cada caso recibe el Contexto y devuelve (funcion a medir, llamadas por repeticion)
+
+def caso_predecir(ctx: Contexto):
+    features = features_aleatorias(1)[0]
+    return lambda: ctx.modelo.predecir(features), 500
+
+
+def caso_predecir_batch(n: int):
+    def caso(ctx: Contexto):
+        features = features_aleatorias(n)
+        return lambda: ctx.modelo.predecir_batch(features), max(1, 2000 // n)
+    return caso
+
+
+def caso_geolocalizacion(ctx: Contexto):
+    from app.services.GeolocationService import GeolocationService
+
+    return lambda: GeolocationService.analizar_ubicacion(-17.77, -63.19), 2000
+
+
+def caso_generar_dataset(n: int):
+    def caso(ctx: Contexto):
+        from app.services.DatasetService import DatasetService
+
+        return lambda: DatasetService.generar_dataset_sintetico(n, seed=0), max(1, 100_000 // n)
+    return caso
+
+
+def caso_entrenar(ctx: Contexto):
+    from app.models.RandomForestModel import RandomForestModel
+    from app.services.DatasetService import DatasetService
+
+    df = DatasetService.generar_dataset_sintetico(FILAS_ENTRENAMIENTO, seed=0)
+    return lambda: RandomForestModel().entrenar(df), 1
+
+
+def caso_guardar(sufijo: str):
+    def caso(ctx: Contexto):
+        ruta = ctx.directorio / f"guardar{sufijo}"
+        return lambda: ctx.modelo.guardar(ruta), 5
+    return caso
+
+
+def caso_cargar(sufijo: str):
+    def caso(ctx: Contexto):
+        from app.models.RandomForestModel import RandomForestModel
+
+        ruta = ctx.directorio / f"cargar{sufijo}"
+        with silencio():
+            ctx.modelo.guardar(ruta)
+        # mmap=False: mide la lectura completa y no solo el mapeo
+        return lambda: RandomForestModel().cargar(ruta, mmap=False), 5
+    return caso
+
+
+def caso_predict_asgi(ctx: Contexto):
+    import httpx
+    from app.api.routes import prediction
+    from server import app
+
+    ml_service = prediction.prediction_controller.ml_service
+    ml_service.instalar_modelo(ctx.modelo)
+    # Sin cache: cada /predict llega al modelo
+    ml_service.cache.max_size = 0
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    def predict():
+        response = loop.run_until_complete(client.post("/predict", json=INMUEBLE))
+        assert response.status_code == 200, response.text
+
+    return predict, 200
+
+
+CASOS = {
+    'predecir': caso_predecir,
+    'predecir_batch_100': caso_predecir_batch(100),
+    'predecir_batch_1000': caso_predecir_batch(1000),
+    'geolocalizacion': caso_geolocalizacion,
+    'generar_dataset_1k': caso_generar_dataset(1_000),
+    'generar_dataset_10k': caso_generar_dataset(10_000),
+    'generar_dataset_100k': caso_generar_dataset(100_000),
+    'entrenar_10k': caso_entrenar,
+    'guardar_pkl': caso_guardar('.pkl'),
+    'guardar_forest': caso_guardar('.forest'),
+    'cargar_pkl': caso_cargar('.pkl'),
+    'cargar_forest': caso_cargar('.forest'),
+    'predict_asgi': caso_predict_asgi,
+}
+
+
+def medir(fn, llamadas: int, repeticiones: int = REPETICIONES) -> dict:
+    """
+    Tiempo por llamada en milisegundos (minimo y mediana de las repeticiones)
+
+    Como timeit, con el recolector de basura apagado mientras se mide.
+    """
+    with silencio():
+        fn()  # calentamiento
+        tiempos = []
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                for _ in range(llamadas):
+                    fn()
+                tiempos.append((time.perf_counter() - inicio) / llamadas * 1e3)
+        finally:
+            gc.enable()
+    return {
+        'min_ms': round(min(tiempos), 4),
+        'mediana_ms': round(statistics.median(tiempos), 4),
+        'llamadas': llamadas,
+        'repeticiones': repeticiones
+    }
+
+
+def entorno() -> dict:
+    """Maquina y versiones con las que se midio"""
+    import sklearn
+
+    return {
+        'procesador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'sistema': platform.platform()
+    }
+
+
+def comparar(resultados: dict, baseline: dict, umbral: float) -> dict:
+    """
+    Variacion de cada caso contra el baseline
+
+    Args:
+        resultados: Caso -> medicion de medir()
+        baseline: Caso -> medicion guardada
+        umbral: Variacion relativa del minimo a partir de la cual se marca
+
+    Returns:
+        Caso -> (variacion relativa o None si el caso es nuevo, estado)
+        con estado 'regresion', 'mejora', 'igual' o 'nuevo'
+    """
+    comparacion = {}
+    for nombre, medicion in resultados.items():
+        anterior = baseline.get(nombre)
+        if anterior is None:
+            comparacion[nombre] = (None, 'nuevo')
+            continue
+        variacion = medicion['min_ms'] / anterior['min_ms'] - 1
+        estado = 'regresion' if variacion > umbral else 'mejora' if variacion < -umbral else 'igual'
+        comparacion[nombre] = (variacion, estado)
+    return comparacion
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks con baseline")
+    parser.add_argument("--solo", help="Casos a correr: prefijos separados por coma (por defecto todos)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE, help=f"JSON del baseline (por defecto {BASELINE})")
+    parser.add_argument("--guardar", action="store_true", help="Guardar los resultados como baseline nuevo")
+    parser.add_argument("--umbral", type=float, default=UMBRAL, help="Variacion que cuenta como regresion (0.25 = 25%%)")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES, help="Repeticiones por caso")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = _argumentos()
+    prefijos = args.solo.split(',') if args.solo else None
+    casos = {n: c for n, c in CASOS.items() if prefijos is None or any(n.startswith(p) for p in prefijos)}
+
+    guardado = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    baseline = guardado['resultados'] if guardado else {}
+    mismo_entorno = guardado is not None and guardado['entorno'] == entorno()
+    if guardado and not mismo_entorno:
+        print(f"[Advertencia] El baseline se midio en otro entorno: {guardado['entorno']}")
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = Contexto(Path(tmp))
+        print("=" * 78)
+        print(f"{'caso':<24} {'min ms':>12} {'mediana ms':>12} {'baseline ms':>12} {'variacion':>14}")
+        print("=" * 78)
+        for nombre, caso in casos.items():
+            with silencio():
+                fn, llamadas = caso(ctx)
+            resultados[nombre] = medir(fn, llamadas, args.repeticiones)
+            variacion, estado = comparar({nombre: resultados[nombre]}, baseline, args.umbral)[nombre]
+
+            # Una regresion se confirma midiendo de nuevo: se queda la mejor medicion
+            for _ in range(REINTENTOS):
+                if estado != 'regresion':
+                    break
+                repeticion = medir(fn, llamadas, args.repeticiones)
+                if repeticion['min_ms'] < resultados[nombre]['min_ms']:
+                    resultados[nombre] = repeticion
+                variacion, estado = comparar({nombre: resultados[nombre]}, baseline, args.umbral)[nombre]
+
+            anterior = f"{baseline[nombre]['min_ms']:.4f}" if nombre in baseline else '-'
+            marca = '-' if variacion is None else f"{variacion:+.0%}" + (' <<' if estado == 'regresion' else '')
+            print(f"{nombre:<24} {resultados[nombre]['min_ms']:>12.4f} {resultados[nombre]['mediana_ms']:>12.4f} "
+                  f"{anterior:>12} {marca:>14}")
+
+    regresiones = [n for n, (_, estado) in comparar(resultados, baseline, args.umbral).items() if estado == 'regresion']
+
+    if args.guardar:
+        # Los casos que no se corrieron conservan su baseline (si es de este entorno)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({
+            'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'entorno': entorno(),
+            'resultados': {**(baseline if mismo_entorno else {}), **resultados}
+        }, indent=2) + "\n")
+        print(f"\n[Guardado] Baseline en {args.baseline}")
+
+    if regresiones:
+        print(f"\n[Regresion] Mas de {args.umbral:.0%} por encima del baseline: {', '.join(regresiones)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
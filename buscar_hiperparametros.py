@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Script para buscar hiperparametros del Random Forest
+Evalua una grilla por precision (R2/MAE de test), latencia y tamano del
+modelo, muestra el frente de Pareto y opcionalmente registra el elegido
+
+Ejemplo:
+    python buscar_hiperparametros.py --n-estimators 25,50,100 --max-depth 6,10,None --registrar
+"""
+import argparse
+import json
+import sys
+import io
+import tempfile
+from pathlib import Path
+from app.services.DatasetService import DatasetService
+from app.services.HyperparameterSearch import GRILLA_DEFECTO, HyperparameterSearch, frente_pareto
+
+# Fix encoding para Windows
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+
+def _valores(texto: str) -> list:
+    """'6,10,None' -> [6, 10, None]"""
+    return [None if valor == 'None' else int(valor) for valor in texto.split(',')]
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description="Busqueda de hiperparametros del Random Forest")
+    for nombre, valores in GRILLA_DEFECTO.items():
+        parser.add_argument(
+            f"--{nombre.replace('_', '-')}", type=_valores, default=valores,
+            help=f"Valores separados por coma (por defecto {','.join(map(str, valores))})"
+        )
+    parser.add_argument("--dataset", help="Dataset .cols o CSV (por defecto DATASET_PATH)")
+    parser.add_argument("--n-samples", type=int, help="Generar un dataset sintetico de N filas en vez de leer uno")
+    parser.add_argument("--workers", type=int, help="Procesos del pool (por defecto, uno por core)")
+    parser.add_argument("--max-latencia-us", type=float, help="Tope de latencia individual para elegir")
+    parser.add_argument("--registrar", action="store_true", help="Registrar el modelo elegido como version nueva")
+    parser.add_argument("--sin-activar", action="store_true", help="Registrar sin apuntar `current` a la version nueva")
+    parser.add_argument("--salida", help="Guardar los resultados en un JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = _argumentos()
+    grilla = {nombre: getattr(args, nombre) for nombre in GRILLA_DEFECTO}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = args.dataset
+        if args.n_samples:
+            dataset = DatasetService.guardar_dataset(
+                DatasetService.generar_dataset_sintetico(args.n_samples), Path(tmp) / "dataset.cols"
+            )
+
+        with HyperparameterSearch(grilla, dataset, args.workers) as busqueda:
+            print("=" * 60)
+            print(f"BUSQUEDA DE HIPERPARAMETROS ({len(busqueda.configuraciones())} configuraciones)")
+            print("=" * 60)
+            resultados = busqueda.ejecutar()
+            frente = frente_pareto(resultados)
+
+            print(f"\n{'':2}{'n_est':>6} {'depth':>6} {'split':>6} {'R2':>8} {'MAE':>10} "
+                  f"{'1 fila us':>10} {'lote us/fila':>13} {'nodos':>9} {'KB':>8}")
+            for r in sorted(resultados, key=lambda r: -r['r2']):
+                h = r['hiperparametros']
+                marca = '*' if r in frente else ''
+                print(f"{marca:<2}{h['n_estimators']:>6} {str(h['max_depth']):>6} {h['min_samples_split']:>6} "
+                      f"{r['r2']:>8.4f} {r['mae']:>10.6f} {r['latencia_individual_us']:>10.1f} "
+                      f"{r['latencia_lote_us']:>13.2f} {r['nodos']:>9} {r['tamano_bytes'] / 1024:>8.0f}")
+            print("\n* = frente de Pareto (R2, latencia individual, latencia por fila en lote, tamano)")
+
+            elegido = busqueda.elegir(args.max_latencia_us)
+            print(f"\nElegido: {elegido['hiperparametros']} (R2 {elegido['r2']:.4f}, "
+                  f"{elegido['latencia_individual_us']:.1f} us)")
+
+            if args.salida:
+                Path(args.salida).write_text(json.dumps(
+                    {'resultados': resultados, 'frente': [r['indice'] for r in frente], 'elegido': elegido['indice']},
+                    indent=2
+                ), encoding='utf-8')
+                print(f"Resultados guardados en: {args.salida}")
+
+            if args.registrar:
+                version = busqueda.registrar(elegido, activar=not args.sin_activar)
+                print(f"Version registrada: {version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 """
 Main entry point for ML Service
+Con SERVER_WORKERS > 1 arranca workers pre-fork supervisados (ver WorkerSupervisor)
 """
 import uvicorn
 from server import app
+from app.api.routes import prediction
 from app.config.settings import settings
 
 if __name__ == "__main__":
@@ -11,13 +13,27 @@ if __name__ == "__main__":
     print(f"{settings.APP_NAME}")
     print(f"Version: {settings.APP_VERSION}")
     print(f"Port: {settings.PORT}")
+    print(f"Workers: {settings.SERVER_WORKERS}")
     print("Server: http://localhost:{settings.PORT}")
     print("Docs: http://localhost:{settings.PORT}/docs")
     print("=" * 60)
 
-    uvicorn.run(
-        app,
-        host=settings.HOST,
-        port=settings.PORT,
-        reload=False  # Desactivar reload para evitar conflictos
-    )
+    if settings.SERVER_WORKERS > 1:
+        from app.services.WorkerSupervisor import WorkerSupervisor
+
+        WorkerSupervisor(
+            app,
+            prediction.prediction_controller.ml_service,
+            workers=settings.SERVER_WORKERS,
+            host=settings.HOST,
+            port=settings.PORT,
+            intervalo_version=settings.SERVER_VERSION_POLL_SECONDS,
+            timeout_apagado=settings.SERVER_GRACEFUL_TIMEOUT
+        ).ejecutar()
+    else:
+        uvicorn.run(
+            app,
+            host=settings.HOST,
+            port=settings.PORT,
+            reload=False  # Desactivar reload para evitar conflictos
+        )
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Script de prueba de carga del servicio
+Genera requests realistas (distribucion del dataset sintetico, ubicaciones
+en todos los anillos y zonas especiales) a una tasa o concurrencia objetivo
+y reporta throughput, latencias p50/p95/p99/p999, errores y CPU/RSS
+
+Por defecto corre la app en este mismo proceso (httpx.ASGITransport); con
+--uvicorn levanta `python main.py` en un puerto libre y con --url apunta a
+un servidor ya corriendo. En proceso y con --uvicorn el registro, el
+modelo, el dataset y las observaciones van a un directorio temporal (con
+una copia de la version activa), salvo con --storage-real.
+
+Ejemplos:
+    python prueba_carga.py --concurrencia 32 --duracion 10 --salida base.json
+    python prueba_carga.py --uvicorn --rps 300 --duracion 30 --comparar base.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import httpx
+from app.config.settings import settings
+from app.models.ModelRegistry import ModelRegistry
+from app.services.LoadGenerator import (
+    LoadGenerator, MonitorRecursos, MEZCLA_DEFECTO, PERCENTILES,
+    comparar_reportes, generar_inmuebles, leer_mezcla
+)
+
+# Fix encoding para Windows
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+RAIZ = Path(__file__).resolve().parent
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio ML")
+    destino = parser.add_mutually_exclusive_group()
+    destino.add_argument("--uvicorn", action="store_true", help="Levantar `python main.py` en un puerto libre")
+    destino.add_argument("--url", help="Servidor ya corriendo (ej. http://127.0.0.1:5000)")
+    parser.add_argument("--pid", type=int, help="Con --url: proceso del servidor para medir CPU/RSS")
+    parser.add_argument("--storage-real", action="store_true",
+                        help="Usar el storage/ del repo (por defecto, un directorio temporal)")
+    carga = parser.add_mutually_exclusive_group()
+    carga.add_argument("--rps", type=float, help="Tasa objetivo (lazo abierto)")
+    carga.add_argument("--concurrencia", type=int, help="Clientes simultaneos (lazo cerrado, por defecto 16)")
+    parser.add_argument("--duracion", type=float, default=10.0, help="Segundos medidos")
+    parser.add_argument("--calentamiento", type=float, default=2.0, help="Segundos iniciales sin medir")
+    parser.add_argument("--mezcla", type=leer_mezcla, default=MEZCLA_DEFECTO,
+                        help="Proporciones por tipo (por defecto predict:0.95,batch:0.05)")
+    parser.add_argument("--lote", type=int, default=20, help="Inmuebles por request de /predict/batch")
+    parser.add_argument("--repetidos", type=float, default=0.1,
+                        help="Fraccion de /predict que repite un inmueble ya pedido")
+    parser.add_argument("--inmuebles", type=int, default=10_000, help="Inmuebles distintos generados")
+    parser.add_argument("--max-en-vuelo", type=int, default=1000, help="Tope de requests sin responder con --rps")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="Guardar el reporte en un JSON")
+    parser.add_argument("--comparar", help="Reporte JSON anterior contra el cual comparar")
+    return parser.parse_args()
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _almacenamiento_temporal(directorio: Path) -> dict:
+    """
+    Rutas de storage dentro de directorio, para no escribir en el del repo
+
+    Copia la version activa del registro (o MODEL_PATH) para medir el modelo
+    que se sirve; si no hay ninguno el servicio entrena uno, en el temporal.
+
+    Returns:
+        Variable de entorno -> ruta
+    """
+    rutas = {
+        'MODEL_REGISTRY_DIR': directorio / "registry",
+        'MODEL_PATH': directorio / "modelo.pkl",
+        'DATASET_PATH': directorio / "dataset.cols",
+        'OBSERVATIONS_LOG_DIR': directorio / "observations",
+        'OBSERVATIONS_DATASET_PATH': directorio / "observaciones.cols",
+    }
+    registro = ModelRegistry()
+    version = registro.version_actual()
+    if version is not None:
+        rutas['MODEL_REGISTRY_DIR'].mkdir()
+        for archivo in registro.directorio.glob(f"{version}.*"):
+            shutil.copy2(archivo, rutas['MODEL_REGISTRY_DIR'])
+        ModelRegistry(rutas['MODEL_REGISTRY_DIR']).activar(version)
+    elif settings.get_full_path(settings.MODEL_PATH).exists():
+        shutil.copy2(settings.get_full_path(settings.MODEL_PATH), rutas['MODEL_PATH'])
+    return {variable: str(ruta) for variable, ruta in rutas.items()}
+
+
+@contextlib.contextmanager
+def _servidor_uvicorn(entorno: dict):
+    """Levanta main.py, espera /ready y lo detiene al salir; devuelve (url, pid)"""
+    puerto = _puerto_libre()
+    env = {**os.environ, **entorno, 'PORT': str(puerto), 'HOST': '127.0.0.1'}
+    proceso = subprocess.Popen([sys.executable, "main.py"], cwd=RAIZ, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{puerto}"
+    try:
+        limite = time.monotonic() + 300
+        while True:
+            if proceso.poll() is not None:
+                raise RuntimeError(f"El servidor termino con codigo {proceso.returncode}")
+            try:
+                if httpx.get(f"{url}/ready", timeout=5).status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > limite:
+                raise TimeoutError("El servidor no quedo listo a tiempo")
+            time.sleep(0.2)
+        yield url, proceso.pid
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+async def _correr(args, url: str = None, pid: int = None) -> dict:
+    limites = httpx.Limits(max_connections=max(args.concurrencia or 0, args.max_en_vuelo))
+    if url is None:
+        from server import app
+        from app.api.routes import prediction
+
+        # Sin lifespan con ASGITransport: se prepara aca (modelo y calentamiento)
+        with contextlib.redirect_stdout(io.StringIO()):
+            prediction.prediction_controller.preparar()
+        cliente = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://carga",
+                                    timeout=30, limits=limites)
+    else:
+        cliente = httpx.AsyncClient(base_url=url, timeout=30, limits=limites)
+
+    async with cliente:
+        generador = LoadGenerator(
+            cliente,
+            generar_inmuebles(args.inmuebles, args.semilla),
+            mezcla=args.mezcla,
+            tamano_lote=args.lote,
+            repetidos=args.repetidos,
+            semilla=args.semilla,
+            monitor=MonitorRecursos(pid) if (pid or url is None) else _SinMonitor()
+        )
+        return await generador.ejecutar(
+            args.duracion, rps=args.rps, concurrencia=args.concurrencia,
+            calentamiento=args.calentamiento, max_en_vuelo=args.max_en_vuelo
+        )
+
+
+class _SinMonitor(MonitorRecursos):
+    """Servidor externo sin --pid: no hay proceso que medir"""
+
+    def iniciar(self):
+        pass
+
+    def muestrear(self):
+        pass
+
+    def resultado(self) -> dict:
+        return {'pid': None, 'cpu_seconds': None, 'cpu_cores': None, 'rss_max_mb': None}
+
+
+def _formato(valor) -> str:
+    """Celda de la tabla de comparacion ('-' si falta el valor)"""
+    return f"{valor:>12.4g}" if valor is not None else f"{'-':>12}"
+
+
+def _imprimir(reporte: dict, destino: str):
+    config = reporte['config']
+    carga = f"{config['target_rps']} rps" if config['mode'] == 'rps' else f"{config['concurrency']} clientes"
+    recursos = reporte['resources']
+    print("=" * 60)
+    print(f"PRUEBA DE CARGA ({destino}, {carga}, {config['duration_seconds']} s)")
+    print("=" * 60)
+    print(f"Requests: {reporte['requests']}  OK: {reporte['ok']}  Error rate: {reporte['error_rate']:.4%}")
+    if reporte['errors']:
+        print(f"Errores: {reporte['errors']}")
+    print(f"Throughput: {reporte['throughput_rps']:.1f} req/s")
+    print(f"\n{'latencia ms':<12} {'media':>9} " + ' '.join(f"{p:>9}" for p in PERCENTILES) + f" {'max':>9}")
+    filas = [('total', reporte['latency_ms'])] + list(reporte['latency_ms_by_type'].items())
+    for nombre, lat in filas:
+        valores = [lat['mean'], *(lat[p] for p in PERCENTILES), lat['max']]
+        print(f"{nombre:<12} " + ' '.join(f"{v:>9.2f}" if v is not None else f"{'-':>9}" for v in valores))
+    if recursos['cpu_cores'] is not None:
+        print(f"\nCPU: {recursos['cpu_cores']:.2f} cores ({recursos['cpu_seconds']:.1f} s)  "
+              f"RSS max: {recursos['rss_max_mb']:.0f} MB  (pid {recursos['pid']})")
+
+
+def main():
+    args = _argumentos()
+    if not args.rps and not args.concurrencia:
+        args.concurrencia = 16
+
+    with contextlib.ExitStack() as pila:
+        entorno = {}
+        if not args.url and not args.storage_real:
+            entorno = _almacenamiento_temporal(Path(pila.enter_context(tempfile.TemporaryDirectory())))
+
+        if args.uvicorn:
+            with _servidor_uvicorn(entorno) as (url, pid):
+                reporte = asyncio.run(_correr(args, url, pid))
+            destino = 'uvicorn'
+        elif args.url:
+            reporte = asyncio.run(_correr(args, args.url, args.pid))
+            destino = args.url
+        else:
+            # Antes de importar server: el controller toma las rutas al crearse
+            for variable, ruta in entorno.items():
+                setattr(settings, variable, ruta)
+            reporte = asyncio.run(_correr(args))
+            destino = 'en proceso'
+    reporte['target'] = destino
+
+    _imprimir(reporte, destino)
+
+    if args.comparar:
+        base = json.loads(Path(args.comparar).read_text(encoding='utf-8'))
+        print(f"\n{'metrica':<22} {'base':>12} {'actual':>12} {'variacion':>10}")
+        for nombre, antes, despues, variacion in comparar_reportes(base, reporte):
+            print(f"{nombre:<22} {_formato(antes)} {_formato(despues)} "
+                  f"{f'{variacion:+.1%}' if variacion is not None else '-':>10}")
+
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(reporte, indent=2) + "\n", encoding='utf-8')
+        print(f"\n[Guardado] Reporte en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
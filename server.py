@@ -2,10 +2,29 @@
 FastAPI Application - Entry Point
 Similar a index.php de Laravel
 """
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.config.settings import settings
+from app.api.middleware.MetricsMiddleware import MetricsMiddleware
+from app.api.middleware.ProfilingMiddleware import ProfilingMiddleware
 from app.api.routes import prediction
+from app.services.MetricsRegistry import metricas
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranque: carga del modelo y calentamiento en segundo plano
+
+    El servidor acepta conexiones enseguida (/health responde) y /ready
+    pasa a 200 cuando termina PredictionController.preparar.
+    """
+    threading.Thread(target=prediction.prediction_controller.preparar, name='arranque', daemon=True).start()
+    yield
+
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -13,7 +32,8 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="Servicio de Machine Learning para predicción de precios de alquiler",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configurar CORS (permitir requests desde Laravel)
@@ -25,6 +45,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Perfil por request con X-Profile: 1 (sin la opcion no se instala)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Contar y medir los requests (GET /metrics)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Registrar rutas
 app.include_router(prediction.router, prefix="", tags=["ML"])
 
@@ -45,7 +73,8 @@ async def root():
 @app.get("/health", tags=["Health"])
 async def health_check():
     """
-    Endpoint de health check
+    Endpoint de health check (liveness: el proceso responde; si el modelo
+    ya se puede usar lo dice /ready)
     """
     return {
         "status": "healthy",
@@ -53,6 +82,26 @@ async def health_check():
     }
 
 
+@app.get("/ready", tags=["Health"])
+async def ready_check():
+    """
+    Readiness: 200 cuando el modelo esta cargado y ya hizo una prediccion
+    de calentamiento; 503 mientras arranca
+    """
+    return await prediction.prediction_controller.ready()
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+    async def metrics():
+        """
+        Metricas en formato de texto de Prometheus: latencia por etapa de la
+        prediccion, requests por ruta y estado, duracion de entrenamientos y
+        de cargas del modelo, version en uso
+        """
+        return PlainTextResponse(metricas.exponer(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 if __name__ == "__main__":
     import uvicorn
 
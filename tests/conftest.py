@@ -0,0 +1,14 @@
+"""
+Configuracion comun de tests
+Redirige modelo y dataset a un directorio temporal para no tocar storage/
+"""
+import os
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="ml_service_tests_")
+
+os.environ.setdefault("MODEL_PATH", os.path.join(_TMP_DIR, "models", "random_forest_model.pkl"))
+os.environ.setdefault("MODEL_REGISTRY_DIR", os.path.join(_TMP_DIR, "models", "registry"))
+os.environ.setdefault("DATASET_PATH", os.path.join(_TMP_DIR, "datasets", "synthetic_data.cols"))
+os.environ.setdefault("OBSERVATIONS_LOG_DIR", os.path.join(_TMP_DIR, "observations"))
+os.environ.setdefault("OBSERVATIONS_DATASET_PATH", os.path.join(_TMP_DIR, "datasets", "observaciones.cols"))
@@ -0,0 +1,73 @@
+"""
+Tests para la prediccion por lotes
+"""
+from fastapi.testclient import TestClient
+from server import app
+
+client = TestClient(app)
+
+INMUEBLE_CENTRO = {
+    "metros": 80.0,
+    "cuartos": 2,
+    "banos": 1,
+    "lat": -17.783889,
+    "lon": -63.182222,
+    "parking": 1,
+    "piscina": 0
+}
+
+INMUEBLE_EQUIPETROL = {
+    "metros": 120.0,
+    "cuartos": 3,
+    "banos": 2,
+    "lat": -17.768,
+    "lon": -63.195,
+    "parking": 1,
+    "piscina": 1
+}
+
+
+def test_predict_batch_mismo_resultado_que_individual():
+    """Cada elemento del lote coincide con su prediccion individual"""
+    inmuebles = [INMUEBLE_CENTRO, INMUEBLE_EQUIPETROL, INMUEBLE_CENTRO]
+
+    response = client.post("/predict/batch", json={"inmuebles": inmuebles})
+    assert response.status_code == 200
+
+    data = response.json()["data"]
+    assert data["total"] == 3
+    assert data["exitosos"] == 3
+    assert data["errores"] == []
+
+    for inmueble, resultado in zip(inmuebles, data["resultados"]):
+        individual = client.post("/predict", json=inmueble).json()["data"]
+        assert resultado == individual
+
+    assert data["resultados"][1]["zona_especial"] == "Equipetrol"
+
+
+def test_predict_batch_errores_por_indice():
+    """Los inmuebles invalidos se reportan por indice sin fallar el lote"""
+    invalido = dict(INMUEBLE_CENTRO, metros=-10)
+    fuera_de_rango = dict(INMUEBLE_CENTRO, lat=-16.5)
+
+    response = client.post(
+        "/predict/batch",
+        json={"inmuebles": [invalido, INMUEBLE_CENTRO, fuera_de_rango]}
+    )
+    assert response.status_code == 200
+
+    data = response.json()["data"]
+    assert data["total"] == 3
+    assert data["exitosos"] == 1
+    assert data["resultados"][0] is None
+    assert data["resultados"][1]["precio_sugerido"] > 0
+    assert data["resultados"][2] is None
+    assert [e["index"] for e in data["errores"]] == [0, 2]
+    assert data["errores"][0]["errores"][0]["loc"] == ["metros"]
+
+
+def test_predict_batch_vacio():
+    """Un lote vacio es un error de validacion"""
+    response = client.post("/predict/batch", json={"inmuebles": []})
+    assert response.status_code == 422
@@ -0,0 +1,106 @@
+"""
+Tests para la generacion vectorizada de datasets sinteticos
+"""
+import numpy as np
+import pandas as pd
+from app.services.DatasetService import DatasetService, leer_columnas
+
+COLUMNAS = ['metros_cuadrados', 'num_habitacion', 'num_banos', 'zona_id', 'parking', 'piscina', 'precio_eth']
+
+
+def test_determinista_por_semilla():
+    a = DatasetService.generar_dataset_sintetico(1000, seed=7)
+    b = DatasetService.generar_dataset_sintetico(1000, seed=7)
+    c = DatasetService.generar_dataset_sintetico(1000, seed=8)
+
+    assert list(a.columns) == COLUMNAS
+    pd.testing.assert_frame_equal(a, b)
+    assert not a.equals(c)
+
+
+def test_respeta_reglas_de_precio():
+    df = DatasetService.generar_dataset_sintetico(50000, seed=1)
+
+    assert df['metros_cuadrados'].between(30, 249).all()
+    assert df['num_habitacion'].between(1, 5).all()
+    assert (df['num_banos'] >= 1).all() and (df['num_banos'] <= df['num_habitacion']).all()
+    assert set(df['zona_id']) <= set(DatasetService.PRECIOS_BASE_ETH)
+    assert abs(df['parking'].mean() - 0.60) < 0.01
+    assert abs(df['piscina'].mean() - 0.15) < 0.01
+
+    frecuencias = df['zona_id'].value_counts(normalize=True)
+    for zona, probabilidad in DatasetService.PROBABILIDAD_ZONAS.items():
+        assert abs(frecuencias.get(zona, 0) - probabilidad) < 0.01
+
+    sin_ruido = (
+        df['zona_id'].map(DatasetService.PRECIOS_BASE_ETH)
+        + df['metros_cuadrados'] * 0.0001
+        + df['num_habitacion'] * 0.003
+        + df['num_banos'] * 0.002
+        + df['parking'] * 0.008
+        + df['piscina'] * 0.015
+    )
+    ruido = df['precio_eth'] / sin_ruido
+    assert ruido.between(0.8999, 1.1001).all()
+
+
+def test_sharded_igual_al_dataset_en_memoria(tmp_path):
+    """El contenido depende de la semilla y el tamano de shard, no de los workers"""
+    esperado = DatasetService.generar_dataset_sintetico(2500, seed=3, filas_por_shard=1000)
+
+    secuencial = DatasetService.generar_dataset_sharded(2500, tmp_path / "uno", seed=3, filas_por_shard=1000)
+    paralelo = DatasetService.generar_dataset_sharded(2500, tmp_path / "dos", seed=3, filas_por_shard=1000, workers=2)
+
+    assert [ruta.name for ruta in secuencial] == ['part-00000.cols', 'part-00001.cols', 'part-00002.cols']
+    for rutas in (secuencial, paralelo):
+        df = pd.concat([DatasetService.cargar_dataset(ruta) for ruta in rutas], ignore_index=True)
+        pd.testing.assert_frame_equal(df, esperado)
+    assert np.array_equal(DatasetService.cargar_dataset(paralelo[-1])['precio_eth'], esperado['precio_eth'].iloc[2000:])
+
+
+def test_columnar_ida_y_vuelta_con_dtypes_compactos(tmp_path):
+    df = DatasetService.generar_dataset_sintetico(500, seed=5)
+    ruta = DatasetService.guardar_dataset(df, tmp_path / "datos.cols")
+
+    assert sorted(p.name for p in ruta.iterdir()) == sorted([f"{col}.npy" for col in COLUMNAS] + ['schema.json'])
+    cargado = DatasetService.cargar_dataset(ruta)
+    assert list(cargado.columns) == COLUMNAS
+    assert dict(cargado.dtypes) == {col: np.dtype(dtype) for col, dtype in DatasetService.ESQUEMA.items()}
+    pd.testing.assert_frame_equal(cargado, df)
+    assert isinstance(leer_columnas(ruta)['precio_eth'], np.memmap)
+
+    # Sobrescribir reemplaza el directorio completo, sin restos del temporal
+    DatasetService.guardar_dataset(df.iloc[:10], ruta)
+    assert len(DatasetService.cargar_dataset(ruta)) == 10
+    assert [p.name for p in tmp_path.iterdir()] == ['datos.cols']
+
+
+def test_convertir_csv(tmp_path):
+    df = DatasetService.generar_dataset_sintetico(1234, seed=9)
+    csv = DatasetService.guardar_dataset(df, tmp_path / "datos.csv")
+
+    destino = DatasetService.convertir_csv(csv, filas_por_bloque=500)
+
+    assert destino == tmp_path / "datos.cols"
+    desde_csv = DatasetService.cargar_dataset(csv)
+    assert dict(desde_csv.dtypes) == dict(df.dtypes)
+    pd.testing.assert_frame_equal(DatasetService.cargar_dataset(destino), desde_csv)
+
+
+def test_cols_inexistente_se_convierte_desde_el_csv(tmp_path, monkeypatch):
+    from app.config.settings import settings
+
+    df = DatasetService.generar_dataset_sintetico(300, seed=3)
+    # Ids de zonas de poligonos GeoJSON: no entran en int8
+    df.loc[:1, 'zona_id'] = [201, 1000]
+    df = df.astype(DatasetService.ESQUEMA)
+    DatasetService.guardar_dataset(df, tmp_path / "datos.csv")
+    monkeypatch.setattr(settings, 'DATASET_PATH', str(tmp_path / "datos.cols"))
+
+    # Checkout nuevo: solo esta el CSV
+    assert DatasetService.contar_filas() == 300
+    cargado = DatasetService.cargar_dataset()
+
+    assert (tmp_path / "datos.cols" / "schema.json").exists()
+    assert list(cargado['zona_id'][:2]) == [201, 1000]
+    pd.testing.assert_frame_equal(cargado, df)
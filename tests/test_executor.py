@@ -0,0 +1,142 @@
+"""
+Tests para InferenceExecutor y la inferencia fuera del event loop
+"""
+import asyncio
+import gc
+import time
+import httpx
+import pytest
+from app.api.routes import prediction
+from app.services.InferenceExecutor import InferenceExecutor, ColaLlenaError
+from server import app
+
+INMUEBLE = {"metros": 80.0, "cuartos": 2, "banos": 1, "lat": -17.783889, "lon": -63.182222}
+
+
+class ServicioLento:
+    """Servicio falso cuya prediccion bloquea el thread `demora` segundos"""
+
+    def __init__(self, demora: float):
+        self.demora = demora
+
+    def modelo_entrenado(self):
+        return None
+
+    def predecir_precio(self, request):
+        time.sleep(self.demora)
+        return request
+
+
+def test_cola_llena_y_timeout():
+    executor = InferenceExecutor(ServicioLento(0.2), 'thread', workers=1, max_pendientes=2, timeout_segundos=0.05)
+
+    async def escenario():
+        resultados = await asyncio.gather(
+            *[executor.ejecutar('predecir_precio', i) for i in range(3)],
+            return_exceptions=True
+        )
+        return [type(r) for r in resultados]
+
+    tipos = asyncio.run(escenario())
+    executor.cerrar()
+
+    assert tipos.count(ColaLlenaError) == 1
+    assert tipos.count(TimeoutError) == 2
+    stats = executor.estadisticas()
+    assert (stats['rejected'], stats['timeouts'], stats['pending']) == (1, 2, 0)
+
+
+class ServicioSinModelo(ServicioLento):
+    """Servicio falso cuyo modelo tarda `carga` segundos en cargarse/entrenarse"""
+
+    def __init__(self, carga: float):
+        super().__init__(0)
+        self.carga = carga
+
+    def modelo_entrenado(self):
+        time.sleep(self.carga)
+
+
+def test_carga_del_modelo_no_bloquea_el_loop():
+    executor = InferenceExecutor(ServicioSinModelo(0.3), 'thread', workers=1, max_pendientes=4, timeout_segundos=0)
+
+    async def escenario():
+        primera = asyncio.create_task(executor.ejecutar('predecir_precio', 1))
+        # Mientras el modelo se carga el loop sigue libre: el sleep no se atrasa
+        inicio = time.perf_counter()
+        await asyncio.sleep(0.01)
+        atraso = time.perf_counter() - inicio - 0.01
+        return atraso, await primera
+
+    atraso, resultado = asyncio.run(escenario())
+    executor.cerrar()
+
+    assert resultado == 1
+    assert atraso < 0.1
+
+
+def test_modo_desconocido():
+    with pytest.raises(ValueError):
+        InferenceExecutor(ServicioLento(0), 'fork', workers=1, max_pendientes=1, timeout_segundos=1)
+
+
+async def _latencia_health_saturado(modo: str) -> float:
+    """Peor latencia de /health mientras 8 /predict ocupan el servicio"""
+    controller = prediction.prediction_controller
+    # Solo el executor: sin micro-lotes, cada /predict es una llamada
+    anterior = controller.executor, controller.batcher
+    controller.batcher = None
+    controller.executor = InferenceExecutor(
+        ServicioLento(0.1), modo, workers=2, max_pendientes=64, timeout_segundos=10
+    )
+    # Que una recoleccion de basura de tests anteriores no cuente como bloqueo
+    gc.collect()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            predicts = [asyncio.create_task(client.post("/predict", json=INMUEBLE)) for _ in range(8)]
+
+            # Cada chequeo se pide 20 ms despues del anterior; si el loop esta
+            # bloqueado, la espera extra cuenta como latencia de /health
+            peor = 0.0
+            for _ in range(5):
+                inicio = time.perf_counter()
+                await asyncio.sleep(0.02)
+                response = await client.get("/health")
+                peor = max(peor, time.perf_counter() - inicio - 0.02)
+                assert response.status_code == 200
+
+            await asyncio.gather(*predicts)
+        return peor
+    finally:
+        controller.executor.cerrar()
+        controller.executor, controller.batcher = anterior
+
+
+def test_health_no_se_bloquea_con_predict_saturado():
+    """Con el pool de threads /health responde sin esperar a las predicciones"""
+    assert asyncio.run(_latencia_health_saturado('thread')) < 0.05
+    assert asyncio.run(_latencia_health_saturado('inline')) > 0.1
+
+
+def test_predict_cola_llena_responde_503():
+    controller = prediction.prediction_controller
+    # Solo el executor: sin micro-lotes, cada /predict es una llamada
+    anterior = controller.executor, controller.batcher
+    controller.batcher = None
+    controller.executor = InferenceExecutor(
+        ServicioLento(0.2), 'thread', workers=1, max_pendientes=1, timeout_segundos=10
+    )
+
+    async def escenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[client.post("/predict", json=INMUEBLE) for _ in range(2)])
+
+    try:
+        codigos = sorted(r.status_code for r in asyncio.run(escenario()))
+    finally:
+        controller.executor.cerrar()
+        controller.executor, controller.batcher = anterior
+
+    assert codigos[1] == 503
@@ -0,0 +1,174 @@
+"""
+Tests de paridad del motor FlatForest contra sklearn
+"""
+import numpy as np
+import pytest
+from app.models.FlatForest import FlatForest
+from app.models.RandomForestModel import RandomForestModel
+from app.services.DatasetService import DatasetService
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    """Dataset sintetico almacenado en el repositorio"""
+    return DatasetService.cargar_dataset("storage/datasets/synthetic_data.csv")
+
+
+@pytest.fixture(scope="module")
+def modelo(dataset):
+    """Modelo entrenado sobre el dataset almacenado"""
+    model = RandomForestModel()
+    model.entrenar(dataset)
+    return model
+
+
+def test_paridad_exacta_por_arbol(modelo, dataset):
+    """Cada arbol exportado devuelve exactamente la misma hoja que sklearn"""
+    X = dataset[modelo.feature_names].to_numpy(dtype=np.float32)
+
+    esperado = np.column_stack([tree.predict(X) for tree in modelo.model.estimators_])
+    obtenido = modelo.engine.predecir_arboles(X)
+
+    assert np.array_equal(obtenido, esperado)
+
+
+def test_paridad_exacta_bosque(modelo, dataset):
+    """La media y la desviacion coinciden bit a bit con el backend sklearn"""
+    X = dataset[modelo.feature_names].to_numpy(dtype=np.float32)
+
+    media_sklearn, std_sklearn = modelo._predecir_bosque(X, backend='sklearn')
+    media_flat, std_flat = modelo._predecir_bosque(X, backend='flat')
+
+    assert np.array_equal(media_flat, media_sklearn)
+    assert np.array_equal(std_flat, std_sklearn)
+    np.testing.assert_allclose(media_flat, modelo.model.predict(dataset[modelo.feature_names]), rtol=1e-12)
+
+
+def test_predecir_mismo_resultado_con_ambos_backends(modelo, dataset):
+    """predecir_batch da la misma respuesta con 'flat' y con 'sklearn'"""
+    features_list = [{
+        'metros': row['metros_cuadrados'],
+        'cuartos': row['num_habitacion'],
+        'banos': row['num_banos'],
+        'zona_id': row['zona_id'],
+        'parking': row['parking'],
+        'piscina': row['piscina']
+    } for _, row in dataset.head(200).iterrows()]
+
+    assert modelo.predecir_batch(features_list, backend='flat') == \
+        modelo.predecir_batch(features_list, backend='sklearn')
+
+
+def test_backend_desconocido(modelo):
+    """Un backend desconocido es un ValueError"""
+    with pytest.raises(ValueError):
+        modelo.predecir({'metros': 80, 'cuartos': 2, 'banos': 1, 'zona_id': 3,
+                         'parking': 0, 'piscina': 0}, backend='onnx')
+
+
+def test_arrays_inmutables(modelo):
+    """El motor es de solo lectura (seguro entre threads)"""
+    assert isinstance(modelo.engine, FlatForest)
+    with pytest.raises(ValueError):
+        modelo.engine.value[0] = 1.0
+
+
+def test_predecir_en_espacio_trabajo_igual_que_predecir(modelo, dataset):
+    """La evaluacion sin asignaciones da exactamente el mismo resultado"""
+    X = dataset[modelo.feature_names].head(300).to_numpy(dtype=np.float64)
+    media, std = modelo.engine.predecir(X)
+
+    ws = modelo.espacio_trabajo(len(X))
+    ws.X[:len(X)] = X
+    media_ws, std_ws = modelo.engine.predecir_en(ws, len(X))
+
+    assert np.array_equal(media_ws, media)
+    assert np.array_equal(std_ws, std)
+
+
+def test_espacio_trabajo_se_reutiliza(modelo):
+    """El buffer se reutiliza mientras la capacidad alcance"""
+    ws = modelo.espacio_trabajo(10)
+    assert modelo.espacio_trabajo(5) is ws
+    assert modelo.espacio_trabajo(ws.capacidad + 1) is not ws
+
+
+def test_compactar_mismo_recorrido(modelo, dataset):
+    """Cada arbol compacto cae en una hoja con el mismo valor (redondeado a float32)"""
+    compacto = modelo.engine.compactar()
+    X = dataset[modelo.feature_names].to_numpy(dtype=np.float32)
+
+    assert compacto.threshold.dtype == np.float32 and compacto.value.dtype == np.float32
+    assert compacto.feature.dtype == np.uint8
+    assert compacto.left.dtype.itemsize <= 4 and compacto.left.dtype.kind == 'u'
+    assert compacto.n_nodos <= modelo.engine.n_nodos
+    assert np.array_equal(
+        compacto.predecir_arboles(X), modelo.engine.predecir_arboles(X).astype(np.float32)
+    )
+
+    ws = compacto.crear_espacio_trabajo(len(X))
+    ws.X[:len(X)] = X
+    media, std = compacto.predecir_en(ws, len(X))
+    assert np.array_equal(media, compacto.predecir(X)[0])
+    np.testing.assert_allclose(media, modelo.engine.predecir(X)[0], rtol=1e-6)
+
+
+def test_compactar_fusiona_hojas_identicas():
+    """Un nodo con dos hojas del mismo valor pasa a ser hoja y sus hijos desaparecen"""
+    # Arbol 0: raiz -> (1: hoja 2.0) y (2: nodo -> hojas 3.0 y 3.0)
+    # Arbol 1: una sola hoja
+    bosque = FlatForest(
+        feature=np.array([0, 0, 1, 0, 0, 0], dtype=np.int64),
+        threshold=np.array([0.5, 0.0, 0.25, 0.0, 0.0, 0.0]),
+        left=np.array([1, 1, 3, 3, 4, 5], dtype=np.int64),
+        right=np.array([2, 1, 4, 3, 4, 5], dtype=np.int64),
+        value=np.array([2.5, 2.0, 3.0, 3.0, 3.0, 7.0]),
+        roots=np.array([0, 5], dtype=np.int64),
+        max_depth=2,
+        n_features=2
+    )
+
+    compacto = bosque.compactar()
+
+    assert compacto.n_nodos == 4
+    assert compacto.max_depth == 1
+    assert compacto.left.dtype == np.uint8
+    X = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0]])
+    assert np.array_equal(compacto.predecir_arboles(X), bosque.predecir_arboles(X))
+
+
+def test_umbral_float32_no_cambia_comparaciones():
+    """El umbral float32 deja cada float32 del mismo lado que el umbral float64"""
+    a = np.float32(0.1)
+    siguiente = np.nextafter(a, np.float32(1))
+    # Punto medio en float64 (como los umbrales de sklearn): redondea hacia arriba
+    umbral = (np.float64(a) + np.float64(siguiente)) / 2
+    bosque = FlatForest(
+        feature=np.zeros(3, dtype=np.int64),
+        threshold=np.array([umbral, 0.0, 0.0]),
+        left=np.array([1, 1, 2], dtype=np.int64),
+        right=np.array([2, 1, 2], dtype=np.int64),
+        value=np.array([0.0, -1.0, 1.0]),
+        roots=np.array([0], dtype=np.int64),
+        max_depth=1,
+        n_features=1
+    )
+    X = np.array([[a], [siguiente]], dtype=np.float32)
+
+    assert np.array_equal(bosque.compactar().predecir_arboles(X), bosque.predecir_arboles(X))
+
+
+def test_guardar_y_cargar_bosque(modelo, tmp_path):
+    compacto = modelo.engine.compactar()
+    ruta = tmp_path / "bosque.forest"
+    compacto.guardar(ruta, {'feature_names': modelo.feature_names})
+
+    cargado, metadatos = FlatForest.cargar(ruta)
+
+    assert metadatos == {'feature_names': modelo.feature_names}
+    assert FlatForest.es_archivo_compacto(ruta)
+    for nombre in ('feature', 'threshold', 'left', 'right', 'value', 'roots'):
+        assert np.array_equal(getattr(cargado, nombre), getattr(compacto, nombre))
+        assert getattr(cargado, nombre).dtype == getattr(compacto, nombre).dtype
+    with pytest.raises(ValueError):
+        cargado.value[0] = 1.0
@@ -0,0 +1,115 @@
+"""
+Tests para GeolocationService
+"""
+import numpy as np
+import pytest
+from geopy.distance import geodesic
+from app.services.GeolocationService import GeolocationService
+
+# Rango de Santa Cruz validado por PredictionRequest
+LAT_MIN, LAT_MAX = -18.0, -17.5
+LON_MIN, LON_MAX = -63.5, -62.5
+
+
+@pytest.fixture(scope="module")
+def grilla():
+    """Grilla regular sobre el rango validado"""
+    lats, lons = np.meshgrid(np.linspace(LAT_MIN, LAT_MAX, 41), np.linspace(LON_MIN, LON_MAX, 61))
+    return lats.ravel(), lons.ravel()
+
+
+def test_error_maximo_contra_geopy(grilla):
+    """La distancia vectorizada difiere de geopy en menos de 0.13 m"""
+    lats, lons = grilla
+    esperado = np.array([
+        geodesic(GeolocationService.CENTRO_SCZ, (lat, lon)).kilometers
+        for lat, lon in zip(lats, lons)
+    ])
+
+    distancias = GeolocationService.calcular_distancias(lats, lons)
+
+    assert np.max(np.abs(distancias - esperado)) < 0.00013
+
+
+def test_batch_igual_que_individual(grilla):
+    """analizar_ubicacion_batch coincide punto a punto con las funciones escalares"""
+    lats, lons = grilla
+    batch = GeolocationService.analizar_ubicacion_batch(lats, lons)
+
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        distancia = GeolocationService.calcular_distancia(lat, lon)
+        zona = GeolocationService.detectar_zona_especial(lat, lon)
+
+        assert batch['distancia_centro_km'][i] == distancia
+        assert batch['sector'][i] == GeolocationService.detectar_sector(lat, lon)
+        assert batch['anillo'][i] == GeolocationService.detectar_anillo(lat, lon, distancia)
+        assert batch['zona_especial'][i] == (zona['nombre'] if zona else None)
+
+
+def test_analizar_ubicacion_zona_especial():
+    """Un punto dentro de Equipetrol usa el zona_id y multiplicador de la zona"""
+    ubicacion = GeolocationService.analizar_ubicacion(-17.768, -63.195)
+
+    assert ubicacion['zona_especial'] == 'Equipetrol'
+    assert ubicacion['zona_id'] == 101
+    assert ubicacion['multiplicador_precio'] == 1.5
+    assert ubicacion['anillo'] == 3
+
+
+def test_analizar_ubicacion_centro():
+    """El centro de la ciudad es el anillo 0"""
+    ubicacion = GeolocationService.analizar_ubicacion(*GeolocationService.CENTRO_SCZ)
+
+    assert ubicacion['anillo'] == 0
+    assert ubicacion['anillo_descripcion'] == "Centro"
+    assert ubicacion['distancia_centro_km'] == 0.0
+    assert ubicacion['zona_id'] == 0
+
+
+def _anillo_cuatro_sectores(distancia_km: float, sector: str) -> int:
+    """Busqueda anterior: primer radio medido del sector >= distancia"""
+    if distancia_km < 1.0:
+        return 0
+    radios_sector = GeolocationService.ANILLOS_RADIOS_POR_SECTOR[sector]
+    for anillo in sorted(radios_sector):
+        if distancia_km <= radios_sector[anillo]:
+            return anillo
+    return 10
+
+
+@pytest.mark.parametrize("sector,rumbo", list(GeolocationService.RUMBOS_SECTOR.items()))
+def test_tabla_polar_igual_a_cuatro_sectores_en_el_centro_del_sector(sector, rumbo):
+    """En el rumbo central de cada sector la tabla polar da el anillo medido"""
+    distancias = np.round(np.arange(0.0, 14.0, 0.005), 2)
+    rumbos = np.full(len(distancias), rumbo)
+
+    anillos = GeolocationService.buscar_anillos(distancias, rumbos)
+
+    esperado = [_anillo_cuatro_sectores(d, sector) for d in distancias]
+    assert anillos.tolist() == esperado
+    assert [int(GeolocationService.buscar_anillos(d, rumbo)) for d in distancias] == esperado
+
+
+def test_tabla_polar_interpola_entre_sectores():
+    """A 45 grados los radios quedan entre los de norte y este"""
+    fila = GeolocationService.TABLA_POLAR[45]
+    norte = GeolocationService.TABLA_POLAR[0]
+    este = GeolocationService.TABLA_POLAR[90]
+
+    np.testing.assert_allclose(fila, (norte + este) / 2)
+    assert np.all(np.diff(GeolocationService.TABLA_POLAR, axis=1) > 0)
+
+
+def test_puntos_sobre_los_ejes_cardinales():
+    """Sobre los ejes norte-sur y este-oeste el anillo coincide con el de cuatro sectores"""
+    lat_c, lon_c = GeolocationService.CENTRO_SCZ
+    offsets = np.linspace(-0.12, 0.12, 241)
+    lats = np.concatenate([lat_c + offsets, np.full(len(offsets), lat_c)])
+    lons = np.concatenate([np.full(len(offsets), lon_c), lon_c + offsets])
+
+    batch = GeolocationService.analizar_ubicacion_batch(lats, lons)
+
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        distancia = GeolocationService.calcular_distancia(lat, lon)
+        sector = GeolocationService.detectar_sector(lat, lon)
+        assert batch['anillo'][i] == _anillo_cuatro_sectores(distancia, sector)
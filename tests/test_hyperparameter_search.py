@@ -0,0 +1,76 @@
+"""
+Tests para la busqueda de hiperparametros
+"""
+import pytest
+from app.models.ModelRegistry import ModelRegistry
+from app.models.RandomForestModel import RandomForestModel
+from app.services.DatasetService import DatasetService
+from app.services.HyperparameterSearch import HyperparameterSearch, frente_pareto
+
+
+def test_frente_pareto():
+    resultados = [
+        {'id': 'a', 'r2': 0.90, 'latencia': 10},
+        {'id': 'b', 'r2': 0.95, 'latencia': 20},
+        {'id': 'c', 'r2': 0.90, 'latencia': 15},   # dominado por a
+        {'id': 'd', 'r2': 0.80, 'latencia': 20},   # dominado por a y b
+        {'id': 'e', 'r2': 0.97, 'latencia': 50},
+    ]
+
+    frente = frente_pareto(resultados, {'r2': 'max', 'latencia': 'min'})
+
+    assert [r['id'] for r in frente] == ['e', 'b', 'a']
+
+
+def test_frente_pareto_incluye_el_tamano():
+    base = {'r2': 0.9, 'latencia_individual_us': 50.0, 'latencia_lote_us': 2.0}
+    resultados = [
+        {'id': 'chico', **base, 'tamano_bytes': 1_000},
+        {'id': 'grande', **base, 'tamano_bytes': 5_000},            # igual de bueno y mas pesado
+        {'id': 'preciso', **base, 'r2': 0.95, 'tamano_bytes': 9_000},
+    ]
+
+    assert [r['id'] for r in frente_pareto(resultados)] == ['preciso', 'chico']
+
+
+@pytest.fixture(scope="module")
+def busqueda(tmp_path_factory):
+    df = DatasetService.cargar_dataset("storage/datasets/synthetic_data.csv").head(2000)
+    ruta = DatasetService.guardar_dataset(df, tmp_path_factory.mktemp("busqueda") / "datos.csv")
+    grilla = {'n_estimators': [5, 20], 'max_depth': [3, 8], 'min_samples_split': [5]}
+
+    with HyperparameterSearch(grilla, ruta, workers=2) as busqueda:
+        busqueda.ejecutar(n_muestras_latencia=50)
+        yield busqueda
+
+
+def test_evalua_toda_la_grilla(busqueda):
+    resultados = busqueda.resultados
+
+    assert [r['hiperparametros'] for r in resultados] == busqueda.configuraciones()
+    for r in resultados:
+        assert r['latencia_individual_us'] > 0 and r['latencia_lote_us'] > 0
+        assert r['nodos'] > 0 and r['tamano_bytes'] > 0
+    # Mas profundidad: mas nodos y mejor ajuste
+    por_config = {(r['hiperparametros']['n_estimators'], r['hiperparametros']['max_depth']): r for r in resultados}
+    assert por_config[(20, 8)]['nodos'] > por_config[(20, 3)]['nodos']
+    assert por_config[(20, 8)]['r2'] > por_config[(20, 3)]['r2']
+
+    frente = frente_pareto(resultados)
+    assert busqueda.elegir() in frente
+    with pytest.raises(ValueError):
+        busqueda.elegir(max_latencia_us=0)
+
+
+def test_registrar_elegido(busqueda, tmp_path):
+    registry = ModelRegistry(tmp_path)
+    elegido = busqueda.elegir()
+
+    version = busqueda.registrar(elegido, registry=registry)
+
+    assert registry.version_actual() == version
+    assert registry.info(version)['hyperparameters'] == elegido['hiperparametros']
+    model = RandomForestModel()
+    model.cargar(registry.ruta(version))
+    assert model.model.n_estimators == elegido['hiperparametros']['n_estimators']
+    assert model.model.max_depth == elegido['hiperparametros']['max_depth']
@@ -0,0 +1,76 @@
+"""
+Tests del generador de carga
+"""
+import asyncio
+import httpx
+import numpy as np
+import pytest
+from app.api.routes import prediction
+from app.services.GeolocationService import GeolocationService
+from app.services.LoadGenerator import (
+    LoadGenerator, PERCENTILES, comparar_reportes, generar_inmuebles, leer_mezcla, ubicaciones_por_zona
+)
+from server import app
+
+
+def correr(**kwargs) -> dict:
+    prediction.prediction_controller.preparar()
+
+    async def prueba():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://carga") as cliente:
+            generador = LoadGenerator(cliente, generar_inmuebles(200), mezcla={'predict': 0.8, 'batch': 0.2},
+                                      tamano_lote=5, repetidos=0.2)
+            return await generador.ejecutar(0.5, calentamiento=0.2, **kwargs)
+
+    return asyncio.run(prueba())
+
+
+def test_ubicaciones_caen_en_su_zona():
+    rng = np.random.default_rng(1)
+    zonas = np.array([0, *range(1, 11), *(d['zona_id'] for d in GeolocationService.ZONAS_ESPECIALES.values())] * 50)
+    lats, lons = ubicaciones_por_zona(zonas, rng)
+
+    resultado = GeolocationService.analizar_ubicacion_batch(lats, lons)
+
+    assert np.mean(np.asarray(resultado['zona_id']) == zonas) >= 0.95
+
+
+def test_leer_mezcla():
+    assert leer_mezcla("predict:3,batch:1") == {'predict': 0.75, 'batch': 0.25}
+    assert leer_mezcla("predict") == {'predict': 1.0}
+    with pytest.raises(ValueError):
+        leer_mezcla("predict:1,train:1")
+    with pytest.raises(ValueError):
+        leer_mezcla("predict:0")
+
+
+def test_concurrencia_en_proceso():
+    reporte = correr(concurrencia=4)
+
+    assert reporte['requests'] > 0 and reporte['errors'] == {}
+    assert reporte['config']['mode'] == 'concurrency'
+    assert set(reporte['latency_ms']) >= set(PERCENTILES) | {'mean', 'max'}
+    assert set(reporte['latency_ms_by_type']) <= {'predict', 'batch'}
+    assert reporte['latency_ms']['p50'] <= reporte['latency_ms']['p99']
+
+
+def test_rps_en_proceso():
+    reporte = correr(rps=40)
+
+    assert reporte['errors'] == {}
+    assert 10 <= reporte['requests'] <= 30
+    assert reporte['resources']['rss_max_mb'] is None or reporte['resources']['rss_max_mb'] > 0
+
+
+def test_comparar_reportes():
+    base = {'throughput_rps': 100.0, 'error_rate': 0.0, 'latency_ms': {'p50': 2.0, 'p99': 10.0},
+            'resources': {'cpu_cores': 1.0, 'rss_max_mb': None}}
+    nuevo = {'throughput_rps': 120.0, 'error_rate': 0.0, 'latency_ms': {'p50': 1.0, 'p99': 10.0},
+             'resources': {'cpu_cores': 1.0, 'rss_max_mb': 90.0}}
+
+    filas = {nombre: (antes, despues, cambio) for nombre, antes, despues, cambio in comparar_reportes(base, nuevo)}
+
+    assert filas['throughput_rps'] == (100.0, 120.0, pytest.approx(0.2))
+    assert filas['latency_ms.p50'][2] == pytest.approx(-0.5)
+    assert filas['error_rate'][2] is None
+    assert filas['resources.rss_max_mb'][2] is None
@@ -0,0 +1,84 @@
+"""
+Tests del registro de metricas y de GET /metrics
+"""
+import re
+import threading
+from fastapi.testclient import TestClient
+from app.services.MetricsRegistry import MetricsRegistry
+from server import app
+
+client = TestClient(app)
+
+INMUEBLE = {"metros": 95.0, "cuartos": 3, "banos": 2, "lat": -17.77, "lon": -63.19, "parking": 1, "piscina": 0}
+
+
+def valor(texto: str, serie: str) -> float:
+    """Valor de una serie (nombre con etiquetas, tal cual) en la exposicion"""
+    coincidencia = re.search(rf"^{re.escape(serie)} (\S+)$", texto, re.MULTILINE)
+    assert coincidencia, f"Serie no encontrada: {serie}"
+    return float(coincidencia.group(1))
+
+
+def test_histograma_formato_prometheus():
+    registro = MetricsRegistry()
+    histograma = registro.histograma('demora_seconds', 'Demora', ('etapa',), buckets=(0.1, 1.0))
+    for segundos in (0.05, 0.1, 0.5, 3.0):
+        histograma.etiquetar('a').observar(segundos)
+
+    texto = registro.exponer()
+
+    assert "# TYPE demora_seconds histogram" in texto
+    assert valor(texto, 'demora_seconds_bucket{etapa="a",le="0.1"}') == 2
+    assert valor(texto, 'demora_seconds_bucket{etapa="a",le="1"}') == 3
+    assert valor(texto, 'demora_seconds_bucket{etapa="a",le="+Inf"}') == 4
+    assert valor(texto, 'demora_seconds_count{etapa="a"}') == 4
+    assert valor(texto, 'demora_seconds_sum{etapa="a"}') == 3.65
+
+
+def test_contador_sin_perdidas_entre_threads():
+    registro = MetricsRegistry()
+    contador = registro.contador('eventos_total', 'Eventos', ('tipo',))
+
+    def sumar():
+        for _ in range(20_000):
+            contador.etiquetar('x').incrementar()
+
+    threads = [threading.Thread(target=sumar) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert valor(registro.exponer(), 'eventos_total{tipo="x"}') == 160_000
+
+
+def test_threads_terminados_no_acumulan_celdas():
+    registro = MetricsRegistry()
+    serie = registro.contador('eventos_total', 'Eventos').etiquetar()
+
+    # Como los pools que reemplazan threads: 50 threads de vida corta
+    for _ in range(50):
+        thread = threading.Thread(target=lambda: [serie.incrementar() for _ in range(100)])
+        thread.start()
+        thread.join()
+
+    assert len(serie._celdas._celdas) <= 1
+    assert valor(registro.exponer(), 'eventos_total') == 5_000
+
+
+def test_metrics_registra_etapas_requests_y_version():
+    assert client.post("/predict", json=INMUEBLE).status_code == 200
+    assert client.get("/train/noexiste").status_code == 404
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    texto = response.text
+    for etapa in ('geolocalizacion', 'features', 'bosque', 'incertidumbre', 'multiplicador', 'respuesta'):
+        assert valor(texto, f'ml_prediction_stage_seconds_count{{stage="{etapa}"}}') >= 1
+    assert valor(texto, 'http_requests_total{method="POST",route="/predict",status="200"}') >= 1
+    # Plantilla de la ruta, no la URL
+    assert valor(texto, 'http_requests_total{method="GET",route="/train/{job_id}",status="404"}') >= 1
+    assert re.search(r'^ml_model_info\{version="[^"]+"\} 1$', texto, re.MULTILINE)
+    assert re.search(r'^ml_model_load_seconds_count\{format="\w+"\} \d+$', texto, re.MULTILINE)
@@ -0,0 +1,85 @@
+"""
+Tests para MicroBatcher
+"""
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.services.InferenceExecutor import InferenceExecutor
+from app.services.MicroBatcher import MicroBatcher
+from server import app
+
+
+class ServicioEco:
+    """Servicio falso: devuelve cada request multiplicado por 10 y anota los lotes"""
+
+    def __init__(self, demora: float = 0.02, falla: bool = False):
+        self.demora = demora
+        self.falla = falla
+        self.lotes = []
+
+    def modelo_entrenado(self):
+        return None
+
+    def predecir_precios_cache(self, requests):
+        self.lotes.append(len(requests))
+        time.sleep(self.demora)
+        if self.falla:
+            raise ValueError("fallo del modelo")
+        return [request * 10 for request in requests]
+
+
+def _correr(servicio, n: int, ventana_ms: float = 5, max_lote: int = 64, workers: int = 1):
+    executor = InferenceExecutor(servicio, 'thread', workers=workers, max_pendientes=64, timeout_segundos=10)
+    batcher = MicroBatcher(executor, ventana_ms=ventana_ms, max_lote=max_lote)
+
+    async def escenario():
+        return await asyncio.gather(*[batcher.predecir(i) for i in range(n)], return_exceptions=True)
+
+    try:
+        return asyncio.run(escenario()), batcher
+    finally:
+        executor.cerrar()
+
+
+def test_requests_concurrentes_van_en_lote():
+    """Con el worker ocupado los requests se acumulan y cada uno recibe su resultado"""
+    servicio = ServicioEco()
+    resultados, batcher = _correr(servicio, 20)
+
+    assert resultados == [i * 10 for i in range(20)]
+    # El primero sale solo (worker libre), el resto espera en cola
+    assert servicio.lotes == [1, 19]
+
+    stats = batcher.estadisticas()
+    assert (stats['batches'], stats['requests'], stats['mean_batch_size']) == (2, 20, 10.0)
+    assert stats['batch_size_histogram']['<=1'] == 1
+    assert stats['batch_size_histogram']['<=32'] == 1
+    assert stats['queue_delay_ms']['max'] > 0
+    assert (stats['in_flight'], stats['queued']) == (0, 0)
+
+
+def test_respeta_max_lote():
+    servicio = ServicioEco()
+    resultados, _ = _correr(servicio, 30, max_lote=8)
+
+    assert resultados == [i * 10 for i in range(30)]
+    assert max(servicio.lotes) <= 8
+    assert sum(servicio.lotes) == 30
+
+
+def test_error_del_lote_llega_a_cada_request():
+    resultados, _ = _correr(ServicioEco(falla=True), 5)
+
+    assert all(isinstance(r, ValueError) for r in resultados)
+
+
+def test_status_incluye_microbatch():
+    client = TestClient(app)
+    response = client.post("/predict", json={"metros": 80.0, "cuartos": 2, "banos": 1, "lat": -17.78, "lon": -63.18})
+    assert response.status_code == 200
+
+    data = client.get("/status").json()["data"]
+    if 'microbatch' not in data:
+        pytest.skip("Micro-lotes desactivados (MICROBATCH_WINDOW_MS=0)")
+    assert data['microbatch']['requests'] >= 1
@@ -0,0 +1,117 @@
+"""
+Tests de la carga del modelo mapeada en memoria compartida entre procesos
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+from app.models.FlatForest import FlatForest
+from app.models.ModelRegistry import ModelRegistry
+from app.models.RandomForestModel import RandomForestModel
+from app.services.DatasetService import DatasetService
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+# Worker: carga el .forest como lo hace el servicio, toca todas sus paginas,
+# avisa y espera a que esten todos vivos para medir su memoria; sigue vivo
+# hasta que se cierra su stdin para no alterar la medida de los demas
+WORKER = """
+import contextlib, io, json, re, sys
+from pathlib import Path
+from app.models.RandomForestModel import RandomForestModel
+
+ruta = sys.argv[1]
+model = RandomForestModel()
+with contextlib.redirect_stdout(io.StringIO()):
+    model.cargar(ruta)
+for array in (model.engine.feature, model.engine.threshold, model.engine.left,
+              model.engine.right, model.engine.value):
+    array.sum()
+print('listo', flush=True)
+sys.stdin.readline()
+
+campos = ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty')
+bosque = dict.fromkeys(campos, 0)
+dentro = False
+for linea in Path('/proc/self/smaps').read_text().splitlines():
+    if re.match(r'^[0-9a-f]+-[0-9a-f]+ ', linea):
+        dentro = linea.split()[-1] == ruta
+    elif dentro and linea.split(':')[0] in campos:
+        bosque[linea.split(':')[0]] += int(linea.split()[1])
+total = {
+    linea.split(':')[0]: int(linea.split()[1])
+    for linea in Path('/proc/self/smaps_rollup').read_text().splitlines()[1:]
+}
+print(json.dumps({'bosque': bosque, 'rss_kb': total['Rss'], 'pss_kb': total['Pss']}), flush=True)
+sys.stdin.readline()
+"""
+
+
+@pytest.fixture(scope="module")
+def ruta_bosque(tmp_path_factory):
+    """Un .forest de unos MB, registrado como lo hace el servicio"""
+    model = RandomForestModel()
+    model.entrenar(
+        DatasetService.generar_dataset_sintetico(20_000, seed=7),
+        hiperparametros={'n_estimators': 10, 'max_depth': None, 'min_samples_split': 2}
+    )
+    registry = ModelRegistry(tmp_path_factory.mktemp("registro"))
+    return registry.ruta_compacta(registry.registrar(model))
+
+
+def medir_workers(ruta: Path, n_workers: int) -> list[dict]:
+    """Memoria de n_workers procesos vivos a la vez con el mismo bosque cargado"""
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, str(ruta)], cwd=RAIZ,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(n_workers)
+    ]
+    try:
+        for worker in workers:
+            assert worker.stdout.readline().strip() == 'listo'
+        medidas = []
+        for worker in workers:
+            worker.stdin.write('\n')
+            worker.stdin.flush()
+            medidas.append(json.loads(worker.stdout.readline()))
+        return medidas
+    finally:
+        for worker in workers:
+            worker.stdin.close()
+            worker.wait(timeout=60)
+
+
+def test_carga_mmap_igual_a_lectura(ruta_bosque):
+    mapeado, metadatos = FlatForest.cargar(ruta_bosque)
+    leido, _ = FlatForest.cargar(ruta_bosque, mmap=False)
+
+    assert type(mapeado.threshold) is np.ndarray
+    assert not mapeado.threshold.flags.writeable
+    assert metadatos['hyperparameters']['n_estimators'] == 10
+    X = DatasetService.generar_dataset_sintetico(500, seed=8)[metadatos['feature_names']].to_numpy()
+    assert np.array_equal(mapeado.predecir(X)[0], leido.predecir(X)[0])
+
+
+@pytest.mark.skipif(not Path('/proc/self/smaps_rollup').exists(), reason="Mide memoria con /proc (Linux)")
+@pytest.mark.parametrize("n_workers", [1, 8])
+def test_rss_por_worker(ruta_bosque, n_workers):
+    """Con N workers cada uno tiene el bosque residente, pero le corresponde 1/N de sus paginas"""
+    kb_archivo = ruta_bosque.stat().st_size / 1024
+    assert kb_archivo > 1024
+
+    for medida in medir_workers(ruta_bosque, n_workers):
+        bosque = medida['bosque']
+        privado = bosque['Private_Clean'] + bosque['Private_Dirty']
+        # Todo el bosque residente en cada worker...
+        assert bosque['Rss'] >= 0.9 * kb_archivo, medida
+        if n_workers == 1:
+            assert bosque['Pss'] == bosque['Rss'], medida
+        else:
+            # ...pero las paginas son las mismas para todos: nada privado y
+            # la parte proporcional (PSS) es 1/N
+            assert privado == 0, medida
+            assert bosque['Pss'] <= bosque['Rss'] / n_workers + 8, medida
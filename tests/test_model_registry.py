@@ -0,0 +1,133 @@
+"""
+Tests para ModelRegistry y el cambio atomico de modelo
+"""
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from app.api.routes import prediction
+from app.models.ModelRegistry import ModelRegistry
+from app.models.RandomForestModel import RandomForestModel
+from app.schemas.PredictionRequest import PredictionRequest
+from app.services.DatasetService import DatasetService
+from server import app
+
+INMUEBLE = {"metros": 95.0, "cuartos": 3, "banos": 2, "lat": -17.77, "lon": -63.19, "parking": 1, "piscina": 0}
+
+
+@pytest.fixture(scope="module")
+def modelo():
+    model = RandomForestModel()
+    model.entrenar(DatasetService.generar_dataset_sintetico(200))
+    return model
+
+
+def test_versiones_inmutables_y_rollback(tmp_path, modelo):
+    registry = ModelRegistry(tmp_path)
+    assert registry.version_actual() is None
+
+    v1 = registry.registrar(modelo)
+    contenido_v1 = registry.ruta(v1).read_bytes()
+    v2 = registry.registrar(modelo, metadatos={'n_samples': 200})
+
+    assert (v1, v2) == ('v000001', 'v000002')
+    assert registry.version_actual() == v2
+    assert registry.ruta(v1).read_bytes() == contenido_v1
+    assert registry.info(v2)['n_samples'] == 200
+    assert [info['version'] for info in registry.listar()['versions']] == [v2, v1]
+    # Sin temporales sueltos
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        'current', 'v000001.forest', 'v000001.json', 'v000001.pkl', 'v000002.forest', 'v000002.json', 'v000002.pkl'
+    ]
+
+    assert registry.rollback() == v1
+    assert registry.version_actual() == v1
+    with pytest.raises(ValueError):
+        registry.rollback()
+    with pytest.raises(ValueError):
+        registry.activar('v999999')
+
+
+def test_registrar_sin_activar(tmp_path, modelo):
+    registry = ModelRegistry(tmp_path)
+    v1 = registry.registrar(modelo)
+    registry.registrar(modelo, activar=False)
+
+    assert registry.version_actual() == v1
+
+
+def test_version_modelo_siempre_str(tmp_path, modelo):
+    registry = ModelRegistry(tmp_path)
+    v1 = registry.registrar(modelo)
+
+    model = RandomForestModel()
+    assert model.cargar(registry.ruta(v1), version_modelo=v1)
+    assert model.version_modelo == v1
+
+    # Despues de una version del registro, entrenar o cargar sin version no falla
+    model.entrenar(DatasetService.generar_dataset_sintetico(200))
+    entrenada = model.version_modelo
+    assert model.cargar(registry.ruta(v1))
+    assert isinstance(entrenada, str) and len({v1, entrenada, model.version_modelo}) == 3
+
+
+def test_predict_durante_reentrenamientos():
+    """/predict nunca falla ni ve un modelo a medias mientras se reentrena"""
+    client = TestClient(app)
+    ml_service = prediction.prediction_controller.ml_service
+    request = PredictionRequest(**INMUEBLE)
+    assert client.post("/predict", json=INMUEBLE).status_code == 200
+
+    respuestas = []
+    errores = []
+    detener = threading.Event()
+
+    def martillar():
+        cliente = TestClient(app)
+        while not detener.is_set():
+            response = cliente.post("/predict", json=INMUEBLE)
+            if response.status_code != 200:
+                errores.append(response.text)
+            else:
+                respuestas.append(response.json()["data"]["precio_sugerido"])
+
+    hilos = [threading.Thread(target=martillar) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+
+    versiones = [ml_service.model.version_modelo]
+    try:
+        for n_samples in (150, 250, 350):
+            versiones.append(ml_service.entrenar_modelo(n_samples)['version'])
+    finally:
+        detener.set()
+        for hilo in hilos:
+            hilo.join()
+
+    assert errores == []
+    assert len(respuestas) > 0
+
+    # Cada respuesta corresponde a alguna de las versiones completas
+    esperados = {
+        ml_service._predecir_con(ml_service.cargar_version(version), [request])[0].precio_sugerido
+        for version in versiones
+    }
+    assert set(respuestas) <= esperados
+    assert ml_service.model.version_modelo == versiones[-1]
+
+
+def test_rollback_endpoint():
+    client = TestClient(app)
+    ml_service = prediction.prediction_controller.ml_service
+    ml_service.entrenar_modelo(150)
+    actual = ml_service.registry.version_actual()
+
+    response = client.post("/models/rollback")
+    assert response.status_code == 200
+    anterior = response.json()["data"]["current"]
+    assert anterior < actual
+    assert ml_service.model.version_modelo == anterior
+
+    data = client.get("/models").json()["data"]
+    assert data["current"] == data["serving"] == anterior
+
+    assert client.post("/models/rollback", params={"version": actual}).json()["data"]["current"] == actual
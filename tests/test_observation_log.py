@@ -0,0 +1,152 @@
+"""
+Tests del log de observaciones y de la ingesta que alimenta el reentrenamiento
+"""
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.api.routes import prediction
+from app.models.ObservationLog import ObservationLog, TAMANO_ENCABEZADO
+from app.services.DatasetService import leer_columnas
+from app.services.IngestService import IngestService
+from app.services.TrainingJobService import TrainingJobService
+from app.schemas.ObservationRequest import ObservationRequest
+from server import app
+
+client = TestClient(app)
+
+
+def observaciones(n: int, semilla: int = 0, observado_en: float = 1.0) -> dict:
+    rng = np.random.default_rng(semilla)
+    return {
+        'metros_cuadrados': rng.integers(40, 300, n),
+        'num_habitacion': rng.integers(1, 6, n),
+        'num_banos': rng.integers(1, 4, n),
+        'zona_id': rng.integers(0, 5, n),
+        'parking': rng.integers(0, 2, n),
+        'piscina': rng.integers(0, 2, n),
+        'precio_eth': rng.uniform(0.0005, 0.005, n),
+        'lat': rng.uniform(-17.9, -17.7, n),
+        'lon': rng.uniform(-63.3, -63.1, n),
+        'observado_en': np.full(n, observado_en),
+    }
+
+
+@pytest.fixture
+def log(tmp_path):
+    return ObservationLog(tmp_path / "observations", tmp_path / "observaciones.cols")
+
+
+def test_agregar_y_leer(log):
+    registros = log.registros(observaciones(10))
+    assert log.agregar(registros[:4]) == 4
+    assert log.agregar(registros[4:]) == 10
+
+    leidos = log.leer(log.activo)
+    assert log.pendientes() == 10
+    np.testing.assert_array_equal(leidos, registros)
+
+
+def test_registro_incompleto_se_descarta(log):
+    registros = log.registros(observaciones(3))
+    log.agregar(registros[:2])
+    # Write interrumpido a mitad del tercer registro
+    with open(log.activo, 'ab') as archivo:
+        archivo.write(registros[2:].tobytes()[:7])
+
+    assert log.pendientes() == 2
+    np.testing.assert_array_equal(log.leer(log.activo), registros[:2])
+
+    assert log.agregar(registros[2:]) == 3
+    np.testing.assert_array_equal(log.leer(log.activo), registros)
+
+
+def test_leer_rechaza_archivo_ajeno(log, tmp_path):
+    ruta = tmp_path / "otro.log"
+    ruta.write_bytes(b'\x00' * (TAMANO_ENCABEZADO + log.DTYPE.itemsize))
+    with pytest.raises(ValueError):
+        log.leer(ruta)
+
+
+def test_deduplicar_conserva_la_observacion_mas_reciente():
+    columnas = {campo: np.concatenate([valores, valores]) for campo, valores in observaciones(5).items()}
+    columnas['observado_en'][5:] = 2.0
+    columnas['precio_eth'][5:] += 1.0
+
+    unicas = ObservationLog.deduplicar(columnas)
+
+    assert len(unicas['precio_eth']) == 5
+    assert np.all(unicas['observado_en'] == 2.0)
+    np.testing.assert_allclose(np.sort(unicas['precio_eth']), np.sort(columnas['precio_eth'][5:]))
+
+
+def test_compactar_funde_deduplica_y_es_idempotente(log):
+    log.agregar(log.registros(observaciones(50, semilla=1)))
+    assert log.sellar() == 50
+    log.agregar(log.registros(observaciones(20, semilla=2)))
+
+    resumen = log.compactar()
+    assert resumen == {'compacted': 70, 'duplicates': 0, 'rows': 70}
+    assert log.pendientes() == 0 and log.sellados() == []
+
+    # Las mismas 50 de nuevo, mas recientes: reemplazan a las anteriores
+    log.agregar(log.registros(observaciones(50, semilla=1, observado_en=5.0)))
+    assert log.compactar() == {'compacted': 50, 'duplicates': 50, 'rows': 70}
+    assert log.compactar() == {'compacted': 0, 'duplicates': 0, 'rows': 70}
+
+    columnas = leer_columnas(log.dataset)
+    assert np.count_nonzero(np.asarray(columnas['observado_en']) == 5.0) == 50
+
+
+def test_post_observations_agrega_al_log():
+    ingest = prediction.prediction_controller.ingest
+    previas = ingest.log.pendientes()
+    inmueble = {"metros": 80.0, "cuartos": 2, "banos": 1, "lat": -17.78, "lon": -63.18,
+                "parking": 1, "piscina": 0, "precio_eth": 0.0015}
+
+    response = client.post("/observations", json={"observaciones": [inmueble] * 3})
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["accepted"] == 3 and data["pending"] == previas + 3
+    assert data["retraining_job"] is None
+    assert client.get("/observations").json()["data"]["pending"] == previas + 3
+
+    invalido = {**inmueble, "precio_eth": -1}
+    assert client.post("/observations", json={"observaciones": [inmueble, invalido]}).status_code == 422
+    assert ingest.log.pendientes() == previas + 3
+
+
+def test_umbral_lanza_reentrenamiento_con_observaciones(log):
+    servicio = TrainingJobService()
+    ingest = IngestService(log, servicio, umbral=300)
+
+    log.agregar(log.registros(observaciones(299)))
+    inmueble = ObservationRequest(metros=120.0, cuartos=3, banos=2, lat=-17.78, lon=-63.18,
+                                  parking=1, piscina=1, precio_eth=0.003)
+    resultado = ingest.ingestar([inmueble])
+
+    job = resultado["retraining_job"]
+    assert job is not None and job["source"] == "observations"
+    assert resultado["pending"] == 0
+
+    final = servicio.esperar(job["job_id"], timeout=120)
+    assert final["status"] == "completed", final["error"]
+    assert list(final["stage_seconds"]) == ['compactar', 'entrenar', 'guardar_modelo', 'total']
+    assert log.sellados() == []
+    assert len(leer_columnas(log.dataset)['precio_eth']) == 300
+
+
+def test_reentrenar_sin_observaciones(log):
+    with pytest.raises(ValueError):
+        IngestService(log, TrainingJobService()).reentrenar()
+
+
+def test_zona_id_de_poligonos_no_se_trunca(log):
+    datos = observaciones(2)
+    datos['zona_id'] = np.array([201, 1000])
+    assert log.agregar(log.registros(datos)) == 2
+    np.testing.assert_array_equal(log.leer(log.activo)['zona_id'], [201, 1000])
+
+    datos['zona_id'] = np.array([201, 40_000])
+    with pytest.raises(ValueError, match='zona_id'):
+        log.registros(datos)
@@ -0,0 +1,93 @@
+"""
+Tests para PredictionCache y su uso en MLPredictionService
+"""
+import pytest
+from app.schemas.PredictionRequest import PredictionRequest
+from app.services.MLPredictionService import MLPredictionService
+from app.services.PredictionCache import PredictionCache
+
+INMUEBLE = dict(metros=80.0, cuartos=2, banos=1, lat=-17.783889, lon=-63.182222, parking=1, piscina=0)
+
+
+def test_lru_desaloja_la_menos_usada():
+    cache = PredictionCache(max_size=2, ttl_segundos=0, decimales=5)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    assert cache.obtener('a') == 1
+
+    cache.guardar('c', 3)
+
+    assert cache.obtener('b') is None
+    assert cache.obtener('a') == 1
+    assert cache.obtener('c') == 3
+    stats = cache.estadisticas()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['size']) == (3, 1, 1, 2)
+
+
+def test_ttl_expira(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr('app.services.PredictionCache.time.monotonic', lambda: ahora[0])
+    cache = PredictionCache(max_size=10, ttl_segundos=5, decimales=5)
+    cache.guardar('a', 1)
+
+    ahora[0] += 4.9
+    assert cache.obtener('a') == 1
+    ahora[0] += 0.2
+    assert cache.obtener('a') is None
+    assert cache.estadisticas()['expired'] == 1
+
+
+def test_clave_cuantiza_lat_lon_e_incluye_version():
+    cache = PredictionCache(max_size=10, ttl_segundos=0, decimales=3)
+    a = PredictionRequest(**INMUEBLE)
+    b = PredictionRequest(**dict(INMUEBLE, lat=INMUEBLE['lat'] + 0.0001))
+    c = PredictionRequest(**dict(INMUEBLE, cuartos=3))
+
+    assert cache.clave(a, 1) == cache.clave(b, 1)
+    assert cache.clave(a, 1) != cache.clave(a, 2)
+    assert cache.clave(a, 1) != cache.clave(c, 1)
+
+
+def test_sincronizar_version_vacia_el_cache():
+    cache = PredictionCache(max_size=10, ttl_segundos=0, decimales=5)
+    cache.sincronizar_version(1)
+    cache.guardar('a', 1)
+
+    cache.sincronizar_version(1)
+    assert cache.obtener('a') == 1
+
+    cache.sincronizar_version(2)
+    assert cache.obtener('a') is None
+    assert cache.estadisticas()['invalidations'] == 1
+
+
+@pytest.fixture(scope="module")
+def servicio():
+    service = MLPredictionService()
+    if not service.model.is_trained:
+        service.entrenar_modelo(n_samples=200)
+    return service
+
+
+def test_servicio_usa_cache_y_reentrenar_lo_invalida(servicio):
+    """Las repeticiones son hits y un modelo nuevo vuelve a predecir"""
+    request = PredictionRequest(**INMUEBLE)
+    servicio.cache.invalidar()
+    antes = servicio.cache.estadisticas()
+
+    primera = servicio.predecir_precio(request)
+    segunda = servicio.predecir_precio(request)
+
+    stats = servicio.get_model_status()['cache']
+    assert segunda == primera
+    assert stats['hits'] - antes['hits'] == 1
+    assert stats['misses'] - antes['misses'] == 1
+    assert stats['model_version'] == servicio.model.version_modelo
+
+    version = servicio.model.version_modelo
+    servicio.entrenar_modelo(n_samples=200)
+
+    assert servicio.model.version_modelo == servicio.registry.version_actual() != version
+    assert servicio.cache.estadisticas()['size'] == 0
+    servicio.predecir_precio(request)
+    assert servicio.cache.estadisticas()['misses'] - stats['misses'] == 1
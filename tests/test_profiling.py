@@ -0,0 +1,73 @@
+"""
+Tests del perfil por request (X-Profile: 1)
+"""
+import pstats
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.middleware.ProfilingMiddleware import ProfilingMiddleware
+from app.api.routes import prediction
+from app.config.settings import settings
+from server import app as app_servidor
+
+INMUEBLE = {"metros": 95.0, "cuartos": 3, "banos": 2, "lat": -17.77, "lon": -63.19, "parking": 1, "piscina": 0}
+ETAPAS = ['validacion', 'geolocalizacion', 'features', 'bosque', 'incertidumbre',
+          'multiplicador', 'respuesta', 'serializacion', 'total']
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """App con el middleware instalado (como con PROFILING_ENABLED=True)"""
+    monkeypatch.setattr(settings, 'PROFILES_DIR', str(tmp_path / "profiles"))
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(prediction.router)
+    return TestClient(app)
+
+
+def etapas(server_timing: str) -> dict:
+    return {
+        parte.split(';dur=')[0].strip(): float(parte.split(';dur=')[1])
+        for parte in server_timing.split(',')
+    }
+
+
+def test_x_profile_devuelve_server_timing_y_guarda_perfil(client, tmp_path):
+    response = client.post("/predict", json=INMUEBLE, headers={"X-Profile": "1"})
+
+    assert response.status_code == 200
+    tiempos = etapas(response.headers["server-timing"])
+    assert list(tiempos) == ETAPAS
+    assert all(duracion >= 0 for duracion in tiempos.values())
+    assert tiempos['total'] >= tiempos['bosque']
+
+    perfil = tmp_path / "profiles" / f"{response.headers['x-profile-id']}.prof"
+    funciones = {funcion for _, _, funcion in pstats.Stats(str(perfil)).stats}
+    assert 'predecir_perfilado' in funciones
+    assert 'cumulative' in perfil.with_suffix('.txt').read_text()
+
+
+def test_sin_header_no_perfila(client, tmp_path):
+    response = client.post("/predict", json=INMUEBLE)
+
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_se_conservan_los_ultimos_perfiles(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'PROFILES_MAX_FILES', 2)
+    ids = [client.post("/predict", json=INMUEBLE, headers={"X-Profile": "1"}).headers["x-profile-id"]
+           for _ in range(3)]
+
+    guardados = sorted(ruta.stem for ruta in (tmp_path / "profiles").glob("*.prof"))
+    assert len(guardados) == 2 and ids[-1] in guardados
+    assert len(list((tmp_path / "profiles").glob("*.txt"))) == 2
+
+
+def test_deshabilitado_ignora_el_header():
+    assert not settings.PROFILING_ENABLED
+    response = TestClient(app_servidor).post("/predict", json=INMUEBLE, headers={"X-Profile": "1"})
+
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
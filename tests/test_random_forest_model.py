@@ -0,0 +1,152 @@
+"""
+Tests para RandomForestModel
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from app.config.settings import settings
+from app.models.RandomForestModel import RandomForestModel
+from app.services.DatasetService import DatasetService
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    """Dataset sintetico almacenado en el repositorio"""
+    return DatasetService.cargar_dataset("storage/datasets/synthetic_data.csv")
+
+
+@pytest.fixture(scope="module")
+def modelo(dataset):
+    """Modelo entrenado sobre una porcion del dataset almacenado"""
+    model = RandomForestModel()
+    model.entrenar(dataset.head(2000))
+    return model
+
+
+def _features(row) -> dict:
+    return {
+        'metros': row['metros_cuadrados'],
+        'cuartos': row['num_habitacion'],
+        'banos': row['num_banos'],
+        'zona_id': row['zona_id'],
+        'parking': row['parking'],
+        'piscina': row['piscina']
+    }
+
+
+def _prediccion_por_arbol(model: RandomForestModel, features: dict) -> dict:
+    """Implementacion anterior: un predict del bosque y uno por arbol"""
+    X = pd.DataFrame([{
+        'metros_cuadrados': features['metros'],
+        'num_habitacion': features['cuartos'],
+        'num_banos': features['banos'],
+        'zona_id': features['zona_id'],
+        'parking': features['parking'],
+        'piscina': features['piscina']
+    }])
+    precio_sugerido = model.model.predict(X)[0]
+    predicciones_arboles = np.array([tree.predict(X.to_numpy())[0] for tree in model.model.estimators_])
+    std = np.std(predicciones_arboles)
+
+    return {
+        'precio_sugerido': round(precio_sugerido, 6),
+        'precio_min': round(max(0.0001, precio_sugerido - (1.5 * std)), 6),
+        'precio_max': round(precio_sugerido + (1.5 * std), 6),
+    }
+
+
+def test_predecir_igual_que_loop_por_arbol(modelo, dataset):
+    """La pasada unica da el mismo precio e intervalo que el loop por arbol"""
+    muestras = [_features(row) for _, row in dataset.tail(100).iterrows()]
+
+    resultados = modelo.predecir_batch(muestras)
+
+    for features, resultado in zip(muestras, resultados):
+        esperado = _prediccion_por_arbol(modelo, features)
+        assert resultado['precio_sugerido'] == esperado['precio_sugerido']
+        assert resultado['precio_min'] == esperado['precio_min']
+        assert resultado['precio_max'] == esperado['precio_max']
+
+
+def test_predecir_individual_igual_que_batch(modelo, dataset):
+    """Una fila sola da el mismo resultado que dentro de un lote"""
+    muestras = [_features(row) for _, row in dataset.tail(5).iterrows()]
+
+    assert [modelo.predecir(f) for f in muestras] == modelo.predecir_batch(muestras)
+
+
+def test_predecir_sin_entrenar():
+    """Predecir sin modelo entrenado es un ValueError"""
+    with pytest.raises(ValueError):
+        RandomForestModel().predecir_batch([{}])
+
+
+@pytest.mark.parametrize("formato", ["cols", "csv", "shards"])
+def test_entrenar_por_bloques(tmp_path, dataset, formato):
+    """El bosque crece bloque a bloque hasta N_ESTIMATORS y predice como uno normal"""
+    datos = dataset.head(3000)
+    if formato == "shards":
+        ruta = tmp_path / "shards"
+        ruta.mkdir()
+        for i in range(3):
+            DatasetService.guardar_dataset(datos.iloc[i * 1000:(i + 1) * 1000], ruta / f"part-{i:05d}.cols")
+    else:
+        ruta = DatasetService.guardar_dataset(datos, tmp_path / f"datos.{formato}")
+    assert DatasetService.contar_filas(ruta) == 3000
+
+    model = RandomForestModel()
+    metrics = model.entrenar_por_bloques(ruta, filas_por_bloque=700)
+
+    assert len(model.model.estimators_) == settings.N_ESTIMATORS
+    assert not model.model.warm_start
+    assert model.is_trained and metrics['test']['r2'] > 0.8
+    resultado = model.predecir(_features(dataset.iloc[-1]))
+    assert resultado['precio_min'] <= resultado['precio_sugerido'] <= resultado['precio_max']
+
+
+def test_bloques_con_mas_bloques_que_arboles(tmp_path, dataset, monkeypatch):
+    monkeypatch.setattr(settings, 'N_ESTIMATORS', 3)
+    monkeypatch.setattr(settings, 'TRAINING_EVAL_MAX_ROWS', 50)
+    ruta = DatasetService.guardar_dataset(dataset.head(1000), tmp_path / "datos.cols")
+
+    model = RandomForestModel()
+    metrics = model.entrenar_por_bloques(ruta, filas_por_bloque=200)
+
+    # Al menos un arbol por bloque; metricas sobre una muestra acotada
+    assert len(model.model.estimators_) == 5
+    assert metrics['test']['r2'] > 0
+
+
+def test_guardar_y_cargar_compacto(modelo, dataset, tmp_path):
+    """Un .forest carga directo al motor, sin sklearn, y predice casi igual"""
+    ruta = modelo.guardar(tmp_path / "modelo.forest")
+    pickle = modelo.guardar(tmp_path / "modelo.pkl")
+    assert ruta.stat().st_size < pickle.stat().st_size / 2
+
+    compacto = RandomForestModel()
+    assert compacto.cargar(ruta)
+
+    assert compacto.model is None and compacto.is_trained
+    assert compacto.feature_names == modelo.feature_names
+    assert compacto.metrics['test']['r2'] == pytest.approx(modelo.metrics['test']['r2'])
+    info = compacto.get_info()
+    assert info['format'] == 'compact'
+    assert (info['n_estimators'], info['max_depth']) == (modelo.model.n_estimators, modelo.model.max_depth)
+
+    muestras = [_features(row) for _, row in dataset.tail(200).iterrows()]
+    for original, nuevo in zip(modelo.predecir_batch(muestras, backend='flat'), compacto.predecir_batch(muestras)):
+        assert nuevo['precio_sugerido'] == pytest.approx(original['precio_sugerido'], abs=2e-6)
+    with pytest.raises(ValueError):
+        compacto.predecir(muestras[0], backend='sklearn')
+    with pytest.raises(ValueError):
+        compacto.guardar(tmp_path / "otro.pkl")
+
+
+def test_confianza_acotada_con_r2_negativo(dataset):
+    model = RandomForestModel()
+    model.entrenar(dataset.head(300))
+    model.metrics['test']['r2'] = -0.4
+    model._preparar_features()
+
+    assert model.confianza == 0.0
+    assert model.predecir(_features(dataset.iloc[0]))['confianza'] == 0.0
@@ -0,0 +1,65 @@
+"""
+Tests del arranque diferido y del endpoint /ready
+"""
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.api.controllers.PredictionController import PredictionController
+from server import app
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+
+def test_importar_server_no_carga_sklearn_ni_pandas():
+    codigo = "import sys, server; print(sorted(m for m in ('sklearn', 'pandas', 'joblib') if m in sys.modules))"
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    assert salida.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_ready_recien_despues_de_preparar():
+    controller = PredictionController()
+    assert not controller.ml_service.model.is_trained
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(controller.ready())
+    assert error.value.status_code == 503
+    assert error.value.detail['status'] == 'starting'
+
+    controller.preparar()
+
+    data = asyncio.run(controller.ready())["data"]
+    assert data['status'] == 'ready'
+    assert controller.ml_service.model.is_trained
+    assert set(data['stage_seconds']) == {'cargar_modelo', 'calentar'}
+
+
+def test_arranque_fallido_queda_en_503(monkeypatch):
+    controller = PredictionController()
+
+    def falla():
+        raise OSError("registro inaccesible")
+    monkeypatch.setattr(controller.ml_service, 'modelo_entrenado', falla)
+    controller.preparar()
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(controller.ready())
+    assert error.value.status_code == 503
+    assert error.value.detail['status'] == 'failed'
+    assert 'registro inaccesible' in error.value.detail['error']
+
+
+def test_lifespan_prepara_en_segundo_plano():
+    with TestClient(app) as client:
+        assert client.get("/health").status_code == 200
+
+        limite = time.monotonic() + 120
+        while client.get("/ready").status_code != 200:
+            assert time.monotonic() < limite, "Timeout esperando /ready"
+            time.sleep(0.05)
+
+        assert client.get("/ready").json()["data"]["status"] == "ready"
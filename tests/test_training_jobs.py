@@ -0,0 +1,50 @@
+"""
+Tests para los jobs de entrenamiento en segundo plano
+"""
+from fastapi.testclient import TestClient
+from app.api.routes import prediction
+from app.services.TrainingJobService import TrainingJobService
+from server import app
+
+client = TestClient(app)
+
+ETAPAS = ['generar_dataset', 'entrenar', 'guardar_modelo', 'guardar_dataset']
+
+
+def test_train_responde_job_y_rechaza_solapados():
+    """POST /train responde enseguida; un segundo job mientras corre el primero es 409"""
+    ml_service = prediction.prediction_controller.ml_service
+    version = ml_service.model.version_modelo
+
+    response = client.post("/train", params={"n_samples": 200})
+    assert response.status_code == 202
+    job = response.json()["data"]
+    assert job["status"] == "running"
+
+    assert client.post("/train", params={"n_samples": 200}).status_code == 409
+
+    final = prediction.prediction_controller.training_jobs.esperar(job["job_id"], timeout=120)
+    assert final["status"] == "completed", final["error"]
+
+    data = client.get(f"/train/{job['job_id']}").json()["data"]
+    assert data["metrics"]["test"]["r2"] > 0
+    assert list(data["stage_seconds"]) == ETAPAS + ['cargar_modelo', 'total']
+    assert ml_service.model.version_modelo == data["version"] != version
+    assert ml_service.registry.version_actual() == data["version"]
+
+
+def test_train_status_inexistente():
+    assert client.get("/train/noexiste").status_code == 404
+
+
+def test_politica_queue_corre_los_jobs_en_orden():
+    servicio = TrainingJobService(politica='queue', max_en_cola=1)
+
+    primero = servicio.crear(100)
+    segundo = servicio.crear(100)
+
+    assert segundo["status"] == "queued"
+    assert servicio.esperar(primero["job_id"], timeout=120)["status"] == "completed"
+    final = servicio.esperar(segundo["job_id"], timeout=120)
+    assert final["status"] == "completed"
+    assert final["started_at"] >= servicio.obtener(primero["job_id"])["finished_at"]
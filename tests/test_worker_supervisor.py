@@ -0,0 +1,127 @@
+"""
+Tests del servidor pre-fork (main.py con SERVER_WORKERS > 1)
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+import httpx
+import pytest
+from app.models.ModelRegistry import ModelRegistry
+from app.models.RandomForestModel import RandomForestModel
+from app.services.DatasetService import DatasetService
+
+RAIZ = Path(__file__).resolve().parents[1]
+INMUEBLE = {"metros": 95.0, "cuartos": 3, "banos": 2, "lat": -17.77, "lon": -63.19, "parking": 1, "piscina": 0}
+
+pytestmark = pytest.mark.skipif(not Path('/proc/self/stat').exists(), reason="Pre-fork y /proc: solo Linux")
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def hijos(pid: int) -> set[int]:
+    """Procesos cuyo padre es `pid`"""
+    encontrados = set()
+    for stat in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            campos = stat.read_text().rsplit(')', 1)[1].split()
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+        if int(campos[1]) == pid:
+            encontrados.add(int(stat.parent.name))
+    return encontrados
+
+
+def esperar(condicion, timeout: float = 60, mensaje: str = ""):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        resultado = condicion()
+        if resultado:
+            return resultado
+        time.sleep(0.1)
+    raise AssertionError(f"Timeout esperando: {mensaje}")
+
+
+def modelo(n_samples: int) -> RandomForestModel:
+    model = RandomForestModel()
+    model.entrenar(DatasetService.generar_dataset_sintetico(n_samples), {'n_estimators': 10})
+    return model
+
+
+@pytest.fixture
+def servidor(tmp_path):
+    """main.py con 2 workers sobre un registro con una version"""
+    registry = ModelRegistry(tmp_path / "registry")
+    registry.registrar(modelo(150))
+    puerto = puerto_libre()
+    env = {
+        **os.environ,
+        'PORT': str(puerto),
+        'HOST': '127.0.0.1',
+        'SERVER_WORKERS': '2',
+        'SERVER_VERSION_POLL_SECONDS': '0.2',
+        'SERVER_GRACEFUL_TIMEOUT': '5',
+        'MODEL_REGISTRY_DIR': str(registry.directorio),
+        'MODEL_PATH': str(tmp_path / "modelo.pkl"),
+        'DATASET_PATH': str(tmp_path / "dataset.cols"),
+    }
+    proceso = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=RAIZ, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    cliente = httpx.Client(base_url=f"http://127.0.0.1:{puerto}", timeout=10)
+
+    def responde():
+        try:
+            return cliente.get("/health").status_code == 200
+        except httpx.TransportError:
+            return proceso.poll() is not None
+    esperar(responde, mensaje="arranque del servidor")
+    assert proceso.poll() is None
+
+    yield proceso, cliente, registry
+
+    cliente.close()
+    if proceso.poll() is None:
+        proceso.kill()
+        proceso.wait()
+
+
+def test_reinicia_workers_caidos_y_renueva_con_version_nueva(servidor):
+    proceso, cliente, registry = servidor
+    workers = esperar(lambda: len(hijos(proceso.pid)) == 2 and hijos(proceso.pid), mensaje="2 workers")
+    assert cliente.post("/predict", json=INMUEBLE).status_code == 200
+
+    # Un worker que muere se reemplaza
+    caido = min(workers)
+    os.kill(caido, signal.SIGKILL)
+    reemplazo = esperar(
+        lambda: len(hijos(proceso.pid)) == 2 and caido not in hijos(proceso.pid) and hijos(proceso.pid),
+        mensaje="reemplazo del worker caido"
+    )
+    assert max(workers) in reemplazo
+    assert cliente.post("/predict", json=INMUEBLE).status_code == 200
+
+    # Una version nueva en el registro renueva todos los workers
+    version = registry.registrar(modelo(250))
+    renovados = esperar(
+        lambda: len(hijos(proceso.pid)) == 2 and not hijos(proceso.pid) & reemplazo and hijos(proceso.pid),
+        mensaje="renovacion de workers"
+    )
+    for _ in range(10):
+        data = cliente.get("/status").json()["data"]
+        assert data["model"]["version_modelo"] == version
+        assert data["pid"] in renovados
+    assert cliente.post("/predict", json=INMUEBLE).status_code == 200
+
+    # SIGTERM apaga el supervisor y sus workers
+    proceso.send_signal(signal.SIGTERM)
+    assert proceso.wait(timeout=30) == 0
+    assert not hijos(proceso.pid)
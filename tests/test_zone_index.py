@@ -0,0 +1,136 @@
+"""
+Tests para ZoneIndex
+"""
+import json
+import numpy as np
+import pytest
+from app.services.GeolocationService import GeolocationService
+from app.services.ZoneIndex import ZoneIndex
+
+
+def _zona(nombre, zona_id, anillos, multiplicador=1.1):
+    return {'nombre': nombre, 'zona_id': zona_id, 'multiplicador_precio': multiplicador, 'anillos': anillos}
+
+
+def _poligonos_aleatorios(n, semilla=0):
+    """Poligonos estrellados de 12 vertices repartidos sobre Santa Cruz"""
+    rng = np.random.default_rng(semilla)
+    angulos = np.linspace(0, 2 * np.pi, 12, endpoint=False)
+    zonas = []
+    for i in range(n):
+        lon_c, lat_c = rng.uniform(-63.3, -63.05), rng.uniform(-17.9, -17.65)
+        radios = rng.uniform(0.004, 0.015, len(angulos))
+        anillo = np.column_stack([lon_c + radios * np.cos(angulos), lat_c + radios * np.sin(angulos)])
+        zonas.append(_zona(f"Z{i}", 1000 + i, [anillo.tolist()]))
+    return zonas
+
+
+def _dentro_fuerza_bruta(zona, lat, lon):
+    """Referencia: bounding box inclusivo o ray casting sobre cada anillo"""
+    if 'bbox' in zona:
+        bbox = zona['bbox']
+        return bbox['lat_min'] <= lat <= bbox['lat_max'] and bbox['lon_min'] <= lon <= bbox['lon_max']
+    dentro = False
+    for anillo in zona['anillos']:
+        for (x1, y1), (x2, y2) in zip(anillo, anillo[1:] + anillo[:1]):
+            if (y1 > lat) != (y2 > lat) and lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+                dentro = not dentro
+    return dentro
+
+
+def test_grilla_igual_a_fuerza_bruta():
+    """Con 300 poligonos solapados el indice da la primera zona que contiene cada punto"""
+    zonas = ZoneIndex.convertir_zonas_especiales(GeolocationService.ZONAS_ESPECIALES)
+    zonas += _poligonos_aleatorios(300)
+    indice = ZoneIndex(zonas)
+
+    rng = np.random.default_rng(1)
+    lats = rng.uniform(-17.95, -17.6, 3000)
+    lons = rng.uniform(-63.35, -63.0, 3000)
+
+    batch = indice.buscar_batch(lats, lons)
+
+    for i, (lat, lon) in enumerate(zip(lats.tolist(), lons.tolist())):
+        esperado = next((z for z, zona in enumerate(zonas) if _dentro_fuerza_bruta(zona, lat, lon)), -1)
+        assert batch[i] == esperado
+        assert indice.buscar(lat, lon) == esperado
+    assert np.count_nonzero(batch >= 0) > 100
+
+
+def test_poligono_con_hueco_y_multipoligono():
+    """La regla par-impar excluye los huecos y acepta varias partes"""
+    exterior = [[0, 0], [4, 0], [4, 4], [0, 4], [0, 0]]
+    hueco = [[1, 1], [3, 1], [3, 3], [1, 3], [1, 1]]
+    otra_parte = [[10, 10], [11, 10], [10.5, 11]]
+    indice = ZoneIndex([_zona("A", 1, [exterior, hueco, otra_parte])])
+
+    lats = np.array([0.5, 2.0, 10.2, 10.9, -1.0])
+    lons = np.array([0.5, 2.0, 10.5, 10.8, 0.5])
+
+    assert indice.buscar_batch(lats, lons).tolist() == [0, -1, 0, -1, -1]
+    assert [indice.buscar(lat, lon) for lat, lon in zip(lats, lons)] == [0, -1, 0, -1, -1]
+
+
+def test_bordes_de_rectangulo_inclusivos():
+    """Los rectangulos incluyen sus cuatro bordes, como el chequeo original"""
+    indice = ZoneIndex(ZoneIndex.convertir_zonas_especiales(GeolocationService.ZONAS_ESPECIALES))
+    bbox = GeolocationService.ZONAS_ESPECIALES['Urubo']['bbox']
+    lats = [bbox['lat_min'], bbox['lat_max'], bbox['lat_min'], bbox['lat_max'] + 1e-9]
+    lons = [bbox['lon_min'], bbox['lon_max'], bbox['lon_max'], bbox['lon_max']]
+
+    assert indice.buscar_batch(lats, lons).tolist() == [1, 1, 1, -1]
+    assert indice.zona(1) == {'nombre': 'Urubo', 'zona_id': 102, 'multiplicador': 1.3}
+
+
+def test_indice_vacio():
+    indice = ZoneIndex([])
+
+    assert indice.buscar_batch([-17.78], [-63.18]).tolist() == [-1]
+    assert indice.buscar(-17.78, -63.18) == -1
+    assert indice.zona(-1) is None
+
+
+@pytest.fixture
+def zonas_geojson(tmp_path):
+    """GeoJSON con un barrio que solapa Equipetrol y otro aparte; restaura el indice al final"""
+    coleccion = {
+        'type': 'FeatureCollection',
+        'features': [
+            {
+                'type': 'Feature',
+                'properties': {'nombre': 'Barrio A', 'zona_id': 201, 'multiplicador_precio': 1.1},
+                'geometry': {'type': 'Polygon', 'coordinates': [[
+                    [-63.21, -17.78], [-63.19, -17.78], [-63.19, -17.76], [-63.21, -17.76], [-63.21, -17.78]
+                ]]}
+            },
+            {
+                'type': 'Feature',
+                'properties': {'name': 'Barrio B', 'zona_id': 202},
+                'geometry': {'type': 'MultiPolygon', 'coordinates': [[[
+                    [-63.10, -17.85], [-63.08, -17.85], [-63.09, -17.83]
+                ]]]}
+            }
+        ]
+    }
+    ruta = tmp_path / "zonas.geojson"
+    ruta.write_text(json.dumps(coleccion), encoding='utf-8')
+
+    anterior = GeolocationService.INDICE_ZONAS
+    yield ruta
+    GeolocationService.INDICE_ZONAS = anterior
+
+
+def test_cargar_zonas_geojson(zonas_geojson):
+    """Las zonas del GeoJSON se suman a las fijas, que conservan la prioridad"""
+    GeolocationService.cargar_zonas(str(zonas_geojson))
+
+    assert len(GeolocationService.INDICE_ZONAS) == len(GeolocationService.ZONAS_ESPECIALES) + 2
+    assert GeolocationService.detectar_zona_especial(-17.768, -63.195)['nombre'] == 'Equipetrol'
+    assert GeolocationService.detectar_zona_especial(-17.775, -63.205) == {
+        'nombre': 'Barrio A', 'zona_id': 201, 'multiplicador': 1.1
+    }
+
+    batch = GeolocationService.analizar_ubicacion_batch([-17.775, -17.845], [-63.205, -63.09])
+    assert batch['zona_especial'].tolist() == ['Barrio A', 'Barrio B']
+    assert batch['zona_id'].tolist() == [201, 202]
+    assert batch['multiplicador_precio'].tolist() == [1.1, 1.0]
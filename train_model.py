@@ -6,6 +6,7 @@ Ejecutar antes de iniciar el servicio por primera vez
 import sys
 import io
 from app.services.DatasetService import DatasetService
+from app.models.ModelRegistry import ModelRegistry
 from app.models.RandomForestModel import RandomForestModel
 
 # Fix encoding para Windows
@@ -30,9 +31,10 @@ def main():
     model = RandomForestModel()
     metrics = model.entrenar(df)
 
-    # 4. Guardar modelo
-    print("\nPaso 4: Guardando modelo entrenado...")
-    model.guardar()
+    # 4. Registrar modelo como version nueva (y activarla)
+    print("\nPaso 4: Registrando modelo entrenado...")
+    version = ModelRegistry().registrar(model, metadatos={'n_samples': len(df)})
+    print(f"Version activa: {version}")
 
     # 5. Resumen
     print("\n" + "=" * 60)